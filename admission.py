@@ -0,0 +1,211 @@
+"""
+admission.py - 부하 기반 입장 제어 (단계적 축소)
+
+인파가 몰리면 공유 엔진이 모든 턴을 받아들이고 모두가 함께 느려져 결국
+키오스크마다 시간 초과가 난다. 입장 제어기는 진행 중인 턴 수(대기열 깊이)와
+최근 턴 소요 시간으로 부하를 재고, 부하가 클수록 턴의 비용을 한 단계씩 줄인다.
+
+    0 normal        전체 파이프라인
+    1 cached_tts    응답 음성을 새로 합성하지 않음 (캐시에 있으면 쓰고, 없으면 공통 안내 음성)
+    2 fast_parser   + LLM 대신 규칙 파서만
+    3 reduced_beam  + Whisper 빔 1 (그리디) 디코딩
+    4 reject        "잠시 후 다시 말씀해 주세요" 즉시 응답 (STT도 돌리지 않음)
+
+턴은 제출된 순간(enqueue)부터 센다. 작업 큐에서 기다리는 턴도 진행 중으로 보고,
+턴 소요 시간과 이 턴이 이미 기다린 시간에도 큐 대기 시간이 들어간다.
+
+부하 = max(진행 중인(대기 포함) 턴 수 / 처리 슬롯 수,
+           최근 턴 소요 시간 p90 / 목표 시간, 이 턴의 큐 대기 시간 / 목표 시간).
+부하가 올라가면 바로 해당 단계로 가고, 내려갈 때는 부하가 문턱의 hysteresis배
+아래로 떨어져야 내려온다 (경계에서 단계가 오락가락하지 않도록). 시간으로
+버티지 않으므로 몰림이 풀리면 다음 턴부터 바로 정상 처리로 돌아온다.
+단계 전환은 로그로, 턴별 결정은 최근 기록(stats()["recent"])과
+PipelineResult.admission으로 남는다.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import math
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Iterator
+
+logger = logging.getLogger("malpyo.admission")
+
+LEVEL_NORMAL = 0
+LEVEL_CACHED_TTS = 1
+LEVEL_FAST_PARSER = 2
+LEVEL_REDUCED_BEAM = 3
+LEVEL_REJECT = 4
+
+LEVEL_NAMES = ("normal", "cached_tts", "fast_parser", "reduced_beam", "reject")
+
+
+@dataclass
+class Ticket:
+    """제출된 턴 하나 (큐 대기 시간을 재고, 끝나면 한 번만 반납된다)."""
+    enqueued_at: float          # time.monotonic()
+    released: bool = False
+
+
+@dataclass
+class Decision:
+    """턴 하나에 대한 입장 결정."""
+    level: int
+    inflight: int               # 이 턴을 포함한 진행 중인(대기 포함) 턴 수
+    pressure: float
+    decided_at: float           # time.time()
+    waited: float = 0.0         # 제출부터 결정까지 큐에서 기다린 시간(초)
+
+    @property
+    def name(self) -> str:
+        return LEVEL_NAMES[self.level]
+
+    @property
+    def reject(self) -> bool:
+        return self.level >= LEVEL_REJECT
+
+    @property
+    def cached_tts(self) -> bool:
+        return self.level >= LEVEL_CACHED_TTS
+
+    @property
+    def fast_parser(self) -> bool:
+        return self.level >= LEVEL_FAST_PARSER
+
+    @property
+    def reduced_beam(self) -> bool:
+        return self.level >= LEVEL_REDUCED_BEAM
+
+
+class AdmissionController:
+    """진행 중인 턴 수와 최근 턴 지연으로 축소 단계를 정한다."""
+
+    def __init__(
+        self,
+        capacity: int = 4,
+        target_latency: float = 4.0,
+        thresholds: tuple[float, float, float, float] = (0.75, 1.0, 1.5, 2.0),
+        window: int = 50,
+        window_seconds: float = 60.0,
+        min_samples: int = 5,
+        hysteresis: float = 0.8,
+        history: int = 200,
+    ) -> None:
+        """
+        Args:
+            capacity: 동시에 처리할 수 있는 턴 수 (엔진 처리 슬롯 수)
+            target_latency: 턴 전체 소요 시간 목표(초). 최근 p90이 이를 넘으면 부하로 본다
+            thresholds: 단계 1~4로 올라가는 부하 값
+            window: 지연 p90을 계산할 최근 턴 수
+            window_seconds: 이보다 오래된 턴은 지연 p90에서 뺀다
+            min_samples: 지연 p90을 부하로 쓰기 위한 최소 턴 수 (첫 턴의 모델 로딩 등)
+            hysteresis: 단계를 유지하는 부하 하한 = 그 단계 문턱 × hysteresis
+            history: stats()에 남길 최근 결정 수
+        """
+        self.capacity = max(1, capacity)
+        self.target_latency = target_latency
+        self.thresholds = thresholds
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self.hysteresis = hysteresis
+        # (끝난 시각, 소요 시간)
+        self._latencies: deque[tuple[float, float]] = deque(maxlen=window)
+        self._recent: deque[dict] = deque(maxlen=history)
+        self._counts: Counter[str] = Counter()
+        self._inflight = 0
+        self._level = LEVEL_NORMAL
+        self._lock = threading.Lock()
+
+    @property
+    def level(self) -> str:
+        with self._lock:
+            return LEVEL_NAMES[self._level]
+
+    def enqueue(self) -> Ticket:
+        """턴이 제출되었음을 알린다. 실행을 기다리는 동안에도 진행 중인 턴으로 센다."""
+        with self._lock:
+            self._inflight += 1
+        return Ticket(time.monotonic())
+
+    def release(self, ticket: Ticket) -> None:
+        """실행되지 않고 버려진 턴을 반납한다 (이미 반납된 턴은 무시)."""
+        with self._lock:
+            self._release_locked(ticket)
+
+    def _release_locked(self, ticket: Ticket) -> None:
+        if not ticket.released:
+            ticket.released = True
+            self._inflight -= 1
+
+    @contextlib.contextmanager
+    def admit(self, ticket: Ticket | None = None) -> Iterator[Decision]:
+        """턴 하나를 입장시키고 결정을 내준다. 끝나면 소요 시간을 지연 창에 넣는다.
+
+        ticket이 있으면 제출 시각부터 잰다 (큐 대기 포함). 없으면 지금 제출한 것으로 본다.
+        거절된 턴은 지연 창에 넣지 않는다 (즉시 끝나므로 p90을 끌어내린다).
+        """
+        ticket = ticket or self.enqueue()
+        with self._lock:
+            decision = self._decide_locked(time.monotonic(), ticket.enqueued_at)
+        try:
+            yield decision
+        finally:
+            end = time.monotonic()
+            with self._lock:
+                self._release_locked(ticket)
+                if not decision.reject:
+                    self._latencies.append((end, end - ticket.enqueued_at))
+
+    def _decide_locked(self, now: float, enqueued_at: float) -> Decision:
+        waited = now - enqueued_at
+        pressure = max(
+            self._inflight / self.capacity,
+            self._p90_locked(now) / self.target_latency,
+            waited / self.target_latency,
+        )
+        previous = self._level
+        up = sum(1 for t in self.thresholds if pressure >= t)
+        hold = sum(1 for t in self.thresholds if pressure >= t * self.hysteresis)
+        self._level = max(up, min(previous, hold))
+        if self._level != previous:
+            log = logger.warning if self._level > previous else logger.info
+            log(
+                "입장 제어 단계 %s → %s (진행 중 %d, 부하 %.2f)",
+                LEVEL_NAMES[previous], LEVEL_NAMES[self._level], self._inflight, pressure,
+            )
+
+        decision = Decision(
+            self._level, self._inflight, round(pressure, 3), time.time(), round(waited, 3)
+        )
+        self._counts[decision.name] += 1
+        self._recent.append({
+            "at": decision.decided_at,
+            "level": decision.name,
+            "inflight": decision.inflight,
+            "pressure": decision.pressure,
+            "waited": decision.waited,
+        })
+        return decision
+
+    def _p90_locked(self, now: float) -> float:
+        # 거절이 이어지면 새 지연이 쌓이지 않으므로 오래된 기록은 시간으로 흘려보낸다
+        recent = sorted(d for t, d in self._latencies if now - t <= self.window_seconds)
+        if len(recent) < self.min_samples:
+            return 0.0
+        return recent[max(0, math.ceil(len(recent) * 0.9) - 1)]
+
+    def stats(self, recent: int = 20) -> dict:
+        """현재 단계, 진행 중인 턴 수, 지연 p90, 단계별 결정 수, 최근 결정."""
+        with self._lock:
+            return {
+                "level": LEVEL_NAMES[self._level],
+                "inflight": self._inflight,
+                "p90_latency": round(self._p90_locked(time.monotonic()), 3),
+                "decisions": dict(self._counts),
+                "recent": list(self._recent)[-recent:],
+            }
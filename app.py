@@ -8,12 +8,38 @@ app.py - 말표(Mal-Pyo) 키오스크 UI
 
 from __future__ import annotations
 
+import atexit
 import logging
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import date, datetime
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import streamlit as st
 
-from engine import MalPyoEngine
+from audio_codec import AudioEncoding
+from audio_store import AudioStore
+from booking_journal import Booking, BookingJournal
+from engine import MalPyoEngine, PipelineResult
+from engine_client import RemoteEngine
+from inventory import SeatInventory
+from llm_engine import LLMEngine
+from prefetch import predict_replies
+from rule_parser import RuleParser
+from shared_cache import SharedCache
+from station_index import StationIndex
+from stt_pool import build_stt
+from tts_engine import TTSEngine
+from voice_jobs import VoiceJobRunner
+
+if TYPE_CHECKING:
+    # 운임 엔진·호출어 감지기는 numpy를 쓰므로 처음 필요할 때 불러온다
+    from fare_engine import FareEngine, Quote
+    from wake_word import WakeListener
 
 logger = logging.getLogger("malpyo.app")
 
@@ -59,19 +85,154 @@ DEFAULT_PRICE = 15000
 # 파이프라인 엔진 (세션 간 공유, 1회만 로드)
 # ─────────────────────────────────────────────────────────────
 @st.cache_resource
-def get_engine() -> MalPyoEngine:
-    return MalPyoEngine()
+def get_inventory() -> SeatInventory:
+    # 모든 세션이 같은 좌석 재고를 공유해야 초과 판매를 막을 수 있다
+    return SeatInventory.daily(
+        CITIES[1:],
+        TIME_SLOTS[1:],
+        seats=int(os.getenv("MALPYO_SEATS_PER_DEPARTURE", "45")),
+        hold_ttl=float(os.getenv("MALPYO_SEAT_HOLD_SECONDS", "300")),
+    )
+
+
+@st.cache_resource
+def get_station_index() -> StationIndex:
+    # 역 인덱스 파일(station_index.py build로 생성)이 있으면 사용하고,
+    # 없으면 화면의 도시 목록으로 만든다
+    index_path = Path(os.getenv("MALPYO_STATION_INDEX", Path(__file__).parent / "data" / "stations.json"))
+    if index_path.is_file():
+        return StationIndex.load(index_path)
+    return StationIndex(CITIES[1:])
+
+
+@st.cache_resource
+def get_engine() -> MalPyoEngine | RemoteEngine:
+    # 추론 서버(server.py)가 지정되면 모델을 싣지 않는 얇은 클라이언트로 동작한다
+    engine_url = os.getenv("MALPYO_ENGINE_URL")
+    if engine_url:
+        return RemoteEngine(engine_url)
+    # 응답 음성 출력 포맷은 키오스크별 환경 변수로 선택 (기본: 무압축 WAV)
+    encoding = AudioEncoding.from_env()
+    # 예매 프롬프트/규칙 파서의 시간 어휘는 시간표의 출발시각을 따른다
+    # 도시 어휘는 발화에서 검색된 후보 역만 프롬프트에 넣는다
+    time_slots = get_inventory().time_vocabulary()
+    stations = get_station_index()
+    # 같은 머신의 다른 Streamlit 프로세스와 LLM 파싱/응답 음성 캐시를 공유한다 (선택)
+    shared = SharedCache.from_env()
+    engine = MalPyoEngine(
+        stt=build_stt(vocabulary=CITIES[1:]),
+        llm=LLMEngine(
+            cities=CITIES[1:], time_slots=time_slots, station_index=stations, cache=shared
+        ),
+        tts=TTSEngine(encoding=encoding, cache=shared),
+        fallback=RuleParser(cities=CITIES[1:], time_slots=time_slots, station_index=stations),
+    )
+    # 화면은 먼저 띄우고 STT 모델은 백그라운드에서 싣는다
+    engine.warmup()
+    engine.health.start()
+    return engine
+
+
+@st.cache_resource
+def get_voice_jobs() -> VoiceJobRunner:
+    return VoiceJobRunner(get_engine())
+
+
+@st.cache_resource
+def get_fare_engine() -> FareEngine:
+    from fare_engine import FareEngine, FareTable
+
+    # 운임 디렉터리(fare_engine.py build로 생성)가 있으면 메모리 매핑으로 불러오고,
+    # 없으면 내장 PRICE_MAP으로 운임표를 만든다
+    fare_dir = Path(os.getenv("MALPYO_FARE_DIR", Path(__file__).parent / "data" / "fares"))
+    if fare_dir.is_dir():
+        table = FareTable.load(fare_dir)
+    else:
+        table = FareTable.from_pairs(PRICE_MAP, CITIES[1:], DEFAULT_PRICE)
+    return FareEngine(table, DISCOUNTS)
+
+
+@st.cache_resource
+def get_audio_store() -> AudioStore:
+    # 세션에는 오디오 ID만 두고, 실제 bytes는 상한이 있는 공용 저장소에 둔다
+    max_mb = int(os.getenv("MALPYO_AUDIO_STORE_MB", "64"))
+    return AudioStore(max_bytes=max_mb * 1024 * 1024)
+
+
+@st.cache_resource
+def get_journal() -> BookingJournal | None:
+    # 완료된 예매를 추가 전용 저널에 남긴다 (쓰기는 백그라운드에서 묶어서 fsync)
+    journal = BookingJournal.from_env()
+    if journal is not None:
+        atexit.register(journal.close)
+    return journal
+
+
+# 핸즈프리 마이크를 차지한 세션이 이 시간(초) 넘게 소식이 없으면 (탭을 닫음 등)
+# 요청을 버리고, 다른 키오스크 세션이 넘겨받을 수 있다
+WAKE_CLAIM_TIMEOUT = 5.0
+
+
+@st.cache_resource
+def get_wake_target() -> dict:
+    """핸즈프리 마이크를 차지한 키오스크 세션과, 그 세션이 아직 가져가지 않은 요청 오디오.
+
+    session_id: 차지한 세션, seen: 마지막 확인 시각(monotonic),
+    listening: 호출어를 받는 중인지 (처리 중·음성 바가 없는 화면이면 False)
+    """
+    return {
+        "lock": threading.Lock(), "session_id": None, "seen": 0.0,
+        "listening": False, "audio": None,
+    }
+
+
+@st.cache_resource
+def get_wake_listener() -> WakeListener | None:
+    # 키오스크 마이크로 "말표야"를 기다린다 (MALPYO_WAKE_MODEL 설정 시).
+    # 호출 뒤 녹음한 요청은 마이크를 차지한 키오스크 세션이 가져가, 그 세션의
+    # 현재 화면과 선택으로 음성 턴을 제출한다 (watch_wake)
+    from wake_word import WakeListener
+
+    target = get_wake_target()
+
+    def _submit(audio_bytes: bytes) -> None:
+        with target["lock"]:
+            fresh = time.monotonic() - target["seen"] <= WAKE_CLAIM_TIMEOUT
+            if target["session_id"] is None or not fresh or not target["listening"]:
+                logger.info("핸즈프리 요청을 받을 키오스크 화면이 없어 버림")
+                return
+            target["audio"] = audio_bytes
+
+    listener = WakeListener.from_env(_submit)
+    if listener is None:
+        return None
+    try:
+        listener.start(device=os.getenv("MALPYO_WAKE_DEVICE") or None)
+    except Exception as e:
+        logger.warning("핸즈프리 모드를 켤 수 없습니다: %s", e)
+        return None
+    atexit.register(listener.stop)
+    return listener
 
 
 # ─────────────────────────────────────────────────────────────
-# CSS (외부 파일 로드)
+# CSS (외부 파일 로드, 프로세스당 1회 읽고 압축)
 # ─────────────────────────────────────────────────────────────
 STATIC_DIR = Path(__file__).parent / "static"
 
+
+@st.cache_data
+def build_css_markup() -> str:
+    """kiosk.css를 읽어 주석/공백을 걷어낸 <style> 태그로 만든다."""
+    css_text = (STATIC_DIR / "kiosk.css").read_text(encoding="utf-8")
+    css_text = re.sub(r"/\*.*?\*/", "", css_text, flags=re.S)
+    css_text = re.sub(r"\s+", " ", css_text)
+    css_text = re.sub(r"\s*([{};,>])\s*", r"\1", css_text)
+    return f"<style>{css_text.strip()}</style>"
+
+
 def load_css():
-    css_path = STATIC_DIR / "kiosk.css"
-    css_text = css_path.read_text(encoding="utf-8")
-    st.markdown(f"<style>{css_text}</style>", unsafe_allow_html=True)
+    st.markdown(build_css_markup(), unsafe_allow_html=True)
 
 load_css()
 
@@ -98,7 +259,7 @@ DEFAULTS: dict = {
     "voice_phase": VOICE_IDLE,
     "recognized_text": "",
     "reply_text": "",          # LLM 응답 텍스트
-    "reply_audio": None,       # TTS 음성 bytes
+    "reply_audio_id": None,    # TTS 음성의 AudioStore ID
     "page": PAGE_BOOKING,
     "sel_departure": "선택",
     "sel_arrival": "선택",
@@ -106,27 +267,33 @@ DEFAULTS: dict = {
     "sel_passengers": 1,
     "sel_discounts": ["normal"],
     "sel_payment": None,
+    "seat_hold_id": None,      # 결제 단계 동안 보류 중인 좌석
+    "seat_error": "",
     "widget_key_version": 0,
 }
 for _k, _v in DEFAULTS.items():
     if _k not in st.session_state:
         st.session_state[_k] = _v if not isinstance(_v, list) else _v.copy()
 
+# 세션 식별자 (진행 중인 음성 턴 취소용, 처음으로 돌아가도 유지)
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
 
 # ─────────────────────────────────────────────────────────────
 # 유틸
 # ─────────────────────────────────────────────────────────────
+DISCOUNT_BY_ID = {d["id"]: d for d in DISCOUNTS}
+
+
 def get_price() -> int:
     dep = st.session_state.sel_departure
     arr = st.session_state.sel_arrival
-    return PRICE_MAP.get((dep, arr), PRICE_MAP.get((arr, dep), DEFAULT_PRICE))
+    return get_fare_engine().table.price(dep, arr)
 
 
 def get_discount_by_id(discount_id: str) -> dict:
-    for d in DISCOUNTS:
-        if d["id"] == discount_id:
-            return d
-    return DISCOUNTS[0]
+    return DISCOUNT_BY_ID.get(discount_id, DISCOUNTS[0])
 
 
 def sync_discounts_length():
@@ -139,17 +306,51 @@ def sync_discounts_length():
         st.session_state.sel_discounts = current[:pax]
 
 
+def get_quote() -> Quote:
+    """현재 구간과 탑승객별 할인으로 견적을 계산한다 (벡터 연산 1회)."""
+    sync_discounts_length()
+    return get_fare_engine().quote(
+        st.session_state.sel_departure,
+        st.session_state.sel_arrival,
+        st.session_state.sel_discounts,
+    )
+
+
 def calc_total() -> tuple[int, int, int]:
     """(기본운임 합계, 할인 합계, 최종 금액) 반환."""
-    base_unit = get_price()
-    pax = st.session_state.sel_passengers
-    sync_discounts_length()
-    total_base = base_unit * pax
-    total_discount = 0
-    for disc_id in st.session_state.sel_discounts:
-        info = get_discount_by_id(disc_id)
-        total_discount += int(base_unit * info["rate"] / 100)
-    return total_base, total_discount, total_base - total_discount
+    quote = get_quote()
+    return quote.total_base, quote.total_discount, quote.final
+
+
+def travel_date() -> str:
+    """승차일 (당일 발권만 하므로 쓸 때마다 오늘 날짜, 자정을 넘긴 세션도 새 날짜로)."""
+    return date.today().isoformat()
+
+
+def route_selected() -> bool:
+    dep = st.session_state.sel_departure
+    arr = st.session_state.sel_arrival
+    return "선택" not in (dep, arr) and dep != arr
+
+
+def get_departures() -> dict[str, int]:
+    """선택한 구간의 오늘 남은 출발시각 → 잔여석. 구간이 정해지지 않았으면 빈 딕셔너리.
+
+    이미 출발한 시각은 보여 주지도, 보류하지도 않는다.
+    """
+    if not route_selected():
+        return {}
+    return dict(get_inventory().next_departures(
+        st.session_state.sel_departure,
+        st.session_state.sel_arrival,
+        travel_date(),
+        after=datetime.now().strftime("%H:%M"),
+        n=None,
+    ))
+
+
+def get_time_options() -> list[str]:
+    return ["선택", *get_departures()] if route_selected() else TIME_SLOTS
 
 
 def can_proceed_booking() -> bool:
@@ -158,14 +359,21 @@ def can_proceed_booking() -> bool:
         st.session_state.sel_arrival != "선택",
         st.session_state.sel_time != "선택",
         st.session_state.sel_departure != st.session_state.sel_arrival,
+        get_departures().get(st.session_state.sel_time, 0) >= st.session_state.sel_passengers,
     ])
 
 
 # ─────────────────────────────────────────────────────────────
 # 핸들러
 # ─────────────────────────────────────────────────────────────
+def cancel_voice_turn():
+    """진행 중인 STT/LLM/TTS 작업을 중단시킨다."""
+    get_voice_jobs().discard(st.session_state.session_id)
+
+
 def handle_voice_reset():
     """음성 바를 초기 상태로 되돌린다."""
+    cancel_voice_turn()
     st.session_state.voice_phase = VOICE_IDLE
     st.session_state.recognized_text = ""
     st.session_state.widget_key_version += 1
@@ -178,60 +386,172 @@ def handle_swap():
     st.session_state.sel_arrival = dep
 
 
+def release_session_audio():
+    """세션이 가진 응답 음성을 공용 저장소에서 해제한다."""
+    get_audio_store().release_owner(st.session_state.session_id)
+    st.session_state.reply_audio_id = None
+
+
+def hold_seats() -> bool:
+    """결제 단계 진입 시 좌석을 보류한다."""
+    release_seats()
+    if st.session_state.sel_time not in get_departures():
+        # 예매 화면을 띄워 둔 사이에 출발 시각이 지났을 수 있다
+        st.session_state.seat_error = "이미 출발한 시간입니다. 다른 시간을 선택해 주세요."
+        return False
+    st.session_state.seat_hold_id = get_inventory().hold(
+        st.session_state.sel_departure,
+        st.session_state.sel_arrival,
+        travel_date(),
+        st.session_state.sel_time,
+        st.session_state.sel_passengers,
+        owner=st.session_state.session_id,
+    )
+    if st.session_state.seat_hold_id is None:
+        st.session_state.seat_error = "선택하신 시간의 잔여석이 부족합니다. 다른 시간을 선택해 주세요."
+        return False
+    return True
+
+
+def confirm_seats() -> bool:
+    """결제 완료 시 보류 좌석을 확정한다. 보류가 만료됐으면 다시 잡아 본다."""
+    inventory = get_inventory()
+    if inventory.confirm(st.session_state.seat_hold_id):
+        st.session_state.seat_hold_id = None
+        return True
+    if hold_seats() and inventory.confirm(st.session_state.seat_hold_id):
+        st.session_state.seat_hold_id = None
+        return True
+    st.session_state.seat_hold_id = None
+    st.session_state.seat_error = "좌석 보류 시간이 지나 매진되었습니다. 다시 선택해 주세요."
+    return False
+
+
+def record_booking():
+    """확정된 예매를 저널에 남긴다 (버퍼에 넣기만 하므로 완료 화면을 늦추지 않음)."""
+    journal = get_journal()
+    if journal is None:
+        return
+    base, discount, final = calc_total()
+    try:
+        journal.append(Booking(
+            booking_id=uuid.uuid4().hex[:12],
+            ts=time.time(),
+            session_id=st.session_state.session_id,
+            mode=st.session_state.mode,
+            date=travel_date(),
+            departure=st.session_state.sel_departure,
+            arrival=st.session_state.sel_arrival,
+            time=st.session_state.sel_time,
+            passengers=st.session_state.sel_passengers,
+            discounts=list(st.session_state.sel_discounts),
+            payment=st.session_state.sel_payment or "",
+            base_total=base,
+            discount_total=discount,
+            final=final,
+        ))
+    except Exception as e:
+        logger.error("예매 저널 기록 실패: %s", e)
+
+
+def release_seats():
+    get_inventory().release(st.session_state.seat_hold_id)
+    st.session_state.seat_hold_id = None
+
+
+def prefetch_replies():
+    """지금 페이지와 선택으로 다음에 나올 응답 문장을 미리 합성해 둔다 (대화형 모드만)."""
+    if st.session_state.mode != MODE_VOICE:
+        return
+    selection = {
+        "departure": st.session_state.sel_departure if st.session_state.sel_departure != "선택" else None,
+        "arrival": st.session_state.sel_arrival if st.session_state.sel_arrival != "선택" else None,
+        "time": st.session_state.sel_time if st.session_state.sel_time != "선택" else None,
+        "passengers": st.session_state.sel_passengers,
+        "discounts": st.session_state.sel_discounts,
+        "payment": st.session_state.sel_payment,
+    }
+    get_engine().prefetch(predict_replies(st.session_state.page, selection))
+
+
 def handle_go(page: str):
+    cancel_voice_turn()
+    # 페이지를 옮기면 음성 바가 초기화되어 이전 응답 음성은 다시 재생되지 않는다
+    release_session_audio()
+    st.session_state.seat_error = ""
+    if page == PAGE_PAYMENT:
+        if not hold_seats():
+            page = PAGE_BOOKING
+    elif page == PAGE_COMPLETE:
+        if confirm_seats():
+            record_booking()
+        else:
+            page = PAGE_BOOKING
+    else:
+        release_seats()
     st.session_state.page = page
     # 페이지 이동 시 음성 상태 초기화
     st.session_state.voice_phase = VOICE_IDLE
     st.session_state.recognized_text = ""
+    prefetch_replies()
 
 
 def handle_select_payment(payment_id: str):
     st.session_state.sel_payment = payment_id
+    prefetch_replies()
 
 
 def handle_select_mode(mode: str):
     st.session_state.mode = mode
     st.session_state.page = PAGE_BOOKING
+    prefetch_replies()
 
 
 def handle_reset():
+    cancel_voice_turn()
+    release_session_audio()
+    release_seats()
     for k, v in DEFAULTS.items():
         st.session_state[k] = v if not isinstance(v, list) else v.copy()
 
 
 # ─────────────────────────────────────────────────────────────
-# 시작 화면 (모드 선택)
+# 시작 화면 (모드 선택) — 정적 마크업은 상수로 고정
 # ─────────────────────────────────────────────────────────────
-def render_mode_select():
-    st.markdown(
-        """<div style="text-align:center;padding:2rem 0 1rem">
-        <div style="font-size:3.5rem;margin-bottom:0.5rem">🐴</div>
-        <div style="font-size:2.2rem;font-weight:900;color:#F8FAFC;margin-bottom:0.3rem">말표 Mal-Pyo</div>
-        <div style="font-size:1.1rem;color:#94A3B8">음성 기반 교통 예매 키오스크</div>
-        </div>""",
-        unsafe_allow_html=True,
-    )
+MODE_SELECT_HEADER_HTML = """<div style="text-align:center;padding:2rem 0 1rem">
+<div style="font-size:3.5rem;margin-bottom:0.5rem">🐴</div>
+<div style="font-size:2.2rem;font-weight:900;color:#F8FAFC;margin-bottom:0.3rem">말표 Mal-Pyo</div>
+<div style="font-size:1.1rem;color:#94A3B8">음성 기반 교통 예매 키오스크</div>
+</div>
+<div style="text-align:center;margin:1.5rem 0 2rem;color:#CBD5E1;font-size:1rem">
+이용 방식을 선택해 주세요
+</div>"""
+
+MODE_CLASSIC_CARD_HTML = """<div class="booking-card" style="text-align:center;padding:2rem 1rem;min-height:220px">
+<div style="font-size:3rem;margin-bottom:0.8rem">🖱️</div>
+<div style="font-size:1.3rem;font-weight:700;color:#F8FAFC;margin-bottom:0.5rem">기존 모드</div>
+<div style="font-size:0.9rem;color:#94A3B8;line-height:1.5">화면을 터치하여<br>직접 선택합니다</div>
+</div>"""
+
+MODE_VOICE_CARD_HTML = """<div class="booking-card" style="text-align:center;padding:2rem 1rem;min-height:220px">
+<div style="font-size:3rem;margin-bottom:0.8rem">🎤</div>
+<div style="font-size:1.3rem;font-weight:700;color:#F8FAFC;margin-bottom:0.5rem">대화형 모드</div>
+<div style="font-size:0.9rem;color:#94A3B8;line-height:1.5">음성으로 말하면<br>자동으로 입력됩니다</div>
+</div>"""
+
+MODE_SELECT_TIP_HTML = """<div style="text-align:center;margin-top:2rem;padding:1rem;
+background:rgba(59,130,246,0.1);border-radius:12px;border:1px solid rgba(59,130,246,0.3)">
+<div style="font-size:0.95rem;color:#60A5FA">💡 대화형 모드에서도 화면 터치로 직접 선택할 수 있습니다</div>
+</div>"""
 
-    st.markdown(
-        """<div style="text-align:center;margin:1.5rem 0 2rem;color:#CBD5E1;font-size:1rem">
-        이용 방식을 선택해 주세요
-        </div>""",
-        unsafe_allow_html=True,
-    )
+
+def render_mode_select():
+    st.markdown(MODE_SELECT_HEADER_HTML, unsafe_allow_html=True)
 
     _, col_classic, col_voice, _ = st.columns([1, 2, 2, 1])
 
     with col_classic:
-        st.markdown(
-            """<div class="booking-card" style="text-align:center;padding:2rem 1rem;min-height:220px">
-            <div style="font-size:3rem;margin-bottom:0.8rem">🖱️</div>
-            <div style="font-size:1.3rem;font-weight:700;color:#F8FAFC;margin-bottom:0.5rem">기존 모드</div>
-            <div style="font-size:0.9rem;color:#94A3B8;line-height:1.5">
-            화면을 터치하여<br>직접 선택합니다
-            </div>
-            </div>""",
-            unsafe_allow_html=True,
-        )
+        st.markdown(MODE_CLASSIC_CARD_HTML, unsafe_allow_html=True)
         st.button(
             "🖱️  기존 모드로 시작",
             key="btn_mode_classic",
@@ -241,16 +561,7 @@ def render_mode_select():
         )
 
     with col_voice:
-        st.markdown(
-            """<div class="booking-card" style="text-align:center;padding:2rem 1rem;min-height:220px">
-            <div style="font-size:3rem;margin-bottom:0.8rem">🎤</div>
-            <div style="font-size:1.3rem;font-weight:700;color:#F8FAFC;margin-bottom:0.5rem">대화형 모드</div>
-            <div style="font-size:0.9rem;color:#94A3B8;line-height:1.5">
-            음성으로 말하면<br>자동으로 입력됩니다
-            </div>
-            </div>""",
-            unsafe_allow_html=True,
-        )
+        st.markdown(MODE_VOICE_CARD_HTML, unsafe_allow_html=True)
         st.button(
             "🎤  대화형 모드로 시작",
             key="btn_mode_voice",
@@ -260,26 +571,21 @@ def render_mode_select():
             type="primary",
         )
 
-    st.markdown(
-        """<div style="text-align:center;margin-top:2rem;padding:1rem;
-        background:rgba(59,130,246,0.1);border-radius:12px;border:1px solid rgba(59,130,246,0.3)">
-        <div style="font-size:0.95rem;color:#60A5FA">💡 대화형 모드에서도 화면 터치로 직접 선택할 수 있습니다</div>
-        </div>""",
-        unsafe_allow_html=True,
-    )
+    st.markdown(MODE_SELECT_TIP_HTML, unsafe_allow_html=True)
 
 
 # ─────────────────────────────────────────────────────────────
 # 스텝 인디케이터
 # ─────────────────────────────────────────────────────────────
-def render_steps():
-    page = st.session_state.page
-    pages = [PAGE_BOOKING, PAGE_DISCOUNT, PAGE_PAYMENT]
-    labels = ["예매", "할인", "결제"]
-    current_idx = pages.index(page) if page in pages else 3
+STEP_PAGES = [PAGE_BOOKING, PAGE_DISCOUNT, PAGE_PAYMENT]
+STEP_LABELS = ["예매", "할인", "결제"]
+
 
+@st.cache_data
+def build_steps_html(current_idx: int) -> str:
+    """현재 단계 번호별 스텝 인디케이터 마크업 (단계 수만큼만 생성된다)."""
     parts = []
-    for i, label in enumerate(labels):
+    for i, label in enumerate(STEP_LABELS):
         if i < current_idx:
             cls = "done"
             dot = "✓"
@@ -290,11 +596,16 @@ def render_steps():
             cls = ""
             dot = str(i + 1)
         parts.append(f'<div class="step {cls}"><div class="step-dot">{dot}</div>{label}</div>')
-        if i < len(labels) - 1:
+        if i < len(STEP_LABELS) - 1:
             line_cls = "done" if i < current_idx else ("active" if i == current_idx else "")
             parts.append(f'<div class="step-line {line_cls}"></div>')
+    return f'<div class="steps">{"".join(parts)}</div>'
 
-    st.markdown(f'<div class="steps">{"".join(parts)}</div>', unsafe_allow_html=True)
+
+def render_steps():
+    page = st.session_state.page
+    current_idx = STEP_PAGES.index(page) if page in STEP_PAGES else 3
+    st.markdown(build_steps_html(current_idx), unsafe_allow_html=True)
 
 
 # ─────────────────────────────────────────────────────────────
@@ -312,17 +623,50 @@ def get_voice_guide() -> tuple[str, str]:
     return "말씀만 하세요", "음성으로 입력할 수 있어요"
 
 
-def process_voice_result(audio_bytes: bytes):
-    """녹음된 오디오를 파이프라인(STT→LLM→TTS)으로 처리한다."""
-    page = st.session_state.page
+# 처리 단계별 안내 문구
+STAGE_LABELS = {
+    "queued": "🔄 잠시만 기다려 주세요...",
+    "stt": "🔄 알아듣는 중...",
+    "llm": "🔄 말씀을 이해하는 중...",
+    "tts": "🔄 답변을 준비하는 중...",
+    "done": "🔄 거의 다 됐어요...",
+}
+
+
+def voice_context() -> dict:
+    """음성 턴에 함께 넘길 현재 선택 (인원, 이미 고른 출발/도착)."""
     context = {"passengers": st.session_state.sel_passengers}
+    for key in ("departure", "arrival"):
+        if st.session_state[f"sel_{key}"] != "선택":
+            context[key] = st.session_state[f"sel_{key}"]
+    return context
+
+
+def submit_voice(audio_bytes: bytes):
+    """녹음된 오디오를 백그라운드 파이프라인(STT→LLM→TTS)에 넘긴다."""
+    get_voice_jobs().submit(
+        st.session_state.session_id,
+        audio_bytes,
+        st.session_state.page,
+        voice_context(),
+        # 느린 턴 조사용: 키오스크 주소에 ?profile=1을 붙이면 턴마다 프로파일을 남긴다
+        profile=True if st.query_params.get("profile") == "1" else None,
+    )
 
-    engine = get_engine()
-    result = engine.process(audio_bytes, page, context)
+
+def process_voice_result(page: str, result: PipelineResult):
+    """파이프라인 결과를 세션 상태와 폼에 반영한다."""
+    if result.cancelled:
+        return
 
     st.session_state.recognized_text = result.recognized_text
     st.session_state.reply_text = result.reply_text
-    st.session_state.reply_audio = result.reply_audio
+    store = get_audio_store()
+    store.release(st.session_state.reply_audio_id)
+    st.session_state.reply_audio_id = (
+        store.put(result.reply_audio, result.reply_audio_mime, owner=st.session_state.session_id)
+        if result.reply_audio else None
+    )
     st.session_state.widget_key_version += 1
 
     if not result.success:
@@ -336,7 +680,7 @@ def process_voice_result(audio_bytes: bytes):
             st.session_state.sel_departure = parsed["departure"]
         if parsed.get("arrival") and parsed["arrival"] in CITIES:
             st.session_state.sel_arrival = parsed["arrival"]
-        if parsed.get("time") and parsed["time"] in TIME_SLOTS:
+        if parsed.get("time") and parsed["time"] in get_time_options():
             st.session_state.sel_time = parsed["time"]
         if parsed.get("passengers"):
             pax = int(parsed["passengers"])
@@ -356,85 +700,204 @@ def process_voice_result(audio_bytes: bytes):
             if parsed["payment"] in valid_ids:
                 st.session_state.sel_payment = parsed["payment"]
 
+    prefetch_replies()
 
-def render_voice_bar():
-    phase = st.session_state.voice_phase
+
+@st.fragment(run_every=0.5)
+def render_voice_processing():
+    """처리 중 화면. 이 프래그먼트만 주기적으로 다시 실행하며 완료를 확인한다."""
+    # 처리 중에도 핸즈프리 마이크 차지를 유지한다 (호출어는 쉼)
+    update_wake_target()
+    jobs = get_voice_jobs()
+    sid = st.session_state.session_id
+    job = jobs.poll(sid)
+
+    if job is None:
+        # 작업이 사라졌으면 (서버 재시작 등) 대기 상태로 복귀
+        st.session_state.voice_phase = VOICE_IDLE
+        st.rerun()
+
+    if job.done:
+        result = jobs.pop(sid)
+        if result is not None:
+            process_voice_result(job.page, result)
+        st.session_state.voice_phase = VOICE_DONE
+        st.rerun()
+
+    partial = job.partial.recognized_text
+    partial_html = (
+        f'<div class="vb-bubble"><span class="vb-bubble-text">"{partial}"</span></div>'
+        if partial else ""
+    )
+    st.markdown(
+        f"""<div class="voice-bar"><div class="vb-icon">🎤</div>
+        <div class="vb-wave"><div class="vb-bar"></div><div class="vb-bar"></div>
+        <div class="vb-bar"></div><div class="vb-bar"></div><div class="vb-bar"></div>
+        <div class="vb-bar"></div><div class="vb-bar"></div></div>
+        <div class="processing-badge">{STAGE_LABELS.get(job.stage, STAGE_LABELS["queued"])}</div>
+        {partial_html}</div>""",
+        unsafe_allow_html=True,
+    )
+
+
+@st.fragment
+def render_voice_idle():
+    """대기 화면. 녹음 위젯 상호작용은 이 프래그먼트만 다시 실행한다."""
     v = st.session_state.widget_key_version
     guide_title, guide_sub = get_voice_guide()
 
-    if phase == VOICE_IDLE:
-        col_guide, col_rec = st.columns([3, 4])
-        with col_guide:
-            st.markdown(
-                f"""<div class="voice-bar"><div class="vb-icon">🎤</div>
-                <div><div class="vb-text">{guide_title}</div>
-                <div class="vb-sub">{guide_sub}</div></div></div>""",
-                unsafe_allow_html=True,
-            )
-        with col_rec:
-            audio_data = st.audio_input(
-                "음성을 녹음하세요",
-                key=f"audio_rec_{v}",
-                label_visibility="collapsed",
-            )
-            if audio_data is not None:
-                st.session_state._pending_audio = audio_data.getvalue()
-                st.session_state.voice_phase = VOICE_PROCESSING
-                st.rerun()
-
-    elif phase == VOICE_PROCESSING:
+    col_guide, col_rec = st.columns([3, 4])
+    with col_guide:
         st.markdown(
-            """<div class="voice-bar"><div class="vb-icon">🎤</div>
-            <div class="vb-wave"><div class="vb-bar"></div><div class="vb-bar"></div>
-            <div class="vb-bar"></div><div class="vb-bar"></div><div class="vb-bar"></div>
-            <div class="vb-bar"></div><div class="vb-bar"></div></div>
-            <div class="processing-badge">🔄 알아듣는 중...</div></div>""",
+            f"""<div class="voice-bar"><div class="vb-icon">🎤</div>
+            <div><div class="vb-text">{guide_title}</div>
+            <div class="vb-sub">{guide_sub}</div></div></div>""",
             unsafe_allow_html=True,
         )
-        audio_bytes = st.session_state.get("_pending_audio")
-        if audio_bytes:
-            process_voice_result(audio_bytes)
-            st.session_state._pending_audio = None
-        st.session_state.voice_phase = VOICE_DONE
+    with col_rec:
+        audio_data = st.audio_input(
+            "음성을 녹음하세요",
+            key=f"audio_rec_{v}",
+            label_visibility="collapsed",
+        )
+        if audio_data is not None:
+            submit_voice(audio_data.getvalue())
+            st.session_state.voice_phase = VOICE_PROCESSING
+            st.rerun()
+
+
+@st.fragment
+def render_voice_done():
+    """인식 결과 + 응답 화면."""
+    recognized = st.session_state.recognized_text
+    reply = st.session_state.get("reply_text", "")
+    reply_audio = get_audio_store().get(st.session_state.reply_audio_id)
+
+    col_bar, col_btn = st.columns([5, 2])
+    with col_bar:
+        # 내가 한 말
+        st.markdown(
+            f"""<div class="voice-bar"><div class="vb-icon">🎤</div>
+            <div><div class="vb-sub">🗣️ 내가 한 말</div>
+            <div class="vb-bubble"><span class="vb-bubble-text">"{recognized}"</span></div></div></div>""",
+            unsafe_allow_html=True,
+        )
+        # AI 응답 텍스트
+        if reply:
+            st.markdown(
+                f"""<div class="voice-bar" style="border-color:rgba(52,211,153,.3)">
+                <div class="vb-icon" style="background:linear-gradient(135deg,#059669,#34D399)">🤖</div>
+                <div><div class="vb-sub" style="color:#34D399!important">🤖 말표 응답</div>
+                <div class="vb-bubble" style="background:rgba(5,150,105,.1);border-color:rgba(52,211,153,.25)">
+                <span class="vb-bubble-text" style="color:#A7F3D0!important">{reply}</span></div></div></div>""",
+                unsafe_allow_html=True,
+            )
+    with col_btn:
+        st.markdown("<div style='padding-top:0.3rem'></div>", unsafe_allow_html=True)
+        # 프래그먼트 안의 콜백은 프래그먼트만 다시 그리므로, 단계 전환은 전체 rerun
+        if st.button("🎤 다시 말하기", key="btn_mic_r", use_container_width=True):
+            handle_voice_reset()
+            st.rerun()
+
+    # TTS 음성 자동 재생
+    if reply_audio:
+        st.audio(reply_audio.data, format=reply_audio.mime, autoplay=True)
+
+
+def update_wake_target(active: bool = True) -> bool:
+    """키오스크 화면이면 핸즈프리 마이크를 이 세션이 차지한다. 이 세션이 차지했으면 True.
+
+    키오스크 화면은 주소에 ?kiosk=<MALPYO_WAKE_KIOSK, 기본 1>을 붙여 연 세션뿐이다
+    (다른 브라우저·탭이 키오스크 마이크의 요청을 가로채지 않도록). 다른 세션이
+    차지하고 있으면 그 세션이 WAKE_CLAIM_TIMEOUT 동안 소식이 없을 때만 넘겨받는다.
+    active=False(음성 바가 없는 화면)이거나 처리 중이면 차지는 유지하고 호출어만 쉰다
+    (새 요청이 진행 중인 턴을 취소하지 않도록).
+    """
+    if st.query_params.get("kiosk") != os.getenv("MALPYO_WAKE_KIOSK", "1"):
+        return False
+    listener = get_wake_listener()
+    if listener is None:
+        return False
+    target = get_wake_target()
+    sid = st.session_state.session_id
+    now = time.monotonic()
+    with target["lock"]:
+        owner = target["session_id"]
+        if owner not in (None, sid) and now - target["seen"] <= WAKE_CLAIM_TIMEOUT:
+            return False
+        if owner != sid:
+            logger.info("핸즈프리 마이크: 세션 %s가 차지", sid[:8])
+            target["audio"] = None
+        listening = active and st.session_state.voice_phase != VOICE_PROCESSING
+        target.update(session_id=sid, seen=now, listening=listening)
+        listener.enabled = listening
+    return True
+
+
+def take_wake_request() -> bytes | None:
+    """이 세션 앞으로 녹음된 핸즈프리 요청이 있으면 꺼낸다."""
+    target = get_wake_target()
+    with target["lock"]:
+        if target["session_id"] != st.session_state.session_id:
+            return None
+        audio, target["audio"] = target["audio"], None
+    return audio
+
+
+@st.fragment(run_every=0.5)
+def watch_wake():
+    """핸즈프리 요청이 오면 지금 화면과 선택(voice_context)으로 제출하고 처리 중 화면으로 넘어간다.
+
+    0.5초마다 돌며 마이크 차지도 갱신한다 (다른 프래그먼트에서 바꾼 선택도 제출 시점에 반영).
+    """
+    if not update_wake_target():
+        return
+    audio = take_wake_request()
+    if audio is not None:
+        submit_voice(audio)
+        st.session_state.voice_phase = VOICE_PROCESSING
         st.rerun()
 
+
+def render_voice_bar():
+    phase = st.session_state.voice_phase
+    hands_free = update_wake_target()
+    if phase == VOICE_IDLE:
+        render_voice_idle()
+    elif phase == VOICE_PROCESSING:
+        render_voice_processing()
     elif phase == VOICE_DONE:
-        recognized = st.session_state.recognized_text
-        reply = st.session_state.get("reply_text", "")
-        reply_audio = st.session_state.get("reply_audio")
+        render_voice_done()
+    if hands_free and phase != VOICE_PROCESSING:
+        watch_wake()
 
-        col_bar, col_btn = st.columns([5, 2])
-        with col_bar:
-            # 내가 한 말
-            st.markdown(
-                f"""<div class="voice-bar"><div class="vb-icon">🎤</div>
-                <div><div class="vb-sub">🗣️ 내가 한 말</div>
-                <div class="vb-bubble"><span class="vb-bubble-text">"{recognized}"</span></div></div></div>""",
-                unsafe_allow_html=True,
-            )
-            # AI 응답 텍스트
-            if reply:
-                st.markdown(
-                    f"""<div class="voice-bar" style="border-color:rgba(52,211,153,.3)">
-                    <div class="vb-icon" style="background:linear-gradient(135deg,#059669,#34D399)">🤖</div>
-                    <div><div class="vb-sub" style="color:#34D399!important">🤖 말표 응답</div>
-                    <div class="vb-bubble" style="background:rgba(5,150,105,.1);border-color:rgba(52,211,153,.25)">
-                    <span class="vb-bubble-text" style="color:#A7F3D0!important">{reply}</span></div></div></div>""",
-                    unsafe_allow_html=True,
-                )
-        with col_btn:
-            st.markdown("<div style='padding-top:0.3rem'></div>", unsafe_allow_html=True)
-            st.button("🎤 다시 말하기", on_click=handle_voice_reset, key="btn_mic_r", use_container_width=True)
-
-        # TTS 음성 자동 재생
-        if reply_audio:
-            st.audio(reply_audio, format="audio/wav", autoplay=True)
+
+# ─────────────────────────────────────────────────────────────
+# 페이지 이동 버튼 (프래그먼트 안에서는 콜백 대신 전체 rerun으로 이동)
+# ─────────────────────────────────────────────────────────────
+def nav_button(label: str, page: str, key: str, disabled: bool = False):
+    if st.button(label, key=key, use_container_width=True, disabled=disabled):
+        handle_go(page)
+        st.rerun()
 
 
 # ─────────────────────────────────────────────────────────────
 # PAGE 1: 예매
 # ─────────────────────────────────────────────────────────────
 def render_page_booking():
+    render_booking_card()
+
+
+def format_departure(slot: str, departures: dict[str, int]) -> str:
+    if slot not in departures:
+        return slot
+    left = departures[slot]
+    return f"{slot}  (잔여 {left}석)" if left > 0 else f"{slot}  (매진)"
+
+
+@st.fragment
+def render_booking_card():
+    """예매 카드. 출발/도착/시간/인원 변경은 이 프래그먼트만 다시 실행한다."""
     st.markdown(
         '<div class="booking-card">'
         '<div class="card-title">🚌 승차권 예매 <span class="card-title-badge">STEP 1</span></div>',
@@ -468,8 +931,13 @@ def render_page_booking():
     col_time, col_pax = st.columns([6, 5])
     with col_time:
         st.markdown('<div class="field-label">출발 시간</div>', unsafe_allow_html=True)
-        tm_idx = TIME_SLOTS.index(st.session_state.sel_time) if st.session_state.sel_time in TIME_SLOTS else 0
-        tm = st.selectbox("시간", TIME_SLOTS, index=tm_idx, key=f"sb_time_{v}", label_visibility="collapsed")
+        departures = get_departures()
+        time_options = get_time_options()
+        tm_idx = time_options.index(st.session_state.sel_time) if st.session_state.sel_time in time_options else 0
+        tm = st.selectbox(
+            "시간", time_options, index=tm_idx, key=f"sb_time_{v}", label_visibility="collapsed",
+            format_func=lambda t: format_departure(t, departures),
+        )
         if tm != st.session_state.sel_time:
             st.session_state.sel_time = tm
     with col_pax:
@@ -480,6 +948,14 @@ def render_page_booking():
 
     st.markdown("</div>", unsafe_allow_html=True)
 
+    if st.session_state.seat_error:
+        st.error(st.session_state.seat_error)
+    elif route_selected() and not departures:
+        st.warning("오늘 남은 운행편이 없습니다.")
+    elif (st.session_state.sel_time in departures
+          and departures[st.session_state.sel_time] < st.session_state.sel_passengers):
+        st.warning("선택하신 시간의 잔여석이 인원보다 적습니다.")
+
     # 출발/도착 같은 경우 경고
     if (st.session_state.sel_departure != "선택"
         and st.session_state.sel_arrival != "선택"
@@ -490,17 +966,62 @@ def render_page_booking():
     st.markdown("<div style='margin-top:0.5rem'></div>", unsafe_allow_html=True)
     ok = can_proceed_booking()
     st.markdown('<div class="btn-cta">', unsafe_allow_html=True)
-    st.button(
+    nav_button(
         "다음 단계 → 할인 선택" if ok else "출발지 · 도착지 · 시간을 선택해 주세요",
-        on_click=handle_go if ok else None,
-        args=(PAGE_DISCOUNT,) if ok else None,
+        PAGE_DISCOUNT,
         key="btn_next1",
-        use_container_width=True,
         disabled=not ok,
     )
     st.markdown('</div>', unsafe_allow_html=True)
 
 
+# ─────────────────────────────────────────────────────────────
+# 요금 요약 (입력이 같으면 캐시된 마크업 재사용)
+# ─────────────────────────────────────────────────────────────
+@st.cache_data(max_entries=256)
+def build_discount_fare_html(
+    discount_ids: tuple[str, ...], amounts: tuple[int, ...], total_base: int, final: int
+) -> str:
+    """할인 페이지 가격표: 기본 운임 합계, 할인 행, 결제 금액."""
+    pax = len(discount_ids)
+    rows = [
+        f'<div class="price-row"><span class="price-label">기본 운임 ({pax}명)</span>'
+        f'<span class="price-value">{total_base:,}원</span></div>'
+    ]
+    for i, (disc_id, amt) in enumerate(zip(discount_ids, amounts)):
+        info = get_discount_by_id(disc_id)
+        if amt > 0:
+            rows.append(
+                f'<div class="price-row"><span class="price-label">탑승객 {i+1} · {info["name"]}</span>'
+                f'<span class="price-discount">-{amt:,}원</span></div>'
+            )
+    rows.append(
+        f'<div class="price-row total"><span class="price-label">결제 금액</span>'
+        f'<span class="price-value">{final:,}원</span></div>'
+    )
+    return f'<div class="price-table">{"".join(rows)}</div>'
+
+
+@st.cache_data(max_entries=256)
+def build_payment_fare_html(
+    discount_ids: tuple[str, ...], per_passenger: tuple[int, ...], final: int
+) -> str:
+    """결제 페이지 가격표: 인원별 금액과 총 결제 금액."""
+    rows = []
+    for i, (disc_id, per_price) in enumerate(zip(discount_ids, per_passenger)):
+        info = get_discount_by_id(disc_id)
+        tag = f' <span class="price-discount">(-{info["rate"]}%)</span>' if info["rate"] > 0 else ""
+        rows.append(
+            f'<div class="price-row"><span class="price-label">탑승객 {i+1} · {info["name"]}{tag}</span>'
+            f'<span class="price-value">{per_price:,}원</span></div>'
+        )
+    rows.append(
+        f'<div class="price-row total"><span class="price-label">총 결제 금액</span>'
+        f'<span class="price-value">{final:,}원</span></div>'
+    )
+    return f'<div class="price-table">{"".join(rows)}</div>'
+
+
 # ─────────────────────────────────────────────────────────────
 # PAGE 2: 할인 (인원별 개별 선택)
 # ─────────────────────────────────────────────────────────────
@@ -514,7 +1035,6 @@ def render_page_discount():
     tm = st.session_state.sel_time
     pax = st.session_state.sel_passengers
     base_unit = get_price()
-    v = st.session_state.widget_key_version  # 위젯 키 버전
 
     sync_discounts_length()
 
@@ -524,6 +1044,17 @@ def render_page_discount():
         unsafe_allow_html=True,
     )
 
+    render_discount_card()
+
+
+@st.fragment
+def render_discount_card():
+    """인원별 할인 선택 + 요금 요약. 할인 변경은 이 프래그먼트만 다시 실행한다."""
+    pax = st.session_state.sel_passengers
+    rates = get_fare_engine().rates
+    base_unit = get_price()
+    v = st.session_state.widget_key_version  # 위젯 키 버전
+
     st.markdown(
         '<div class="booking-card">'
         '<div class="card-title">🏷️ 인원별 할인 선택 <span class="card-title-badge">STEP 2</span></div>',
@@ -533,8 +1064,6 @@ def render_page_discount():
     for i in range(pax):
         current_id = st.session_state.sel_discounts[i]
         current_idx = DISCOUNT_IDS.index(current_id) if current_id in DISCOUNT_IDS else 0
-        current_info = get_discount_by_id(current_id)
-        per_price = base_unit - int(base_unit * current_info["rate"] / 100)
 
         st.markdown(f'<div class="pax-row">', unsafe_allow_html=True)
         col_label, col_select, col_price = st.columns([2, 5, 2])
@@ -554,6 +1083,7 @@ def render_page_discount():
             new_idx = DISCOUNT_OPTIONS.index(selected)
             st.session_state.sel_discounts[i] = DISCOUNT_IDS[new_idx]
         with col_price:
+            per_price = base_unit - base_unit * int(rates[new_idx]) // 100
             st.markdown(
                 f'<div class="pax-row-price">{per_price:,}원</div>',
                 unsafe_allow_html=True,
@@ -563,46 +1093,24 @@ def render_page_discount():
     st.markdown("</div>", unsafe_allow_html=True)
 
     # 가격 합산
-    total_base, total_disc, final = calc_total()
-
-    # 가격표 시작
+    quote = get_quote()
+    final = quote.final
     st.markdown(
-        f'<div class="price-table">'
-        f'<div class="price-row"><span class="price-label">기본 운임 ({pax}명)</span>'
-        f'<span class="price-value">{total_base:,}원</span></div>',
-        unsafe_allow_html=True,
-    )
-
-    # 할인 행들
-    for i in range(pax):
-        info = get_discount_by_id(st.session_state.sel_discounts[i])
-        amt = int(base_unit * info["rate"] / 100)
-        if amt > 0:
-            st.markdown(
-                f'<div class="price-row"><span class="price-label">탑승객 {i+1} · {info["name"]}</span>'
-                f'<span class="price-discount">-{amt:,}원</span></div>',
-                unsafe_allow_html=True,
-            )
-
-    # 가격표 종료
-    st.markdown(
-        f'<div class="price-row total"><span class="price-label">결제 금액</span>'
-        f'<span class="price-value">{final:,}원</span></div></div>',
+        build_discount_fare_html(
+            tuple(st.session_state.sel_discounts), tuple(quote.discounts),
+            quote.total_base, quote.final,
+        ),
         unsafe_allow_html=True,
     )
 
     col_back, col_next = st.columns([1, 3])
     with col_back:
         st.markdown('<div class="btn-back">', unsafe_allow_html=True)
-        st.button("← 이전", on_click=handle_go, args=(PAGE_BOOKING,), key="btn_back2", use_container_width=True)
+        nav_button("← 이전", PAGE_BOOKING, key="btn_back2")
         st.markdown('</div>', unsafe_allow_html=True)
     with col_next:
         st.markdown('<div class="btn-cta">', unsafe_allow_html=True)
-        st.button(
-            f"결제하기 → {final:,}원",
-            on_click=handle_go, args=(PAGE_PAYMENT,),
-            key="btn_next2", use_container_width=True,
-        )
+        nav_button(f"결제하기 → {final:,}원", PAGE_PAYMENT, key="btn_next2")
         st.markdown('</div>', unsafe_allow_html=True)
 
 
@@ -614,8 +1122,6 @@ def render_page_payment():
     arr = st.session_state.sel_arrival
     tm = st.session_state.sel_time
     pax = st.session_state.sel_passengers
-    base_unit = get_price()
-    total_base, total_disc, final = calc_total()
 
     disc_summary = ", ".join(
         get_discount_by_id(d)["name"] for d in st.session_state.sel_discounts
@@ -627,6 +1133,15 @@ def render_page_payment():
         unsafe_allow_html=True,
     )
 
+    render_payment_card()
+
+
+@st.fragment
+def render_payment_card():
+    """결제 수단 선택 + 요금 요약. 결제 수단 변경은 이 프래그먼트만 다시 실행한다."""
+    quote = get_quote()
+    final = quote.final
+
     st.markdown(
         '<div class="booking-card">'
         '<div class="card-title">💳 결제 수단 <span class="card-title-badge">STEP 3</span></div>',
@@ -649,23 +1164,11 @@ def render_page_payment():
 
     st.markdown("</div>", unsafe_allow_html=True)
 
-    # 인원별 가격 명세 - 가격표 시작
-    st.markdown('<div class="price-table">', unsafe_allow_html=True)
-
-    for i in range(pax):
-        info = get_discount_by_id(st.session_state.sel_discounts[i])
-        disc_amt = int(base_unit * info["rate"] / 100)
-        per_price = base_unit - disc_amt
-        tag = f' <span class="price-discount">(-{info["rate"]}%)</span>' if info["rate"] > 0 else ""
-        st.markdown(
-            f'<div class="price-row"><span class="price-label">탑승객 {i+1} · {info["name"]}{tag}</span>'
-            f'<span class="price-value">{per_price:,}원</span></div>',
-            unsafe_allow_html=True,
-        )
-
+    # 인원별 가격 명세
     st.markdown(
-        f'<div class="price-row total"><span class="price-label">총 결제 금액</span>'
-        f'<span class="price-value">{final:,}원</span></div></div>',
+        build_payment_fare_html(
+            tuple(st.session_state.sel_discounts), tuple(quote.per_passenger), final
+        ),
         unsafe_allow_html=True,
     )
 
@@ -673,15 +1176,14 @@ def render_page_payment():
     col_back, col_next = st.columns([1, 3])
     with col_back:
         st.markdown('<div class="btn-back">', unsafe_allow_html=True)
-        st.button("← 이전", on_click=handle_go, args=(PAGE_DISCOUNT,), key="btn_back3", use_container_width=True)
+        nav_button("← 이전", PAGE_DISCOUNT, key="btn_back3")
         st.markdown('</div>', unsafe_allow_html=True)
     with col_next:
         st.markdown('<div class="btn-cta">', unsafe_allow_html=True)
-        st.button(
+        nav_button(
             f"💳 {final:,}원 결제하기" if has_payment else "결제 수단을 선택해 주세요",
-            on_click=handle_go if has_payment else None,
-            args=(PAGE_COMPLETE,) if has_payment else None,
-            key="btn_pay", use_container_width=True,
+            PAGE_COMPLETE,
+            key="btn_pay",
             disabled=not has_payment,
         )
         st.markdown('</div>', unsafe_allow_html=True)
@@ -696,14 +1198,13 @@ def render_page_complete():
     tm = st.session_state.sel_time
     pax = st.session_state.sel_passengers
     payment = next((p for p in PAYMENTS if p["id"] == st.session_state.sel_payment), PAYMENTS[0])
-    base_unit = get_price()
-    _, _, final = calc_total()
+    quote = get_quote()
+    final = quote.final
 
     # 인원별 할인 내역
     pax_lines = ""
-    for i in range(pax):
+    for i, per in enumerate(quote.per_passenger[:pax]):
         info = get_discount_by_id(st.session_state.sel_discounts[i])
-        per = base_unit - int(base_unit * info["rate"] / 100)
         pax_lines += (
             f'<div class="ticket-row"><span class="ticket-label">탑승객 {i+1} ({info["name"]})</span>'
             f'<span class="ticket-value">{per:,}원</span></div>'
@@ -739,12 +1240,30 @@ def render_page_complete():
 # ─────────────────────────────────────────────────────────────
 # 메인
 # ─────────────────────────────────────────────────────────────
+def render_status():
+    """운영 상태 화면 (?status=1): 엔진 상태와 공용 자원의 사용량."""
+    engine = get_engine()
+    status = engine.health_check()
+    # 원격 엔진은 추론 서버 /health가 통계까지 돌려주고, 로컬 엔진은 여기서 모은다
+    if isinstance(engine, MalPyoEngine):
+        status["admission_stats"] = engine.admission.stats()
+        status["prefetch_stats"] = engine.prefetcher.stats()
+    # 오디오 저장소는 이 Streamlit 프로세스의 것이다
+    status["audio_store_stats"] = get_audio_store().stats()
+    st.json(status)
+
+
 def main():
+    if st.query_params.get("status") == "1":
+        render_status()
+        return
+
     mode = st.session_state.mode
     page = st.session_state.page
 
     # 모드 선택 화면
     if mode == MODE_SELECT:
+        update_wake_target(active=False)
         render_mode_select()
         st.markdown('<div class="kiosk-footer">말표 Mal-Pyo · 음성 키오스크</div>', unsafe_allow_html=True)
         return
@@ -752,6 +1271,8 @@ def main():
     # 대화형 모드: 음성 바 표시 (완료 페이지 제외)
     if mode == MODE_VOICE and page != PAGE_COMPLETE:
         render_voice_bar()
+    else:
+        update_wake_target(active=False)
 
     # 스텝 인디케이터 (완료 페이지 제외)
     if page != PAGE_COMPLETE:
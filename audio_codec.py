@@ -0,0 +1,120 @@
+"""
+audio_codec.py - TTS 출력 인코딩 단계
+
+TTS가 만든 무압축 WAV를 키오스크별 설정에 따라 Opus(OGG) 또는 저비트레이트
+MP3로 압축하고, 필요하면 음성 대역(16kHz 모노 등)으로 다운샘플링한다.
+
+인코딩은 ffmpeg를 파이프(stdin → stdout)로 호출하므로 임시 파일을 만들지 않는다.
+ffmpeg가 없으면 경고 후 원본 WAV를 그대로 돌려준다.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import subprocess
+from dataclasses import dataclass
+
+logger = logging.getLogger("malpyo.codec")
+
+MIME_TYPES: dict[str, str] = {
+    "wav": "audio/wav",
+    "ogg": "audio/ogg",
+    "mp3": "audio/mpeg",
+}
+
+# 포맷별 ffmpeg 출력 인자
+_FFMPEG_ARGS: dict[str, list[str]] = {
+    "wav": ["-c:a", "pcm_s16le", "-f", "wav"],
+    "ogg": ["-c:a", "libopus", "-application", "voip", "-f", "ogg"],
+    "mp3": ["-c:a", "libmp3lame", "-f", "mp3"],
+}
+
+
+@dataclass(frozen=True)
+class AudioEncoding:
+    """출력 인코딩 설정.
+
+    Args:
+        format: "wav" | "ogg"(Opus) | "mp3"
+        bitrate: 압축 포맷의 목표 비트레이트 (예: "24k")
+        sample_rate: 다운샘플링할 샘플레이트. None이면 원본 유지
+        channels: 출력 채널 수
+    """
+    format: str = "wav"
+    bitrate: str = "24k"
+    sample_rate: int | None = None
+    channels: int = 1
+
+    @classmethod
+    def from_env(cls) -> "AudioEncoding":
+        """MALPYO_TTS_FORMAT / _BITRATE / _SAMPLE_RATE 환경 변수로 설정한다."""
+        sample_rate = os.getenv("MALPYO_TTS_SAMPLE_RATE")
+        return cls(
+            format=os.getenv("MALPYO_TTS_FORMAT", "wav"),
+            bitrate=os.getenv("MALPYO_TTS_BITRATE", "24k"),
+            sample_rate=int(sample_rate) if sample_rate else None,
+        )
+
+    @property
+    def mime_type(self) -> str:
+        return MIME_TYPES.get(self.format, "audio/wav")
+
+    @property
+    def is_passthrough(self) -> bool:
+        return self.format == "wav" and self.sample_rate is None
+
+
+class AudioEncoder:
+    """WAV bytes → 설정된 포맷으로 변환한다."""
+
+    def __init__(self, encoding: AudioEncoding | None = None, timeout: float = 10.0) -> None:
+        self.encoding = encoding or AudioEncoding()
+        if self.encoding.format not in MIME_TYPES:
+            raise ValueError(f"지원하지 않는 출력 포맷: {self.encoding.format}")
+        self.timeout = timeout
+        self._ffmpeg = shutil.which("ffmpeg")
+        self._warned = False
+
+    @property
+    def mime_type(self) -> str:
+        """실제로 반환될 오디오의 MIME 타입 (ffmpeg가 없으면 WAV)."""
+        if self.encoding.is_passthrough or self._ffmpeg is None:
+            return MIME_TYPES["wav"]
+        return self.encoding.mime_type
+
+    def encode(self, wav_bytes: bytes) -> tuple[bytes, str]:
+        """WAV 바이트를 인코딩하여 (오디오 bytes, MIME 타입)을 반환한다."""
+        enc = self.encoding
+        if enc.is_passthrough:
+            return wav_bytes, MIME_TYPES["wav"]
+        if self._ffmpeg is None:
+            if not self._warned:
+                logger.warning("ffmpeg를 찾을 수 없어 WAV로 출력합니다 (설정: %s)", enc.format)
+                self._warned = True
+            return wav_bytes, MIME_TYPES["wav"]
+
+        cmd = [self._ffmpeg, "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+               "-ac", str(enc.channels)]
+        if enc.sample_rate:
+            cmd += ["-ar", str(enc.sample_rate)]
+        if enc.format != "wav":
+            cmd += ["-b:a", enc.bitrate]
+        cmd += _FFMPEG_ARGS[enc.format] + ["pipe:1"]
+
+        try:
+            proc = subprocess.run(
+                cmd, input=wav_bytes, capture_output=True, timeout=self.timeout, check=True
+            )
+        except subprocess.CalledProcessError as e:
+            logger.error("오디오 인코딩 실패: %s", e.stderr.decode(errors="replace").strip())
+            return wav_bytes, MIME_TYPES["wav"]
+        except subprocess.TimeoutExpired:
+            logger.error("오디오 인코딩 시간 초과 (%.1fs)", self.timeout)
+            return wav_bytes, MIME_TYPES["wav"]
+
+        logger.debug(
+            "오디오 인코딩: %d → %d bytes (%s)", len(wav_bytes), len(proc.stdout), enc.format
+        )
+        return proc.stdout, enc.mime_type
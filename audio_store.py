@@ -0,0 +1,116 @@
+"""
+audio_store.py - 프로세스 공용 오디오 저장소
+
+세션마다 st.session_state에 음성 bytes를 통째로 들고 있으면
+세션 수(방치된 탭 포함)에 비례해 메모리가 끝없이 늘어난다.
+이 저장소는 오디오를 불투명한 ID로 보관하고, 전체 메모리 상한과
+LRU/보관 기한에 따라 오래된 항목을 내보낸다. app.py는 ID만 보관한다.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+logger = logging.getLogger("malpyo.audio_store")
+
+
+@dataclass
+class AudioBlob:
+    data: bytes
+    mime: str = "audio/wav"
+    owner: str = ""                    # 세션 ID (세션 단위 일괄 해제용)
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class AudioStore:
+    """메모리 상한이 있는 LRU 오디오 저장소 (스레드 안전)."""
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_age_seconds: float = 600.0,
+    ) -> None:
+        """
+        Args:
+            max_bytes: 전체 보관 용량 상한
+            max_age_seconds: 이보다 오래된 항목은 접근 여부와 무관하게 내보낸다
+                (닫힌 탭 등 세션 만료 대응)
+        """
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._blobs: OrderedDict[str, AudioBlob] = OrderedDict()
+        self._used = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def put(self, data: bytes, mime: str = "audio/wav", owner: str = "") -> str:
+        """오디오를 저장하고 ID를 반환한다."""
+        if len(data) > self.max_bytes:
+            raise ValueError(f"오디오가 저장소 상한보다 큽니다: {len(data)} bytes")
+        blob_id = uuid.uuid4().hex
+        with self._lock:
+            self._blobs[blob_id] = AudioBlob(data=data, mime=mime, owner=owner)
+            self._used += len(data)
+            self._evict_locked()
+        return blob_id
+
+    def get(self, blob_id: str | None) -> AudioBlob | None:
+        """ID로 오디오를 조회한다. 내보내졌거나 없으면 None."""
+        if not blob_id:
+            return None
+        with self._lock:
+            blob = self._blobs.get(blob_id)
+            if blob is None:
+                return None
+            if time.monotonic() - blob.created_at > self.max_age_seconds:
+                self._remove_locked(blob_id)
+                return None
+            self._blobs.move_to_end(blob_id)
+            return blob
+
+    def release(self, blob_id: str | None) -> None:
+        if not blob_id:
+            return
+        with self._lock:
+            self._remove_locked(blob_id)
+
+    def release_owner(self, owner: str) -> None:
+        """세션이 가진 모든 오디오를 해제한다."""
+        with self._lock:
+            for blob_id in [k for k, b in self._blobs.items() if b.owner == owner]:
+                self._remove_locked(blob_id)
+
+    def stats(self) -> dict[str, int]:
+        """현재 사용량 (보관 bytes/항목 수/상한/누적 내보냄 수)."""
+        with self._lock:
+            self._evict_locked()
+            return {
+                "bytes": self._used,
+                "count": len(self._blobs),
+                "max_bytes": self.max_bytes,
+                "evictions": self._evictions,
+            }
+
+    def _remove_locked(self, blob_id: str) -> None:
+        blob = self._blobs.pop(blob_id, None)
+        if blob is not None:
+            self._used -= len(blob.data)
+
+    def _evict_locked(self) -> None:
+        now = time.monotonic()
+        # 1) 보관 기한이 지난 항목 (삽입 순서 기준 앞쪽이 오래된 것)
+        for blob_id in [k for k, b in self._blobs.items()
+                        if now - b.created_at > self.max_age_seconds]:
+            self._remove_locked(blob_id)
+            self._evictions += 1
+        # 2) 용량 초과 시 가장 오래 사용되지 않은 항목부터
+        while self._used > self.max_bytes and self._blobs:
+            blob_id = next(iter(self._blobs))
+            self._remove_locked(blob_id)
+            self._evictions += 1
+            logger.debug("오디오 저장소 LRU 내보냄: %s", blob_id)
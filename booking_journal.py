@@ -0,0 +1,385 @@
+"""
+booking_journal.py - 예매 거래 저널 (추가 전용, 묶음 fsync)
+
+완료 화면은 결제 결과를 보여 주기만 하고, 세션이 끝나면 예매 내역이 사라진다.
+저널은 완료된 예매를 로컬 로그에 덧붙여 남긴다.
+
+    journal/bk-000001.log    한 줄에 레코드 하나: "<CRC32 8자리 16진수> <JSON 배열>\\n"
+                             배열은 FIELDS 순서의 고정 스키마
+
+묶음 커밋(group commit): append()는 인코딩한 줄을 메모리 버퍼에 넣고 바로 반환한다
+(완료 화면에서 디스크를 기다리지 않는다). 백그라운드 스레드가 interval마다 또는
+버퍼가 max_batch개 차면 모아서 한 번에 쓰고 fsync 한 번으로 내구화한다.
+내구성이 필요한 호출자는 sync()로 자기 레코드가 fsync될 때까지 기다릴 수 있다.
+
+복구: 쓰는 도중 꺼지면 마지막 줄이 잘리거나 깨질 수 있다. 저널을 열 때 마지막
+세그먼트를 앞에서부터 검사해 CRC가 맞는 마지막 줄 뒤를 잘라 낸다.
+읽을 때도 CRC가 맞지 않는 줄은 건너뛴다.
+
+분석용 컬럼 포맷 내보내기:
+    python booking_journal.py export journal/ bookings.parquet   # pyarrow 필요
+    python booking_journal.py export journal/ bookings.npz       # NumPy 컬럼 배열
+    python booking_journal.py verify journal/
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Iterator
+
+logger = logging.getLogger("malpyo.journal")
+
+FIELDS: tuple[str, ...] = (
+    "booking_id", "ts", "session_id", "mode", "date", "departure", "arrival", "time",
+    "passengers", "discounts", "payment", "base_total", "discount_total", "final",
+)
+
+
+@dataclass
+class Booking:
+    """완료된 예매 하나 (FIELDS와 같은 순서)."""
+    booking_id: str
+    ts: float
+    session_id: str
+    mode: str
+    date: str
+    departure: str
+    arrival: str
+    time: str
+    passengers: int
+    discounts: list[str] = field(default_factory=list)
+    payment: str = ""
+    base_total: int = 0
+    discount_total: int = 0
+    final: int = 0
+
+    def encode(self) -> bytes:
+        row = [getattr(self, name) for name in FIELDS]
+        payload = json.dumps(row, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return b"%08x " % zlib.crc32(payload) + payload + b"\n"
+
+    @classmethod
+    def decode(cls, line: bytes) -> "Booking | None":
+        """줄 하나를 해석한다. 잘리거나 CRC가 맞지 않으면 None."""
+        if not line.endswith(b"\n") or len(line) < 10 or line[8:9] != b" ":
+            return None
+        payload = line[9:-1]
+        try:
+            if int(line[:8], 16) != zlib.crc32(payload):
+                return None
+            row = json.loads(payload)
+        except ValueError:
+            return None
+        if len(row) != len(FIELDS):
+            return None
+        return cls(**dict(zip(FIELDS, row)))
+
+
+def _segments(directory: Path) -> list[Path]:
+    return sorted(directory.glob("bk-*.log"))
+
+
+def _fsync_dir(directory: Path) -> None:
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def recover(path: Path) -> tuple[int, int]:
+    """세그먼트에서 마지막 온전한 레코드 뒤(잘리거나 깨진 꼬리)를 잘라 낸다.
+
+    중간의 손상된 줄은 그대로 둔다 (뒤의 온전한 레코드를 잃지 않도록, 읽을 때 건너뜀).
+
+    Returns:
+        (온전한 레코드 수, 잘라 낸 바이트 수)
+    """
+    good = 0
+    offset = 0
+    valid_end = 0
+    with open(path, "rb") as f:
+        for line in f:
+            offset += len(line)
+            if Booking.decode(line) is not None:
+                good += 1
+                valid_end = offset
+    size = path.stat().st_size
+    if size > valid_end:
+        with open(path, "r+b") as f:
+            f.truncate(valid_end)
+            os.fsync(f.fileno())
+    return good, size - valid_end
+
+
+class BookingJournal:
+    """완료된 예매를 추가 전용 로그에 묶음 fsync로 기록한다."""
+
+    def __init__(
+        self,
+        directory: str | Path = "journal",
+        interval: float = 0.2,
+        max_batch: int = 64,
+        segment_bytes: int = 16 * 1024 * 1024,
+    ) -> None:
+        """
+        Args:
+            directory: 저널 디렉터리
+            interval: 묶음 쓰기 간격(초). 꺼질 때 잃을 수 있는 최대 구간이기도 하다
+            max_batch: 버퍼에 이만큼 쌓이면 interval을 기다리지 않고 쓴다
+            segment_bytes: 세그먼트 파일 하나의 크기 (넘으면 새 세그먼트)
+        """
+        self.directory = Path(directory)
+        self.interval = interval
+        self.max_batch = max_batch
+        self.segment_bytes = segment_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        segments = _segments(self.directory)
+        self._segment_no = int(segments[-1].stem.split("-")[1]) if segments else 1
+        if segments:
+            good, cut = recover(segments[-1])
+            if cut:
+                logger.warning(
+                    "저널 복구: %s 끝의 손상된 %d바이트를 잘라 냄 (온전한 레코드 %d개)",
+                    segments[-1].name, cut, good,
+                )
+        self._file = open(self._segment_path(), "ab")
+        _fsync_dir(self.directory)
+
+        self._buffer: list[bytes] = []
+        self._appended = 0          # append()된 레코드 수
+        self._durable = 0           # 쓰기를 마친(fsync 또는 실패) 레코드 수
+        self._failed = 0
+        self._batches = 0
+        self._closed = False
+        self._urgent = False        # sync() 대기자가 있으면 interval을 기다리지 않는다
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="malpyo-journal", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_env(cls) -> "BookingJournal | None":
+        """MALPYO_JOURNAL_DIR (기본 journal, 빈 값이면 끔), MALPYO_JOURNAL_INTERVAL_MS."""
+        directory = os.getenv("MALPYO_JOURNAL_DIR", "journal")
+        if not directory:
+            return None
+        return cls(directory, interval=int(os.getenv("MALPYO_JOURNAL_INTERVAL_MS", "200")) / 1000)
+
+    def append(self, booking: Booking) -> int:
+        """레코드를 버퍼에 넣고 일련번호를 반환한다 (디스크를 기다리지 않음)."""
+        line = booking.encode()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("닫힌 저널입니다")
+            self._buffer.append(line)
+            self._appended += 1
+            seq = self._appended
+            if len(self._buffer) >= self.max_batch:
+                self._cond.notify_all()
+        return seq
+
+    def sync(self, seq: int | None = None, timeout: float | None = None) -> bool:
+        """seq번(None이면 지금까지의 모든) 레코드의 쓰기가 끝날 때까지 기다린다.
+
+        기다리는 동안 다음 묶음을 바로 쓰도록 깨운다. 시간 안에 끝나면 True.
+        """
+        with self._cond:
+            target = self._appended if seq is None else seq
+            if self._durable < target:
+                self._urgent = True
+                self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._durable >= target, timeout)
+
+    def close(self) -> None:
+        """남은 버퍼를 쓰고 저널을 닫는다."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        if self._file is not None:
+            self._file.close()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                # 첫 레코드가 들어온 뒤 interval 동안(또는 max_batch까지) 모아서 한 번에 쓴다
+                self._cond.wait_for(lambda: self._closed or self._buffer)
+                self._cond.wait_for(
+                    lambda: self._closed or self._urgent or len(self._buffer) >= self.max_batch,
+                    self.interval,
+                )
+                batch, self._buffer = self._buffer, []
+                self._urgent = False
+                closed = self._closed
+            if batch:
+                self._commit(batch)
+            if closed:
+                # 닫힌 뒤에는 append()가 거절되므로 이 묶음이 마지막이다
+                return
+
+    def _commit(self, batch: list[bytes]) -> None:
+        failed = 0
+        good = None
+        try:
+            if self._file is None:
+                self._file = open(self._segment_path(), "ab")
+            if self._file.tell() >= self.segment_bytes:
+                self._roll()
+            good = self._file.tell()
+            self._file.write(b"".join(batch))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except OSError as e:
+            # 기록 실패는 예매 흐름을 막지 않는다 (레코드는 로그로 남긴다)
+            failed = len(batch)
+            logger.error("저널 기록 실패(%d건): %s", len(batch), e)
+            for line in batch:
+                logger.error("미기록 예매: %s", line.decode("utf-8", "replace").rstrip())
+            if good is not None:
+                self._rewind(good)
+        with self._cond:
+            self._durable += len(batch)
+            self._failed += failed
+            self._batches += 1
+            self._cond.notify_all()
+
+    def _rewind(self, offset: int) -> None:
+        """실패한 쓰기가 남긴 잘린 바이트를 지우고 마지막 온전한 위치에서 다시 연다.
+
+        그대로 두면 다음 묶음이 잘린 줄 바로 뒤에 붙어 첫 레코드까지 깨진다.
+        """
+        try:
+            self._file.close()
+        except OSError:
+            pass    # 버퍼에 남은 실패한 바이트를 다시 쓰려다 실패할 수 있다
+        self._file = None
+        try:
+            os.truncate(self._segment_path(), offset)
+            self._file = open(self._segment_path(), "ab")
+        except OSError as e:
+            # 다음 묶음에서 다시 연다 (세그먼트 끝은 저널을 다시 열 때 recover가 정리한다)
+            logger.error("저널 되감기 실패: %s", e)
+
+    def _roll(self) -> None:
+        self._file.close()
+        self._file = None
+        self._segment_no += 1
+        self._file = open(self._segment_path(), "ab")
+        _fsync_dir(self.directory)
+
+    def _segment_path(self) -> Path:
+        return self.directory / f"bk-{self._segment_no:06d}.log"
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "appended": self._appended,
+                "durable": self._durable,
+                "pending": len(self._buffer),
+                "failed": self._failed,
+                "batches": self._batches,
+                "avg_batch": self._durable / self._batches if self._batches else 0.0,
+            }
+
+
+def read_journal(directory: str | Path) -> Iterator[Booking]:
+    """저널의 레코드를 기록 순서대로 읽는다 (손상된 줄은 건너뜀)."""
+    for seg in _segments(Path(directory)):
+        with open(seg, "rb") as f:
+            for lineno, line in enumerate(f, 1):
+                booking = Booking.decode(line)
+                if booking is None:
+                    logger.warning("손상된 저널 레코드 건너뜀: %s:%d", seg.name, lineno)
+                    continue
+                yield booking
+
+
+# ─────────────────────────────────────────────────────────
+# 컬럼 포맷 내보내기
+# ─────────────────────────────────────────────────────────
+def to_columns(bookings: Iterator[Booking]) -> dict[str, list]:
+    columns: dict[str, list] = {name: [] for name in FIELDS}
+    for booking in bookings:
+        for name, value in asdict(booking).items():
+            columns[name].append(value)
+    return columns
+
+
+def export(directory: str | Path, out: str | Path) -> int:
+    """저널을 컬럼 포맷 파일로 내보내고 레코드 수를 반환한다.
+
+    .parquet은 pyarrow로 (discounts는 리스트 컬럼), 그 외는 NumPy .npz로
+    (discounts는 쉼표로 이은 문자열 컬럼) 쓴다.
+    """
+    columns = to_columns(read_journal(directory))
+    out = Path(out)
+    if out.suffix == ".parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError(
+                "pyarrow가 설치되지 않았습니다.\n"
+                "pip install pyarrow 로 설치해주세요. (또는 .npz로 내보내기)"
+            )
+        pq.write_table(pa.table(columns), out, compression="zstd")
+    else:
+        import numpy as np
+
+        arrays = {
+            "ts": np.asarray(columns["ts"], dtype=np.float64),
+            **{k: np.asarray(columns[k], dtype=np.int64)
+               for k in ("passengers", "base_total", "discount_total", "final")},
+            "discounts": np.asarray([",".join(d) for d in columns["discounts"]], dtype=np.str_),
+        }
+        for name in FIELDS:
+            arrays.setdefault(name, np.asarray(columns[name], dtype=np.str_))
+        np.savez_compressed(out, **arrays)
+    return len(columns["booking_id"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="말표 예매 저널 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("export", help="컬럼 포맷(.parquet / .npz)으로 내보내기")
+    p.add_argument("directory")
+    p.add_argument("out")
+    p = sub.add_parser("verify", help="세그먼트별 온전한/손상된 레코드 수")
+    p.add_argument("directory")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.command == "export":
+        start = time.perf_counter()
+        count = export(args.directory, args.out)
+        print(f"{count}건 → {args.out} ({time.perf_counter() - start:.2f}s)")
+        return
+    bad_total = 0
+    for seg in _segments(Path(args.directory)):
+        with open(seg, "rb") as f:
+            results = [Booking.decode(line) is not None for line in f]
+        bad = results.count(False)
+        bad_total += bad
+        print(f"{seg.name}: 레코드 {results.count(True)}건, 손상 {bad}건")
+    sys.exit(1 if bad_total else 0)
+
+
+if __name__ == "__main__":
+    main()
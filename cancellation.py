@@ -0,0 +1,66 @@
+"""
+cancellation.py - 턴 단위 취소 토큰
+
+"다시 말하기"나 페이지 이동으로 대체된 턴을 중단하기 위해 사용한다.
+스레드(실행기 워커)와 asyncio 양쪽에서 안전하게 확인/통지할 수 있다.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Callable
+
+
+class TurnCancelled(Exception):
+    """취소된 턴에서 다음 단계로 진행하려 할 때 발생한다."""
+
+
+class CancelToken:
+    """세션별 턴 취소 토큰."""
+
+    def __init__(self, deadline: float | None = None) -> None:
+        """
+        Args:
+            deadline: 턴 마감 시각 (time.monotonic 기준). 다른 프로세스의 응답처럼
+                취소로 끊을 수 없는 대기는 이 시각까지만 기다린다 (None이면 제한 없음)
+        """
+        self.deadline = deadline
+        self._event = threading.Event()
+        self._callbacks: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """토큰을 취소 상태로 만들고 등록된 콜백을 호출한다."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for cb in callbacks:
+            try:
+                cb()
+            except Exception:
+                pass
+
+    def add_callback(self, cb: Callable[[], None]) -> None:
+        """취소 시 호출할 콜백을 등록한다. 이미 취소됐다면 즉시 호출한다."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(cb)
+                return
+        cb()
+
+    def remove_callback(self, cb: Callable[[], None]) -> None:
+        with self._lock:
+            try:
+                self._callbacks.remove(cb)
+            except ValueError:
+                pass
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise TurnCancelled()
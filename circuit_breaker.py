@@ -0,0 +1,157 @@
+"""
+circuit_breaker.py - 외부 의존성(Ollama)용 서킷 브레이커
+
+최근 호출의 오류/지연을 롤링 윈도우로 추적하고,
+실패율이 임계값을 넘으면 OPEN 상태로 전환해 호출을 즉시 차단한다.
+대기 시간이 지나면 HALF_OPEN 상태에서 가벼운 프로브로 복구 여부를 확인한다.
+
+    CLOSED ──(실패율 초과)──▶ OPEN ──(cooldown 경과)──▶ HALF_OPEN
+       ▲                                                  │
+       └──────────────(프로브 + 시험 호출 성공)───────────┘
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable
+
+logger = logging.getLogger("malpyo.breaker")
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+@dataclass
+class CallRecord:
+    timestamp: float
+    ok: bool
+    latency: float
+
+
+class CircuitBreaker:
+    """롤링 윈도우 기반 서킷 브레이커.
+
+    느린 호출(slow_call_seconds 초과)도 실패로 집계하여,
+    "응답은 오지만 너무 느린" 상태에서도 회로가 열리도록 한다.
+    """
+
+    def __init__(
+        self,
+        name: str = "ollama",
+        window_seconds: float = 60.0,
+        window_size: int = 50,
+        min_calls: int = 5,
+        failure_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 6.0,
+        cooldown_seconds: float = 15.0,
+        probe: Callable[[], bool] | None = None,
+    ) -> None:
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.probe = probe
+
+        self._calls: deque[CallRecord] = deque(maxlen=window_size)
+        self._state = STATE_CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        """이번 호출을 진행해도 되는지 판단한다.
+
+        HALF_OPEN에서는 프로브가 성공한 경우에 한해 시험 호출 1건만 허용한다.
+        """
+        with self._lock:
+            if self._state == STATE_CLOSED:
+                return True
+            if self._state == STATE_OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown_seconds:
+                    return False
+                self._state = STATE_HALF_OPEN
+                logger.info("서킷 브레이커(%s) HALF_OPEN 전환", self.name)
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+
+        # 프로브는 락 밖에서 실행 (네트워크 호출)
+        if self.probe is not None:
+            try:
+                probe_ok = self.probe()
+            except Exception:
+                probe_ok = False
+            if not probe_ok:
+                with self._lock:
+                    self._trial_in_flight = False
+                    self._trip("프로브 실패")
+                return False
+        return True
+
+    def record(self, ok: bool, latency: float) -> None:
+        """호출 결과를 기록하고 상태를 갱신한다."""
+        ok = ok and latency <= self.slow_call_seconds
+        now = time.monotonic()
+        with self._lock:
+            self._calls.append(CallRecord(now, ok, latency))
+
+            if self._state == STATE_HALF_OPEN:
+                self._trial_in_flight = False
+                if ok:
+                    self._state = STATE_CLOSED
+                    self._calls.clear()
+                    logger.info("서킷 브레이커(%s) CLOSED 복구", self.name)
+                else:
+                    self._trip("시험 호출 실패")
+                return
+
+            if self._state == STATE_CLOSED:
+                recent = self._recent(now)
+                if len(recent) >= self.min_calls:
+                    failures = sum(1 for c in recent if not c.ok)
+                    if failures / len(recent) >= self.failure_rate_threshold:
+                        self._trip(f"실패율 {failures}/{len(recent)}")
+
+    def release_trial(self) -> None:
+        """HALF_OPEN 시험 호출이 결과 없이 끝났을 때(취소 등) 기록 없이 시험 자리를 비운다.
+
+        비우지 않으면 이후 allow()가 모두 거절되어 회로가 HALF_OPEN에 멈춘다.
+        """
+        with self._lock:
+            if self._state == STATE_HALF_OPEN:
+                self._trial_in_flight = False
+
+    def stats(self) -> dict:
+        """현재 상태와 롤링 윈도우 통계를 반환한다."""
+        with self._lock:
+            recent = self._recent(time.monotonic())
+            latencies = sorted(c.latency for c in recent)
+            failures = sum(1 for c in recent if not c.ok)
+            p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0
+            return {
+                "state": self._state,
+                "calls": len(recent),
+                "failure_rate": failures / len(recent) if recent else 0.0,
+                "p95_latency": p95,
+            }
+
+    def _recent(self, now: float) -> list[CallRecord]:
+        return [c for c in self._calls if now - c.timestamp <= self.window_seconds]
+
+    def _trip(self, reason: str) -> None:
+        # 호출자가 self._lock을 잡고 있어야 한다
+        self._state = STATE_OPEN
+        self._opened_at = time.monotonic()
+        logger.warning("서킷 브레이커(%s) OPEN: %s", self.name, reason)
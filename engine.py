@@ -4,22 +4,73 @@ engine.py - 말표(Mal-Pyo) 파이프라인 오케스트레이터
 app.py에서 녹음된 음성 파일을 받아 아래 순서로 처리한다:
   1) stt_engine  : 음성 → 텍스트
   2) llm_engine  : 텍스트 → 구조화 JSON + 응답 문장
-  3) tts_engine  : 응답 문장 → 음성(WAV bytes)
+  3) tts_engine  : 응답 문장 → 음성 (WAV 또는 Opus/MP3 bytes)
 
-app.py는 이 모듈의 MalPyoEngine.process() 하나만 호출하면 된다.
+app.py는 이 모듈의 MalPyoEngine.process() (또는 asyncio용 aprocess())
+하나만 호출하면 된다.
+
+Ollama 호출은 서킷 브레이커와 턴 단위 시간 예산으로 보호된다.
+회로가 열려 있거나 예산이 부족하면 rule_parser의 규칙 파싱 + 템플릿 응답
+(축소 모드)으로 즉시 대체한다.
+
+aprocess()는 세션별 취소 토큰을 사용한다. 같은 세션에서 새 턴이 시작되거나
+cancel_session()이 호출되면 이전 턴은 중단되고, 실행기 큐에서 대기 중이던
+단계는 슬롯을 차지하지 않고 제거된다.
 """
 
 from __future__ import annotations
 
+import asyncio
+import base64
+import contextlib
+import copy
+import json
 import logging
-from dataclasses import dataclass, field
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Hashable, Iterator, TypeVar
 
+from admission import AdmissionController, Ticket
+from audio_codec import AudioEncoding
 from stt_engine import STTEngine
 from llm_engine import LLMEngine, LLMResult
 from tts_engine import TTSEngine
+from circuit_breaker import CircuitBreaker
+from rule_parser import RuleParser
+from cancellation import CancelToken, TurnCancelled
+from health import HealthMonitor
+from prefetch import TTSPrefetcher
+from profiling import TurnProfile, TurnProfiler
+from shared_cache import SharedCache
+from station_index import StationIndex
+from stt_pool import build_stt
+from traffic import TrafficRecorder
+
+if TYPE_CHECKING:
+    # 의도 분류기는 numpy를 쓰므로 엔진을 만들 때 불러온다
+    from intent_model import IntentClassifier
 
 logger = logging.getLogger("malpyo.engine")
 
+# 진행 단계 콜백: (단계 이름, 지금까지의 부분 결과)
+ProgressCallback = Callable[[str, "PipelineResult"], None]
+
+# LLM 호출에 남은 예산이 이보다 적으면 호출하지 않고 바로 축소 모드로 간다
+MIN_LLM_SECONDS = 0.5
+
+# 인식하지 못한 턴(무음/오터치/저신뢰)에 바로 들려줄 안내 (미리 합성해 둔다)
+RETRY_PROMPT = "다시 말씀해 주세요."
+RETRY_ERROR = "음성이 인식되지 않았습니다. 다시 말씀해 주세요."
+
+# 과부하 시 입장 제어기가 쓰는 안내 (미리 합성해 둔다)
+BUSY_PROMPT = "잠시 후 다시 말씀해 주세요."
+BUSY_ERROR = "이용객이 많아 처리가 늦어지고 있습니다. 잠시 후 다시 말씀해 주세요."
+GENERIC_PROMPT = "확인했어요. 화면을 봐 주세요."
+
 
 @dataclass
 class PipelineResult:
@@ -27,9 +78,196 @@ class PipelineResult:
     recognized_text: str = ""          # STT 인식 텍스트
     parsed: dict = field(default_factory=dict)  # LLM이 추출한 구조화 데이터
     reply_text: str = ""               # LLM이 생성한 응답 문장
-    reply_audio: bytes | None = None   # TTS가 생성한 WAV bytes
+    reply_audio: bytes | None = None   # TTS가 생성한 오디오 bytes
+    reply_audio_mime: str = "audio/wav"  # reply_audio의 MIME 타입
     success: bool = True
     error: str = ""
+    degraded: bool = False             # 규칙 파서(축소 모드)로 응답했는지 여부
+    parser: str = ""                   # 파싱한 곳 (intent, llm, rules)
+    cancelled: bool = False            # 새 턴/페이지 이동으로 중단되었는지 여부
+    timings: dict = field(default_factory=dict)  # 단계별 소요 시간(초): queue(작업 큐 대기), stt, llm, tts, total(대기 제외)
+    admission: str = ""                # 입장 제어 단계 (normal, cached_tts, ..., reject)
+
+    def to_dict(self, include_audio: bool = True) -> dict:
+        """JSON 직렬화용 딕셔너리 (오디오는 base64). 추론 서버 응답에 쓴다."""
+        data = asdict(self)
+        audio = data.pop("reply_audio")
+        if include_audio and audio:
+            data["reply_audio_b64"] = base64.b64encode(audio).decode("ascii")
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PipelineResult":
+        data = dict(data)
+        audio = data.pop("reply_audio_b64", None)
+        known = {k: v for k, v in data.items() if k in cls.__dataclass_fields__}
+        return cls(**known, reply_audio=base64.b64decode(audio) if audio else None)
+
+
+def build_engine() -> MalPyoEngine:
+    """환경 변수 설정으로 엔진을 만든다 (추론 서버, 리플레이 도구용. app.py의 get_engine과 같은 설정)."""
+    index_path = Path(os.getenv("MALPYO_STATION_INDEX", Path(__file__).parent / "data" / "stations.json"))
+    stations = StationIndex.load(index_path) if index_path.is_file() else None
+    shared = SharedCache.from_env()
+    return MalPyoEngine(
+        stt=build_stt(),
+        llm=LLMEngine(
+            model=os.getenv("OLLAMA_MODEL", "llama3:8b"),
+            base_url=os.getenv("OLLAMA_URL", "http://localhost:11434"),
+            station_index=stations,
+            cache=shared,
+        ),
+        tts=TTSEngine(encoding=AudioEncoding.from_env(), cache=shared),
+        fallback=RuleParser(station_index=stations),
+    )
+
+
+def _no_progress(stage: str, result: PipelineResult) -> None:
+    pass
+
+
+@contextlib.contextmanager
+def _timed(result: PipelineResult, stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        result.timings[stage] = round(time.perf_counter() - start, 4)
+
+
+def _unstaged(name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    return fn
+
+
+def _stager(profile: TurnProfile | None) -> Callable[[str, Callable[..., Any]], Callable[..., Any]]:
+    """프로파일링 중이면 단계 함수를 단계 이름으로 감싸고, 아니면 그대로 둔다."""
+    return profile.wrap if profile is not None else _unstaged
+
+
+T = TypeVar("T")
+
+
+class _Flight:
+    """진행 중인 공유 호출 하나."""
+
+    def __init__(self) -> None:
+        self.future: Future = Future()
+        self.token = CancelToken()      # 기다리는 쪽이 모두 떠나면 취소된다
+        self.waiters = 0
+
+
+class SingleFlight:
+    """같은 키의 동시 호출을 하나로 합친다.
+
+    처음 들어온 호출(리더)만 실제로 실행하고, 실행 중에 같은 키로 들어온
+    호출(팔로어)은 그 결과를 함께 받는다. 예외도 모두에게 그대로 전달된다.
+    결과를 보관하지는 않으므로 (캐시가 아님) 호출이 끝나면 다음 호출은 새로 실행된다.
+
+    호출자마다 자기 취소 토큰과 대기 시간을 가진다. 한 호출자가 취소되거나
+    시간이 지나도 다른 호출자를 위해 실행은 계속되고, 모두 떠났을 때만
+    fn에 넘긴 공유 토큰이 취소된다.
+    """
+
+    def __init__(self) -> None:
+        self._flights: dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0      # 실행 없이 결과를 받은 호출 수
+
+    def do(
+        self,
+        key: Hashable,
+        fn: Callable[[CancelToken], T],
+        timeout: float | None = None,
+        cancel: CancelToken | None = None,
+    ) -> tuple[T, bool]:
+        """fn(공유 취소 토큰)을 키당 한 번만 실행하고 (결과, 공유 여부)를 반환한다.
+
+        Raises:
+            TimeoutError: 팔로어가 timeout 안에 결과를 받지 못함
+            TurnCancelled: 결과가 나오기 전에 cancel이 취소됨
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            shared = flight is not None
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+            flight.waiters += 1
+
+        left = False
+
+        def leave() -> None:
+            nonlocal left
+            with self._lock:
+                if left or flight.future.done():
+                    return
+                left = True
+                flight.waiters -= 1
+                if flight.waiters > 0:
+                    return
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.token.cancel()
+
+        if not shared:
+            self._lead(key, flight, fn, cancel, leave)
+        return self._follow(flight, timeout, cancel, leave), shared
+
+    def _lead(
+        self,
+        key: Hashable,
+        flight: _Flight,
+        fn: Callable[[CancelToken], Any],
+        cancel: CancelToken | None,
+        leave: Callable[[], None],
+    ) -> None:
+        if cancel is not None:
+            cancel.add_callback(leave)
+        try:
+            value = fn(flight.token)
+        except BaseException as e:
+            outcome: tuple[Any, BaseException | None] = (None, e)
+        else:
+            outcome = (value, None)
+        finally:
+            if cancel is not None:
+                cancel.remove_callback(leave)
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+        value, error = outcome
+        if error is not None:
+            flight.future.set_exception(error)
+        else:
+            flight.future.set_result(value)
+
+    @staticmethod
+    def _follow(
+        flight: _Flight,
+        timeout: float | None,
+        cancel: CancelToken | None,
+        leave: Callable[[], None],
+    ) -> Any:
+        done = threading.Event()
+        flight.future.add_done_callback(lambda _: done.set())
+        if cancel is not None:
+            cancel.add_callback(done.set)
+        try:
+            if not done.wait(timeout):
+                leave()
+                raise TimeoutError("공유 호출 대기 시간 초과")
+            if not flight.future.done():
+                leave()
+                raise TurnCancelled()
+            return flight.future.result()
+        finally:
+            if cancel is not None:
+                cancel.remove_callback(done.set)
+
+
+def _context_key(context: dict | None) -> str:
+    return json.dumps(context or {}, ensure_ascii=False, sort_keys=True, default=str)
 
 
 class MalPyoEngine:
@@ -43,16 +281,87 @@ class MalPyoEngine:
         stt: STTEngine | None = None,
         llm: LLMEngine | None = None,
         tts: TTSEngine | None = None,
+        fallback: RuleParser | None = None,
+        breaker: CircuitBreaker | None = None,
+        turn_budget: float = 8.0,
+        tts_reserve: float = 1.5,
+        max_workers: int = 4,
+        health_interval: float = 10.0,
+        canary_interval: float = 60.0,
+        profiler: TurnProfiler | None = None,
+        recorder: TrafficRecorder | None = None,
+        min_confidence: float = -1.0,
+        admission: AdmissionController | None = None,
+        intent: IntentClassifier | None = None,
     ) -> None:
+        """
+        Args:
+            fallback: LLM을 쓸 수 없을 때 사용할 규칙 파서
+            breaker: Ollama 서킷 브레이커 (None이면 기본 설정으로 생성)
+            turn_budget: 한 턴(STT+LLM+TTS) 전체의 시간 예산(초)
+            tts_reserve: 예산 중 TTS를 위해 남겨 둘 시간(초)
+            max_workers: aprocess()가 블로킹 단계를 실행할 워커 수 (동시 처리 슬롯)
+            health_interval: Ollama 상태 점검 주기(초)
+            canary_interval: STT/TTS 카나리(짧은 디코딩/합성) 점검 주기(초)
+            profiler: 턴 프로파일러 (None이면 MALPYO_PROFILE* 환경 변수로 생성)
+            recorder: 트래픽 녹화기 (None이면 MALPYO_CAPTURE_DIR 설정 시에만 생성)
+            min_confidence: STT 평균 로그 확률(STTResult.confidence)이 이보다 낮으면
+                LLM/TTS를 건너뛰고 다시 말해 달라고 안내한다
+            admission: 입장 제어기 (None이면 처리 슬롯 수와 턴 예산으로 생성)
+            intent: 할인/결제 페이지 의도 분류기. 확신하면 LLM을 건너뛴다
+                (None이면 MALPYO_INTENT_MODEL/data/intent.npz가 있을 때 불러온다)
+        """
         self.stt = stt or STTEngine()
         self.llm = llm or LLMEngine()
         self.tts = tts or TTSEngine()
+        self.fallback = fallback or RuleParser()
+        if intent is None:
+            from intent_model import IntentClassifier
+
+            intent = IntentClassifier.from_env()
+        self.intent = intent
+        self.breaker = breaker or CircuitBreaker(probe=self.llm.probe)
+        self.turn_budget = turn_budget
+        self.tts_reserve = tts_reserve
+        self.profiler = profiler or TurnProfiler.from_env()
+        self.recorder = recorder or TrafficRecorder.from_env()
+        self.min_confidence = min_confidence
+        self.admission = admission or AdmissionController(
+            capacity=max_workers, target_latency=turn_budget / 2
+        )
+        # 안내 문장 → 미리 합성해 둔 음성
+        self._prompt_clips: dict[str, tuple[bytes, str]] = {}
+        self._prompt_lock = threading.Lock()
+        # 여러 키오스크가 같은 발화/응답을 동시에 요청하면 Ollama/TTS 호출을 하나로 합친다
+        self._llm_flights = SingleFlight()
+        self._tts_flights = SingleFlight()
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="malpyo-stage"
+        )
+        self._turns: dict[str, CancelToken] = {}
+        self._turns_lock = threading.Lock()
+        # 다음에 말할 문장을 유휴 시간에 미리 합성한다 (진행 중인 턴이 있으면 양보)
+        self.prefetcher = TTSPrefetcher(
+            lambda text: self._tts_flights.do(text, lambda _token: self.tts.synthesize_encoded(text)),
+            busy=lambda: bool(self._turns) or getattr(self.tts, "busy", False),
+        )
 
+        self.health = HealthMonitor(interval=health_interval, ttl=3 * canary_interval)
+        self.health.add("stt", self._probe_stt, canary_interval)
+        self.health.add("llm", self.llm.probe)
+        self.health.add("tts", self._probe_tts, canary_interval)
+
+    # ─────────────────────────────────────────────────────────
+    # 동기 API
+    # ─────────────────────────────────────────────────────────
     def process(
         self,
         audio_bytes: bytes,
         page: str,
         context: dict | None = None,
+        on_progress: ProgressCallback | None = None,
+        profile: bool | None = None,
     ) -> PipelineResult:
         """음성 → 텍스트 → 구조화 파싱 → 응답 음성까지 한 번에 처리.
 
@@ -60,74 +369,427 @@ class MalPyoEngine:
             audio_bytes: 녹음된 WAV 바이트
             page: 현재 페이지 ("booking", "discount", "payment")
             context: LLM에 전달할 추가 컨텍스트
+            on_progress: 각 단계 시작 시 호출되는 콜백 ("stt", "llm", "tts")
+            profile: 이 턴을 프로파일링할지 (None이면 MALPYO_PROFILE 설정)
+        """
+        result = PipelineResult()
+        deadline = time.monotonic() + self.turn_budget
+        token = CancelToken(deadline)
+        notify = on_progress or _no_progress
+
+        with (
+            self.admission.admit() as decision,
+            _timed(result, "total"),
+            self.profiler.turn(page, profile, page=page) as prof,
+        ):
+            result.admission = decision.name
+            if decision.reject:
+                self._reject(result)
+            else:
+                stage = _stager(prof)
+                beam_size = 1 if decision.reduced_beam else None
+                notify("stt", result)
+                if stage("stt", self._stt_stage)(audio_bytes, result, token, beam_size):
+                    notify("llm", result)
+                    stage("llm", self._llm_stage)(
+                        result, page, context, deadline, None, decision.fast_parser
+                    )
+                    notify("tts", result)
+                    stage("tts", self._tts_stage)(result, None, decision.cached_tts)
+        self._capture(audio_bytes, page, context, result)
+        return result
+
+    # ─────────────────────────────────────────────────────────
+    # asyncio API
+    # ─────────────────────────────────────────────────────────
+    def begin_turn(self, session_id: str) -> CancelToken:
+        """세션의 새 턴을 시작한다. 진행 중이던 이전 턴은 취소된다."""
+        token = CancelToken()
+        with self._turns_lock:
+            previous = self._turns.get(session_id)
+            self._turns[session_id] = token
+        if previous is not None:
+            previous.cancel()
+        return token
+
+    def cancel_session(self, session_id: str) -> None:
+        """세션에서 진행 중인 턴을 취소한다 ("다시 말하기", 페이지 이동)."""
+        with self._turns_lock:
+            token = self._turns.pop(session_id, None)
+        if token is not None:
+            token.cancel()
+
+    def _end_turn(self, session_id: str, token: CancelToken) -> None:
+        with self._turns_lock:
+            if self._turns.get(session_id) is token:
+                del self._turns[session_id]
+
+    async def aprocess(
+        self,
+        audio_bytes: bytes,
+        page: str,
+        context: dict | None = None,
+        session_id: str | None = None,
+        on_progress: ProgressCallback | None = None,
+        profile: bool | None = None,
+        ticket: Ticket | None = None,
+    ) -> PipelineResult:
+        """process()의 asyncio 버전.
+
+        블로킹 단계(STT/LLM/TTS)는 실행기로 넘기고, 단계 사이와 실행 중에
+        취소 토큰을 확인한다. 취소되면 cancelled=True인 결과를 반환한다.
+
+        Args:
+            session_id: 키오스크 세션 식별자. 주어지면 같은 세션의 이전 턴을 취소한다.
+            on_progress: 각 단계 시작 시 호출되는 콜백 ("stt", "llm", "tts")
+            profile: 이 턴을 프로파일링할지 (None이면 MALPYO_PROFILE 설정)
+            ticket: 작업 큐에 넣을 때 admission.enqueue()로 받은 표. 주어지면 입장 제어와
+                턴 예산을 제출 시각부터 잰다 (큐 대기 포함)
         """
+        token = self.begin_turn(session_id) if session_id else CancelToken()
         result = PipelineResult()
+        ticket = ticket or self.admission.enqueue()
+        deadline = ticket.enqueued_at + self.turn_budget
+        # 취소로 끊을 수 없는 대기 (STT 워커 응답 등)는 턴 마감까지만
+        token.deadline = deadline
+        notify = on_progress or _no_progress
+
+        try:
+            with (
+                self.admission.admit(ticket) as decision,
+                _timed(result, "total"),
+                self.profiler.turn(page, profile, page=page, session_id=session_id) as prof,
+            ):
+                result.admission = decision.name
+                result.timings["queue"] = decision.waited
+                if decision.reject:
+                    self._reject(result)
+                else:
+                    stage = _stager(prof)
+                    beam_size = 1 if decision.reduced_beam else None
+                    notify("stt", result)
+                    ok = await self._offload(
+                        token, stage("stt", self._stt_stage), audio_bytes, result, token, beam_size
+                    )
+                    if ok:
+                        notify("llm", result)
+                        await self._offload(
+                            token, stage("llm", self._llm_stage),
+                            result, page, context, deadline, token, decision.fast_parser,
+                        )
+                        notify("tts", result)
+                        await self._offload(
+                            token, stage("tts", self._tts_stage), result, token, decision.cached_tts
+                        )
+        except TurnCancelled:
+            logger.info("턴 취소됨 (session=%s)", session_id)
+            result.success = False
+            result.cancelled = True
+            result.error = "취소된 요청입니다."
+        except asyncio.CancelledError:
+            token.cancel()
+            raise
+        finally:
+            if session_id:
+                self._end_turn(session_id, token)
+        self._capture(audio_bytes, page, context, result)
+        return result
+
+    def _capture(
+        self, audio_bytes: bytes, page: str, context: dict | None, result: PipelineResult
+    ) -> None:
+        """트래픽 녹화가 켜져 있으면 끝난 턴을 기록한다 (취소된 턴은 제외)."""
+        if self.recorder is not None and not result.cancelled:
+            self.recorder.record(audio_bytes, page, context, result)
+
+    async def _offload(
+        self, token: CancelToken, fn: Callable[..., Any], *args: Any
+    ) -> Any:
+        """fn을 실행기에서 실행하고, 토큰이 취소되면 즉시 TurnCancelled를 던진다.
+
+        아직 실행기 큐에서 대기 중인 작업은 취소되어 슬롯을 차지하지 않는다.
+        """
+        token.raise_if_cancelled()
+        loop = asyncio.get_running_loop()
+        work = loop.run_in_executor(self._executor, fn, *args)
+        cancelled = loop.create_future()
+
+        def _notify() -> None:
+            loop.call_soon_threadsafe(
+                lambda: cancelled.done() or cancelled.set_result(None)
+            )
+
+        token.add_callback(_notify)
+        try:
+            await asyncio.wait({work, cancelled}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            token.remove_callback(_notify)
+            if not cancelled.done():
+                cancelled.cancel()
+
+        if work.done():
+            return work.result()
+        work.cancel()
+        raise TurnCancelled()
+
+    # ─────────────────────────────────────────────────────────
+    # 단계
+    # ─────────────────────────────────────────────────────────
+    def _stt_stage(
+        self,
+        audio_bytes: bytes,
+        result: PipelineResult,
+        cancel: CancelToken | None = None,
+        beam_size: int | None = None,
+    ) -> bool:
+        """1단계: STT. 다음 단계로 진행할 수 있으면 True.
 
-        # ── 1단계: STT ──
+        beam_size가 주어지면(과부하) 그 빔 크기로 디코딩한다.
+        """
         try:
-            stt_result = self.stt.transcribe(audio_bytes)
+            with _timed(result, "stt"):
+                if beam_size is None:
+                    stt_result = self.stt.transcribe(audio_bytes, cancel=cancel)
+                else:
+                    stt_result = self.stt.transcribe(audio_bytes, cancel=cancel, beam_size=beam_size)
             result.recognized_text = stt_result.text.strip()
+        except TurnCancelled:
+            raise
         except Exception as e:
             logger.error("STT 실패: %s", e)
             result.success = False
             result.error = f"음성 인식 실패: {e}"
-            return result
+            return False
 
+        # 무음/오터치(디코딩 전 게이트)나 저신뢰 인식은 LLM/TTS 없이 바로 재요청
         if not result.recognized_text:
-            result.success = False
-            result.error = "음성이 인식되지 않았습니다. 다시 말씀해 주세요."
-            return result
+            self._ask_retry(result)
+            return False
+        if stt_result.confidence < self.min_confidence:
+            logger.info(
+                "STT 신뢰도 낮음(%.2f), 재요청: %s", stt_result.confidence, result.recognized_text
+            )
+            self._ask_retry(result)
+            return False
 
         logger.info("STT 결과: %s", result.recognized_text)
+        return True
 
-        # ── 2단계: LLM (Ollama) ──
-        try:
-            llm_result: LLMResult = self.llm.parse(
-                result.recognized_text, page, context
+    def _ask_retry(self, result: PipelineResult) -> None:
+        result.success = False
+        result.error = RETRY_ERROR
+        result.reply_text = RETRY_PROMPT
+        clip = self.retry_clip()
+        if clip is not None:
+            result.reply_audio, result.reply_audio_mime = clip
+
+    def _reject(self, result: PipelineResult) -> None:
+        """과부하로 거절한 턴: STT 없이 미리 합성해 둔 안내만 돌려준다 (합성하지 않음)."""
+        result.success = False
+        result.error = BUSY_ERROR
+        result.reply_text = BUSY_PROMPT
+        clip = self._prompt_clips.get(BUSY_PROMPT)
+        if clip is not None:
+            result.reply_audio, result.reply_audio_mime = clip
+
+    def retry_clip(self) -> tuple[bytes, str] | None:
+        """미리 합성해 둔 재요청 안내 음성 (처음 한 번만 합성, 실패하면 None)."""
+        return self._prompt_clip(RETRY_PROMPT)
+
+    def _prompt_clip(self, text: str) -> tuple[bytes, str] | None:
+        clip = self._prompt_clips.get(text)
+        if clip is None:
+            with self._prompt_lock:
+                clip = self._prompt_clips.get(text)
+                if clip is None:
+                    try:
+                        clip = self._prompt_clips[text] = self.tts.synthesize_encoded(text)
+                    except Exception as e:
+                        logger.warning("안내 음성 합성 실패(%s): %s", text, e)
+                        return None
+        return clip
+
+    def _llm_stage(
+        self,
+        result: PipelineResult,
+        page: str,
+        context: dict | None,
+        deadline: float,
+        cancel: CancelToken | None = None,
+        fast_only: bool = False,
+    ) -> None:
+        """2단계: LLM (Ollama, 서킷 브레이커 보호). fast_only면(과부하) 규칙 파서만 쓴다."""
+        with _timed(result, "llm"):
+            llm_result, result.parser = self._parse(
+                result.recognized_text, page, context, deadline, cancel, fast_only
             )
+        result.degraded = result.parser == "rules"
+        result.parsed = llm_result.raw_json
+        result.reply_text = llm_result.reply or result.recognized_text
 
-            if llm_result.success:
-                result.parsed = llm_result.raw_json
-                result.reply_text = llm_result.reply
-            else:
-                logger.warning("LLM 파싱 실패, STT 텍스트만 반환: %s", llm_result.error)
-                result.reply_text = result.recognized_text
+        logger.info("LLM 파싱(%s): %s", result.parser, result.parsed)
+        logger.info("LLM 응답: %s", result.reply_text)
+
+    def _tts_stage(
+        self,
+        result: PipelineResult,
+        cancel: CancelToken | None = None,
+        cached_only: bool = False,
+    ) -> None:
+        """3단계: TTS. 실패해도 텍스트 결과는 유효하므로 계속 진행한다.
+
+        cached_only면(과부하) 새로 합성하지 않고, 캐시에 있는 음성이나
+        미리 합성해 둔 공통 안내 음성을 쓴다 (응답 문장은 화면에 표시된다).
+        """
+        if not result.reply_text:
+            return
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        if cached_only:
+            lookup = getattr(self.tts, "lookup", None)
+            clip = (lookup(result.reply_text) if lookup else None) or self._prompt_clip(GENERIC_PROMPT)
+            if clip is not None:
+                result.reply_audio, result.reply_audio_mime = clip
+            return
+        try:
+            with _timed(result, "tts"):
+                (result.reply_audio, result.reply_audio_mime), _ = self._tts_flights.do(
+                    result.reply_text,
+                    lambda _token: self.tts.synthesize_encoded(result.reply_text),
+                    cancel=cancel,
+                )
+        except TurnCancelled:
+            raise
         except Exception as e:
-            logger.error("LLM 처리 실패: %s", e)
-            result.reply_text = result.recognized_text
+            logger.error("TTS 실패: %s", e)
 
-        logger.info("LLM 파싱: %s", result.parsed)
-        logger.info("LLM 응답: %s", result.reply_text)
+    def _parse(
+        self,
+        text: str,
+        page: str,
+        context: dict | None,
+        deadline: float,
+        cancel: CancelToken | None = None,
+        fast_only: bool = False,
+    ) -> tuple[LLMResult, str]:
+        """남은 예산, 회로 상태, 입장 제어 결정에 따라 LLM 또는 규칙 파서로 파싱한다.
 
-        # ── 3단계: TTS ──
-        if result.reply_text:
-            try:
-                result.reply_audio = self.tts.synthesize(result.reply_text)
-            except Exception as e:
-                logger.error("TTS 실패: %s", e)
-                # TTS 실패해도 텍스트 결과는 유효하므로 계속 진행
+        할인/결제 페이지는 먼저 의도 분류기를 거치고, 확신하면 LLM을 부르지 않는다.
 
-        return result
+        Returns:
+            (파싱 결과, 파싱한 곳: "intent" / "llm" / "rules"(축소 모드))
+        """
+        if self.intent is not None:
+            intent_result = self.intent.parse(text, page, context)
+            if intent_result is not None:
+                return intent_result, "intent"
+        if fast_only:
+            return self._degrade(text, page, context), "rules"
+        remaining = deadline - time.monotonic() - self.tts_reserve
+        if remaining < MIN_LLM_SECONDS:
+            logger.warning("LLM 예산 부족(%.2fs), 축소 모드로 응답", remaining)
+            return self._degrade(text, page, context), "rules"
+        if not self.breaker.allow():
+            logger.warning("서킷 브레이커 %s, 축소 모드로 응답", self.breaker.state)
+            return self._degrade(text, page, context), "rules"
 
-    def health_check(self) -> dict[str, bool | str]:
-        """각 엔진의 상태를 확인한다."""
-        status: dict[str, bool | str] = {}
+        try:
+            llm_result, shared = self._llm_flights.do(
+                (page, text, _context_key(context)),
+                lambda token: self._call_llm(text, page, context, remaining, token),
+                timeout=remaining,
+                cancel=cancel,
+            )
+            if shared:
+                # 같은 결과를 여러 턴이 받으므로 턴마다 사본을 쓴다
+                llm_result = copy.deepcopy(llm_result)
+        except TimeoutError as e:
+            llm_result = LLMResult(success=False, error=str(e))
+
+        if llm_result.cancelled:
+            raise TurnCancelled()
+
+        if llm_result.success:
+            return llm_result, "llm"
+        logger.warning("LLM 파싱 실패, 축소 모드로 응답: %s", llm_result.error)
+        return self._degrade(text, page, context), "rules"
 
-        # STT
+    def _call_llm(
+        self, text: str, page: str, context: dict | None, timeout: float, cancel: CancelToken
+    ) -> LLMResult:
+        """실제 Ollama 호출 (동시 요청 중 한 번만 실행되며, 결과는 브레이커에 한 번 기록)."""
+        start = time.monotonic()
         try:
-            self.stt._load_model()
-            status["stt"] = True
+            llm_result = self.llm.parse(text, page, context, timeout=timeout, cancel=cancel)
         except Exception as e:
-            status["stt"] = f"오류: {e}"
-
-        # LLM (Ollama)
-        status["llm"] = self.llm.health_check()
+            logger.error("LLM 처리 실패: %s", e)
+            llm_result = LLMResult(success=False, error=str(e))
+        if llm_result.cancelled:
+            # 취소는 Ollama 상태와 무관하므로 기록하지 않고, 시험 호출이었다면 자리만 비운다
+            self.breaker.release_trial()
+        else:
+            self.breaker.record(llm_result.success, time.monotonic() - start)
+        return llm_result
 
-        # TTS
+    def _degrade(self, text: str, page: str, context: dict | None) -> LLMResult:
+        """규칙 파싱 + 템플릿 응답 (축소 모드)."""
         try:
-            self.tts._load_engine()
-            status["tts"] = True
+            return self.fallback.parse(text, page, context)
         except Exception as e:
-            status["tts"] = f"오류: {e}"
+            logger.error("규칙 파서 실패: %s", e)
+            return LLMResult(success=False, error=str(e))
+
+    def prefetch(self, texts: list[str]) -> None:
+        """texts를 낮은 우선순위로 미리 합성해 TTS 캐시에 넣는다 (즉시 반환).
+
+        다음 턴의 응답 문장이 같으면 TTS 단계가 캐시 적중으로 끝나고,
+        합성 중에 같은 문장을 요청한 턴은 그 합성 결과를 함께 받는다.
+        """
+        self.prefetcher.offer(texts)
+
+    def warmup(self) -> threading.Thread:
+        """안내 음성(재요청/과부하) 합성과 STT 모델 로딩/첫 추론을 백그라운드에서 미리 끝낸다.
+
+        UI는 바로 뜨고, 모델은 첫 승객이 말하기 전에 준비된다.
+        워밍업 전에 턴이 들어오면 그 턴이 로딩이 끝나기를 기다린다.
+        """
+        def _run() -> None:
+            start = time.perf_counter()
+            for prompt in (RETRY_PROMPT, BUSY_PROMPT, GENERIC_PROMPT):
+                self._prompt_clip(prompt)
+            try:
+                warm = getattr(self.stt, "warmup", None) or self.stt._load_model
+                warm()
+                logger.info("엔진 워밍업 완료 (%.2fs)", time.perf_counter() - start)
+            except Exception as e:
+                logger.warning("엔진 워밍업 실패: %s", e)
+
+        thread = threading.Thread(target=_run, name="malpyo-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def health_check(self) -> dict[str, bool | str]:
+        """각 엔진의 상태를 반환한다.
 
+        백그라운드 점검기가 캐시해 둔 결과를 읽기만 하므로 모델을 싣거나
+        네트워크를 기다리지 않는다 (첫 호출 때 점검기를 시작한다).
+        """
+        self.health.start()
+        status = self.health.status()
+        status["llm_breaker"] = self.breaker.state
+        status["admission"] = self.admission.level
         return status
+
+    def _probe_stt(self) -> bool | str:
+        # 로딩은 warmup()/첫 턴의 몫이고, 점검은 로딩 여부만 보고 카나리를 돌린다
+        if not getattr(self.stt, "loaded", True):
+            return "로딩 중"
+        canary = getattr(self.stt, "canary", None)
+        if canary is None:
+            return True
+        outcome = canary()
+        return outcome if isinstance(outcome, (bool, str)) else True
+
+    def _probe_tts(self) -> bool | str:
+        canary = getattr(self.tts, "canary", None)
+        return canary() if canary is not None else True
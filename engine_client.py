@@ -0,0 +1,134 @@
+"""
+engine_client.py - 추론 서버(server.py) 클라이언트
+
+MalPyoEngine과 같은 process() / aprocess() / cancel_session() 인터페이스를
+제공하므로, app.py와 VoiceJobRunner는 로컬 엔진 대신 그대로 사용할 수 있다.
+UI 프로세스는 모델을 싣지 않고 요청만 중계한다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import uuid
+
+import requests
+
+from engine import PipelineResult, ProgressCallback, _no_progress
+
+logger = logging.getLogger("malpyo.client")
+
+CONTEXT_HEADER = "X-Malpyo-Context"
+
+
+class RemoteEngine:
+    """HTTP로 원격 MalPyoEngine을 호출한다."""
+
+    def __init__(self, base_url: str, timeout: float = 30.0) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._session = requests.Session()
+        # 세션별 진행 중인 응답 (취소 시 연결을 끊기 위해)
+        self._inflight: dict[str, requests.Response] = {}
+        self._lock = threading.Lock()
+
+    def health_check(self) -> dict[str, bool | str]:
+        try:
+            resp = self._session.get(f"{self.base_url}/health", timeout=3)
+            resp.raise_for_status()
+            return resp.json()
+        except requests.RequestException as e:
+            return {"status": f"오류: {e}"}
+
+    def process(
+        self,
+        audio_bytes: bytes,
+        page: str,
+        context: dict | None = None,
+        on_progress: ProgressCallback | None = None,
+        session_id: str | None = None,
+        profile: bool | None = None,
+    ) -> PipelineResult:
+        """원격 서버에서 한 턴을 처리한다. 진행 단계는 스트림으로 받아 on_progress로 전달한다.
+
+        profile=True면 서버가 이 턴을 프로파일링해 서버 쪽 디렉터리에 남긴다.
+        """
+        session_id = session_id or uuid.uuid4().hex
+        notify = on_progress or _no_progress
+        params = {"page": page, "session_id": session_id}
+        if profile:
+            params["profile"] = "1"
+        try:
+            resp = self._session.post(
+                f"{self.base_url}/process",
+                params=params,
+                headers={CONTEXT_HEADER: json.dumps(context or {})},
+                data=audio_bytes,
+                stream=True,
+                timeout=(3.0, self.timeout),
+            )
+        except requests.RequestException as e:
+            logger.error("추론 서버 연결 실패: %s", e)
+            return PipelineResult(success=False, error=f"추론 서버 연결 실패: {e}")
+
+        with self._lock:
+            self._inflight[session_id] = resp
+        try:
+            resp.raise_for_status()
+            for line in resp.iter_lines():
+                if not line:
+                    continue
+                event = json.loads(line)
+                result = PipelineResult.from_dict(event["result"])
+                if event["stage"] == "done":
+                    return result
+                notify(event["stage"], result)
+            raise requests.ConnectionError("결과 없이 스트림이 끝났습니다")
+        except (requests.RequestException, ValueError, AttributeError) as e:
+            with self._lock:
+                cancelled = self._inflight.get(session_id) is not resp
+            if cancelled:
+                return PipelineResult(success=False, cancelled=True, error="취소된 요청입니다.")
+            logger.error("추론 서버 응답 오류: %s", e)
+            return PipelineResult(success=False, error=f"추론 서버 오류: {e}")
+        finally:
+            with self._lock:
+                if self._inflight.get(session_id) is resp:
+                    del self._inflight[session_id]
+            resp.close()
+
+    async def aprocess(
+        self,
+        audio_bytes: bytes,
+        page: str,
+        context: dict | None = None,
+        session_id: str | None = None,
+        on_progress: ProgressCallback | None = None,
+        profile: bool | None = None,
+    ) -> PipelineResult:
+        return await asyncio.to_thread(
+            self.process, audio_bytes, page, context, on_progress, session_id, profile
+        )
+
+    def cancel_session(self, session_id: str) -> None:
+        """진행 중인 요청의 연결을 끊고 서버에도 취소를 알린다."""
+        with self._lock:
+            resp = self._inflight.pop(session_id, None)
+        if resp is None:
+            return
+        resp.close()
+        try:
+            self._session.post(
+                f"{self.base_url}/cancel", params={"session_id": session_id}, timeout=2
+            )
+        except requests.RequestException as e:
+            logger.warning("원격 취소 실패: %s", e)
+
+    def prefetch(self, texts: list[str]) -> None:
+        """서버에 응답 문장 미리 합성을 요청한다 (실패해도 무시)."""
+        try:
+            self._session.post(f"{self.base_url}/prefetch", json={"texts": texts}, timeout=1)
+        except requests.RequestException as e:
+            logger.debug("미리 합성 요청 실패: %s", e)
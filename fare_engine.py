@@ -0,0 +1,200 @@
+"""
+fare_engine.py - 운임표 + 벡터화 요금 계산 엔진
+
+역(터미널) 인덱스와 운임 행렬(NumPy)을 디스크의 압축 파일에서 메모리 매핑으로
+불러오고, 할인율 벡터를 미리 계산해 두어 탑승객 목록 전체 또는 여러 견적을
+한 번의 벡터 연산으로 계산한다.
+
+운임 디렉터리 구성:
+    stations.json  : {"stations": ["서울", ...], "default_price": 15000}
+    fares.npy      : int32 [N, N] 운임 행렬 (0 = 운임 정보 없음 → default_price)
+
+CSV(출발,도착,운임)에서 운임 디렉터리를 만들려면:
+    python fare_engine.py build fares.csv data/fares
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger("malpyo.fare")
+
+STATIONS_FILE = "stations.json"
+MATRIX_FILE = "fares.npy"
+
+
+@dataclass
+class Quote:
+    """한 건의 요금 견적."""
+    base_unit: int                     # 1인 기본 운임
+    per_passenger: list[int]           # 탑승객별 할인 후 금액
+    discounts: list[int]               # 탑승객별 할인 금액
+    total_base: int
+    total_discount: int
+    final: int
+
+
+class FareTable:
+    """역 인덱스 + 운임 행렬."""
+
+    def __init__(self, stations: list[str], matrix: np.ndarray, default_price: int) -> None:
+        if matrix.shape != (len(stations), len(stations)):
+            raise ValueError(
+                f"운임 행렬 크기 {matrix.shape}가 역 수 {len(stations)}와 맞지 않습니다"
+            )
+        self.stations = list(stations)
+        self.matrix = matrix
+        self.default_price = default_price
+        self._index = {name: i for i, name in enumerate(self.stations)}
+
+    @classmethod
+    def load(cls, directory: str | Path) -> "FareTable":
+        """운임 디렉터리를 불러온다. 운임 행렬은 메모리 매핑(읽기 전용)된다."""
+        directory = Path(directory)
+        meta = json.loads((directory / STATIONS_FILE).read_text(encoding="utf-8"))
+        matrix = np.load(directory / MATRIX_FILE, mmap_mode="r")
+        logger.info("운임표 로드: 역 %d개 (%s)", len(meta["stations"]), directory)
+        return cls(meta["stations"], matrix, int(meta["default_price"]))
+
+    @classmethod
+    def from_pairs(
+        cls,
+        pairs: dict[tuple[str, str], int],
+        stations: list[str] | None = None,
+        default_price: int = 15000,
+    ) -> "FareTable":
+        """(출발, 도착) → 운임 딕셔너리로 대칭 운임표를 만든다."""
+        if stations is None:
+            stations = sorted({s for pair in pairs for s in pair})
+        index = {name: i for i, name in enumerate(stations)}
+        matrix = np.zeros((len(stations), len(stations)), dtype=np.int32)
+        for (dep, arr), fare in pairs.items():
+            if dep in index and arr in index:
+                i, j = index[dep], index[arr]
+                matrix[i, j] = fare
+                if matrix[j, i] == 0:
+                    matrix[j, i] = fare
+        return cls(stations, matrix, default_price)
+
+    def save(self, directory: str | Path) -> None:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / STATIONS_FILE).write_text(
+            json.dumps(
+                {"stations": self.stations, "default_price": self.default_price},
+                ensure_ascii=False,
+            ),
+            encoding="utf-8",
+        )
+        np.save(directory / MATRIX_FILE, np.ascontiguousarray(self.matrix, dtype=np.int32))
+
+    def index_of(self, name: str) -> int:
+        """역 이름 → 인덱스 (없으면 -1)."""
+        return self._index.get(name, -1)
+
+    def price(self, departure: str, arrival: str) -> int:
+        return int(self.prices([departure], [arrival])[0])
+
+    def prices(self, departures: list[str], arrivals: list[str]) -> np.ndarray:
+        """여러 구간의 1인 기본 운임을 한 번에 조회한다."""
+        i = np.fromiter((self.index_of(d) for d in departures), dtype=np.int64)
+        j = np.fromiter((self.index_of(a) for a in arrivals), dtype=np.int64)
+        known = (i >= 0) & (j >= 0)
+        fares = np.full(len(i), self.default_price, dtype=np.int64)
+        fares[known] = self.matrix[i[known], j[known]]
+        fares[fares <= 0] = self.default_price
+        return fares
+
+
+class FareEngine:
+    """운임표 + 할인율 벡터로 견적을 계산한다."""
+
+    def __init__(self, table: FareTable, discounts: list[dict]) -> None:
+        """
+        Args:
+            table: 운임표
+            discounts: app.py의 DISCOUNTS 형식 ({"id", "rate", ...}) 목록.
+                첫 항목이 기본(할인 없음)으로 쓰인다.
+        """
+        self.table = table
+        self.discount_ids = [d["id"] for d in discounts]
+        self._discount_index = {d: i for i, d in enumerate(self.discount_ids)}
+        # 할인율(%) 벡터 — 알 수 없는 할인 id는 0번(기본)으로 매핑
+        self.rates = np.array([d["rate"] for d in discounts], dtype=np.int64)
+
+    def discount_codes(self, discount_ids: list[str]) -> np.ndarray:
+        return np.fromiter(
+            (self._discount_index.get(d, 0) for d in discount_ids), dtype=np.int64
+        )
+
+    def quote(self, departure: str, arrival: str, discount_ids: list[str]) -> Quote:
+        """한 구간 + 탑승객 할인 목록의 견적."""
+        base_unit = self.table.price(departure, arrival)
+        codes = self.discount_codes(discount_ids)
+        discounts = base_unit * self.rates[codes] // 100
+        per_passenger = base_unit - discounts
+        total_base = base_unit * len(codes)
+        total_discount = int(discounts.sum())
+        return Quote(
+            base_unit=base_unit,
+            per_passenger=per_passenger.tolist(),
+            discounts=discounts.tolist(),
+            total_base=total_base,
+            total_discount=total_discount,
+            final=total_base - total_discount,
+        )
+
+    def quote_batch(
+        self,
+        departures: list[str],
+        arrivals: list[str],
+        discount_matrix: list[list[str]],
+    ) -> np.ndarray:
+        """여러 견적을 한 번에 계산한다.
+
+        Args:
+            discount_matrix: 견적별 탑승객 할인 id 목록 (길이가 달라도 됨)
+
+        Returns:
+            int64 [K, 3] 배열: (기본운임 합계, 할인 합계, 최종 금액)
+        """
+        base = self.table.prices(departures, arrivals)
+        width = max((len(row) for row in discount_matrix), default=0)
+        codes = np.zeros((len(discount_matrix), width), dtype=np.int64)
+        mask = np.zeros((len(discount_matrix), width), dtype=bool)
+        for k, row in enumerate(discount_matrix):
+            codes[k, :len(row)] = self.discount_codes(row)
+            mask[k, :len(row)] = True
+
+        discounts = (base[:, None] * self.rates[codes] // 100) * mask
+        total_base = base * mask.sum(axis=1)
+        total_discount = discounts.sum(axis=1)
+        return np.stack([total_base, total_discount, total_base - total_discount], axis=1)
+
+
+def build_from_csv(csv_path: str | Path, out_dir: str | Path, default_price: int = 15000) -> FareTable:
+    """CSV(출발,도착,운임)로부터 운임 디렉터리를 만든다."""
+    pairs: dict[tuple[str, str], int] = {}
+    with open(csv_path, encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if len(row) < 3 or not row[2].strip().isdigit():
+                continue  # 헤더/잘못된 행 건너뜀
+            pairs[(row[0].strip(), row[1].strip())] = int(row[2])
+    table = FareTable.from_pairs(pairs, default_price=default_price)
+    table.save(out_dir)
+    return table
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != "build":
+        print("사용법: python fare_engine.py build <fares.csv> <출력 디렉터리>")
+        sys.exit(1)
+    built = build_from_csv(sys.argv[2], sys.argv[3])
+    print(f"운임표 생성 완료: 역 {len(built.stations)}개 → {sys.argv[3]}")
@@ -0,0 +1,141 @@
+"""
+health.py - 백그라운드 상태 점검기
+
+구성 요소(STT/LLM/TTS)별 가벼운 프로브를 정해진 주기로 백그라운드 스레드에서
+실행하고 결과를 캐시해 둔다. 상태 조회는 캐시를 읽기만 하므로 모델 로딩이나
+네트워크 대기 없이 즉시 반환되고, 승객의 턴을 막지 않는다.
+
+프로브 반환값:
+    True      정상
+    False     응답 없음
+    str       비정상 사유 (예: "로딩 중")
+    예외      "오류: ..."
+마지막 점검이 ttl보다 오래되면 (프로브가 멈춘 경우) "확인 지연"으로 표시한다.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+logger = logging.getLogger("malpyo.health")
+
+Probe = Callable[[], "bool | str"]
+
+
+@dataclass
+class ComponentStatus:
+    ok: bool
+    detail: str = ""
+    checked_at: float = 0.0     # time.monotonic() 기준
+    latency: float = 0.0
+
+
+@dataclass
+class _Check:
+    probe: Probe
+    interval: float
+    next_due: float = 0.0
+
+
+class HealthMonitor:
+    """구성 요소별 프로브를 주기적으로 실행하고 결과를 TTL 캐시로 보관한다."""
+
+    def __init__(self, interval: float = 10.0, ttl: float = 60.0) -> None:
+        """
+        Args:
+            interval: 프로브 기본 점검 주기(초)
+            ttl: 이 시간(초)보다 오래된 결과는 "확인 지연"으로 본다
+        """
+        self.interval = interval
+        self.ttl = ttl
+        self._checks: dict[str, _Check] = {}
+        self._results: dict[str, ComponentStatus] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def add(self, name: str, probe: Probe, interval: float | None = None) -> None:
+        """프로브를 등록한다 (interval이 None이면 기본 주기)."""
+        with self._lock:
+            self._checks[name] = _Check(probe, interval or self.interval)
+        self._wake.set()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="malpyo-health", daemon=True
+            )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def snapshot(self) -> dict[str, ComponentStatus | None]:
+        """마지막 점검 결과 (아직 점검 전이면 None)."""
+        with self._lock:
+            return {name: self._results.get(name) for name in self._checks}
+
+    def status(self) -> dict[str, bool | str]:
+        """캐시된 상태를 {이름: True 또는 사유}로 반환한다 (블로킹 없음)."""
+        now = time.monotonic()
+        status: dict[str, bool | str] = {}
+        for name, result in self.snapshot().items():
+            if result is None:
+                status[name] = "확인 중"
+            elif now - result.checked_at > self.ttl:
+                status[name] = f"확인 지연 ({now - result.checked_at:.0f}s 전)"
+            else:
+                status[name] = True if result.ok else result.detail
+        return status
+
+    def check_now(self, name: str) -> ComponentStatus:
+        """프로브 하나를 즉시 실행하고 결과를 캐시에 반영한다."""
+        with self._lock:
+            check = self._checks[name]
+        result = self._probe(check.probe)
+        with self._lock:
+            self._results[name] = result
+            check.next_due = result.checked_at + check.interval
+        return result
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            now = time.monotonic()
+            with self._lock:
+                due = [name for name, c in self._checks.items() if c.next_due <= now]
+            for name in due:
+                if self._stop.is_set():
+                    return
+                with self._lock:
+                    previous = self._results.get(name)
+                result = self.check_now(name)
+                # 상태가 바뀔 때만 기록한다 (주기마다 같은 경고를 반복하지 않도록)
+                if not result.ok and (previous is None or previous.ok or previous.detail != result.detail):
+                    logger.warning("상태 점검 실패: %s (%s)", name, result.detail)
+                elif result.ok and previous is not None and not previous.ok:
+                    logger.info("상태 복구: %s", name)
+            with self._lock:
+                next_due = min((c.next_due for c in self._checks.values()), default=now + self.interval)
+            self._wake.wait(max(0.0, next_due - time.monotonic()))
+            self._wake.clear()
+
+    @staticmethod
+    def _probe(probe: Probe) -> ComponentStatus:
+        start = time.monotonic()
+        try:
+            outcome = probe()
+        except Exception as e:
+            outcome = f"오류: {e}"
+        end = time.monotonic()
+        if outcome is True:
+            return ComponentStatus(True, checked_at=end, latency=end - start)
+        detail = outcome if isinstance(outcome, str) else "응답 없음"
+        return ComponentStatus(False, detail, checked_at=end, latency=end - start)
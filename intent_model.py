@@ -0,0 +1,511 @@
+"""
+intent_model.py - 할인/결제 페이지용 경량 의도 분류기
+
+결제 페이지의 답은 네 가지, 할인 페이지는 탑승객마다 다섯 가지뿐인데 지금은
+이 턴도 llama3:8b를 거친다. 의도 분류기는 발화를 글자 n-gram 해시 특징으로 바꾸고
+선형 모델(소프트맥스)로 라벨을 고른다. 추론은 NumPy 행 합산 한 번이라 CPU에서
+수십 마이크로초면 끝나고, 확신도가 문턱보다 낮거나 발화 구조가 애매하면(여러
+탑승객에게 서로 다른 할인 등) None을 돌려 LLM에 맡긴다.
+
+    특징: 공백을 경계로 바꾼 글자 1~3-gram → crc32 해시 버킷 (4096개), L2 정규화
+    모델: 페이지별 가중치 (버킷 × 라벨) + 편향, 라벨에 "none"(해당 없음) 포함
+
+학습 (합성 발화 + 선택: 녹화된 실제 턴, 검증 정확도와 추론 지연을 출력):
+    python intent_model.py train --out data/intent.npz
+    python intent_model.py train --capture captures/ --tsv extra.tsv
+녹화된 턴(traffic.py 아카이브)은 LLM이 처리한 할인/결제 턴의 파싱 결과를 라벨로 쓴다.
+TSV는 "page<TAB>label<TAB>발화" 한 줄에 하나.
+평가:
+    python intent_model.py eval data/intent.npz --tsv labeled.tsv
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import logging
+import os
+import random
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from llm_engine import LLMResult
+from rule_parser import (
+    CLAUSE_SPLIT_RE, DISCOUNT_NAMES, PAYMENT_NAMES, RuleParser, render_reply, with_ro,
+)
+
+logger = logging.getLogger("malpyo.intent")
+
+INTENT_PAGES = ("discount", "payment")
+NONE_LABEL = "none"
+DEFAULT_DIM = 4096
+DEFAULT_MODEL_PATH = Path(__file__).parent / "data" / "intent.npz"
+
+# 할인 전체 적용 표현 (규칙 파서와 같은 기준)
+_ALL_WORDS = ("모두", "전부", "다 ", "다요", "둘 다", "셋 다")
+# 부정/정정 ("카드 말고 현금"), 질문 ("경로 할인 돼요?"), 조건·설명 ("학생인데 대학생이에요")이
+# 섞이면 글자 특징만으로는 판단하지 않고 LLM에 맡긴다
+_DEFER_WORDS = (
+    "말고", "아니", "빼고", "대신", "바꿔",
+    "?", "나요", "까요", "돼요", "되요", "되죠", "될까", "있어요", "있나", "어떻게", "얼마", "뭐",
+    "인데", "는데", "지만",
+)
+
+
+# ─────────────────────────────────────────────────────────
+# 특징
+# ─────────────────────────────────────────────────────────
+@functools.lru_cache(maxsize=65536)
+def _bucket(gram: str, dim: int) -> int:
+    # Python hash()는 프로세스마다 달라지므로 고정 해시(crc32)를 쓴다
+    return zlib.crc32(gram.encode("utf-8")) % dim
+
+
+def featurize(text: str, dim: int = DEFAULT_DIM) -> np.ndarray:
+    """발화 → 글자 1~3-gram 해시 버킷 번호 (중복 제거)."""
+    s = " " + " ".join(text.split()) + " "
+    grams = {s[i:i + n] for n in (1, 2, 3) for i in range(len(s) - n + 1)}
+    grams.discard(" ")
+    return np.fromiter({_bucket(g, dim) for g in grams}, dtype=np.intp)
+
+
+class IntentHead:
+    """페이지 하나의 선형 분류기."""
+
+    def __init__(self, labels: list[str], weights: np.ndarray, bias: np.ndarray) -> None:
+        self.labels = labels
+        self.weights = weights.astype(np.float32)
+        self.bias = bias.astype(np.float32)
+
+    @property
+    def dim(self) -> int:
+        return self.weights.shape[0]
+
+    def predict(self, text: str) -> tuple[str, float]:
+        """(라벨, 확률)."""
+        idx = featurize(text, self.dim)
+        if not len(idx):
+            return NONE_LABEL, 1.0
+        logits = self.weights[idx].sum(axis=0) / np.sqrt(len(idx)) + self.bias
+        logits = np.exp(logits - logits.max())
+        best = int(logits.argmax())
+        return self.labels[best], float(logits[best] / logits.sum())
+
+
+class IntentClassifier:
+    """할인/결제 페이지 발화를 라벨로 분류하고, 확신할 때만 LLMResult를 만든다."""
+
+    def __init__(self, heads: dict[str, IntentHead], threshold: float = 0.9) -> None:
+        """
+        Args:
+            heads: 페이지 → 분류기
+            threshold: 이 확률 이상일 때만 분류 결과를 쓴다 (미만이면 LLM으로)
+        """
+        self.heads = heads
+        self.threshold = threshold
+
+    @classmethod
+    def load(cls, path: str | Path, threshold: float = 0.9) -> "IntentClassifier":
+        data = np.load(path, allow_pickle=False)
+        heads = {
+            page: IntentHead(
+                [str(x) for x in data[f"{page}_labels"]],
+                data[f"{page}_weights"],
+                data[f"{page}_bias"],
+            )
+            for page in INTENT_PAGES
+            if f"{page}_labels" in data
+        }
+        return cls(heads, threshold)
+
+    def save(self, path: str | Path) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        arrays = {}
+        for page, head in self.heads.items():
+            arrays[f"{page}_labels"] = np.array(head.labels)
+            # 가중치는 float16으로 저장해 파일을 줄인다 (불러올 때 float32)
+            arrays[f"{page}_weights"] = head.weights.astype(np.float16)
+            arrays[f"{page}_bias"] = head.bias
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def from_env(cls) -> "IntentClassifier | None":
+        """MALPYO_INTENT_MODEL(기본 data/intent.npz)이 있으면 불러온다 (빈 값이면 끔).
+
+        MALPYO_INTENT_THRESHOLD: 분류 결과를 쓸 최소 확률 (기본 0.9)
+        """
+        path = os.getenv("MALPYO_INTENT_MODEL", str(DEFAULT_MODEL_PATH))
+        if not path or not Path(path).is_file():
+            return None
+        return cls.load(path, float(os.getenv("MALPYO_INTENT_THRESHOLD", "0.9")))
+
+    def classify(self, text: str, page: str) -> tuple[str, float]:
+        head = self.heads.get(page)
+        if head is None:
+            return NONE_LABEL, 0.0
+        return head.predict(text)
+
+    def parse(self, user_text: str, page: str, context: dict | None = None) -> LLMResult | None:
+        """확신할 수 있으면 LLMEngine.parse()와 같은 형식의 결과를, 아니면 None을 반환한다."""
+        if page not in self.heads:
+            return None
+        text = user_text.strip()
+        if not text or any(w in text for w in _DEFER_WORDS):
+            return None
+        if page == "payment":
+            label, prob = self.classify(text, page)
+            if label == NONE_LABEL or prob < self.threshold:
+                return None
+            parsed = {"payment": label}
+        else:
+            parsed = self._parse_discount(text, int((context or {}).get("passengers") or 1))
+            if parsed is None:
+                return None
+        return LLMResult(raw_json=parsed, reply=render_reply(page, parsed))
+
+    def _parse_discount(self, text: str, pax: int) -> dict | None:
+        # 절마다 분류한다. 절 수가 인원과 맞거나, 한 절을 "모두"로 전원에 적용할 때만 처리
+        clauses = [c.strip() for c in CLAUSE_SPLIT_RE.split(text) if c.strip()] or [text]
+        labels = []
+        for clause in clauses:
+            label, prob = self.classify(clause, "discount")
+            if label == NONE_LABEL or prob < self.threshold:
+                return None
+            labels.append(label)
+        if len(labels) == pax:
+            return {"discounts": labels}
+        if len(labels) == 1 and (pax == 1 or any(w in text for w in _ALL_WORDS)):
+            return {"discounts": labels * pax}
+        return None
+
+
+# ─────────────────────────────────────────────────────────
+# 학습 데이터
+# ─────────────────────────────────────────────────────────
+# 라벨별 표현 (STT가 내놓는 띄어쓰기/축약 변형 포함)
+DISCOUNT_PHRASES: dict[str, list[str]] = {
+    "normal": ["일반", "일반인", "어른", "성인", "대인", "할인 없이", "할인 안 해도", "그냥 일반", "보통"],
+    "disabled": ["장애인", "장애인 할인", "장애", "복지카드", "장애인 복지", "장애 등급", "휠체어"],
+    "senior": ["경로", "경로우대", "어르신", "노인", "할머니", "할아버지", "65세 이상", "만 65세", "노약자", "시니어"],
+    "child": ["어린이", "아이", "애기", "아기", "초등학생", "꼬마", "유아", "어린애", "우리 애"],
+    "youth": ["청소년", "중학생", "고등학생", "학생", "고딩", "중딩", "십대", "학생 할인"],
+}
+PAYMENT_PHRASES: dict[str, list[str]] = {
+    "card": ["카드", "신용카드", "체크카드", "신용", "체크", "카드 결제", "교통카드", "카드 긁을게요"],
+    "cash": ["현금", "현찰", "돈", "지폐", "만원짜리", "잔돈", "동전", "캐시"],
+    "mobile": ["모바일페이", "모바일", "삼성페이", "카카오페이", "네이버페이", "애플페이", "휴대폰", "핸드폰", "폰", "페이"],
+    "transfer": ["계좌이체", "이체", "계좌", "송금", "무통장", "은행 이체", "계좌 송금"],
+}
+# 어느 페이지에서도 라벨이 아닌 발화 (LLM에 맡겨야 하는 것)
+NONE_PHRASES = [
+    "잘 모르겠어요", "뭐라고요", "다시 말해 주세요", "처음으로", "이전 화면", "뒤로 가 주세요",
+    "네", "아니요", "얼마예요", "화장실 어디예요", "도와주세요", "직원 불러 주세요",
+    "서울에서 부산까지", "대전 가는 거", "두 시 차", "세 명이요", "취소할게요", "잠깐만요",
+    "음", "어", "이거 뭐예요", "시간 바꿀래요", "좌석 어디예요", "영수증 주세요",
+    "할인 뭐 있어요", "결제 어떻게 해요", "제일 싼 걸로", "아무거나", "나중에 할게요",
+]
+
+# 할인 표현을 품고 있지만 할인 유형이 아닌 말 (대학생은 청소년이 아니고, 보호자는 장애인이 아니다).
+# 글자 n-gram이 겹쳐 확신하기 쉬우므로 "해당 없음"으로 학습해 LLM에 맡긴다
+DISCOUNT_LOOKALIKES = [
+    "대학생", "대학교 학생", "일반 학생", "대학원생", "아이 엄마", "아이 아빠", "애기 엄마",
+    "어린이집 선생님", "학교 선생님", "장애인 보호자", "장애인 도우미", "노인 보호자",
+    "학부모", "어른 보호자", "군인", "임산부", "외국인",
+]
+
+_DISCOUNT_CARRIERS = [
+    "{x}", "{x}요", "{x}이요", "{x}로", "{ro} 해 주세요", "{ro} 할게요", "{x} 할인이요",
+    "{x} 할인 적용해 주세요", "{x} 할인 받을게요", "저는 {x}예요", "{x}입니다", "{x} 맞아요",
+    "음 {x}", "{x} 한 명", "{x} 한 장", "{x} 요금으로요", "{ro} 해줘", "{x} 표요",
+    "모두 {x}요", "전부 {ro} 해 주세요", "다 {x}요", "둘 다 {x}",
+]
+_PAYMENT_CARRIERS = [
+    "{x}", "{x}요", "{x}이요", "{ro}", "{ro} 할게요", "{ro} 결제할게요", "{ro} 낼게요",
+    "{ro} 해 주세요", "{x} 결제요", "{ro} 계산할게요", "음 {x}", "{x} 쓸게요",
+    "{ro} 해줘", "결제는 {ro}", "{ro} 부탁해요",
+]
+_NONE_CARRIERS = ["{x}", "{x}요", "음 {x}", "저기 {x}"]
+
+
+def _noisy(text: str, rng: random.Random) -> str:
+    """STT 변형 흉내: 띄어쓰기 제거/추가."""
+    roll = rng.random()
+    if roll < 0.2:
+        return text.replace(" ", "")
+    if roll < 0.3 and len(text) > 2:
+        i = rng.randrange(1, len(text))
+        return text[:i] + " " + text[i:]
+    return text
+
+
+def synthesize_examples(seed: int = 0) -> dict[str, list[tuple[str, str, str]]]:
+    """페이지 → [(발화, 라벨, 그룹)] 합성 학습 데이터.
+
+    그룹은 발화를 만든 문형(carrier)이다. 검증은 그룹 단위로 떼어 내므로,
+    학습에 없던 문형을 얼마나 맞히는지를 잰다.
+    """
+    rng = random.Random(seed)
+
+    def expand(phrases: dict[str, list[str]], carriers: list[str]) -> list[tuple[str, str, str]]:
+        out = []
+        for label, words in phrases.items():
+            for word in words:
+                for carrier in carriers:
+                    text = carrier.format(x=word, ro=with_ro(word))
+                    out.append((_noisy(text, rng), label, carrier))
+        return out
+
+    none = [(_noisy(c.format(x=p), rng), NONE_LABEL, p) for p in NONE_PHRASES for c in _NONE_CARRIERS]
+    # 다른 페이지의 답은 이 페이지에선 "해당 없음" (LLM이 판단)
+    payment_words = [w for ws in PAYMENT_PHRASES.values() for w in ws]
+    discount_words = [w for ws in DISCOUNT_PHRASES.values() for w in ws]
+    discount_none = none + [
+        (f"{w}{rng.choice(['', '요', '로 할게요'])}", NONE_LABEL, w) for w in payment_words
+    ]
+    payment_none = none + [
+        (f"{w}{rng.choice(['', '요', ' 할인이요'])}", NONE_LABEL, w) for w in discount_words
+    ]
+    return {
+        "discount": (
+            expand(DISCOUNT_PHRASES, _DISCOUNT_CARRIERS)
+            + expand({NONE_LABEL: DISCOUNT_LOOKALIKES}, _DISCOUNT_CARRIERS)
+            + discount_none
+        ),
+        "payment": expand(PAYMENT_PHRASES, _PAYMENT_CARRIERS) + payment_none,
+    }
+
+
+# 학습 문형 밖의 발화와 기대 결과 (None = LLM에 맡겨야 함). 학습 때마다 함께 확인한다
+PROBES: dict[str, list[tuple[str, str | None]]] = {
+    "discount": [
+        ("학생인데 대학생이에요", None), ("경로 할인 돼요?", None), ("할인 뭐가 있어요", None),
+        ("어른 아니고 청소년", None), ("카드요", None), ("저희 할머니세요", "senior"),
+        ("애기 표 한 장 주세요", "child"), ("그냥 성인 요금", "normal"), ("장애인 할인 부탁드려요", "disabled"),
+        ("대학생", None), ("일반 학생", None), ("아이 엄마요", None), ("어린이집 선생님", None),
+        ("장애인 보호자", None), ("대학원생이요", None), ("아이 아빠예요", None), ("유치원 선생님", None),
+        ("초등학생 한 명이요", "child"), ("고등학생이요", "youth"),
+    ],
+    "payment": [
+        ("현금 영수증 되나요", None), ("카드 되죠?", None), ("카드 말고 현금", None),
+        ("얼마예요", None), ("경로요", None), ("삼성페이로 찍을게요", "mobile"),
+        ("체크카드로 결제", "card"), ("현금으로 드릴게요", "cash"), ("계좌로 보낼게요", "transfer"),
+    ],
+}
+
+
+def captured_examples(directory: str | Path) -> dict[str, list[tuple[str, str, str]]]:
+    """녹화된 턴 중 LLM이 처리한 할인/결제 턴을 (발화, 라벨)로 바꾼다.
+
+    할인은 전원이 같은 할인일 때만 쓴다 (절 단위 라벨을 알 수 없으므로).
+    """
+    from traffic import read_archive
+
+    examples: dict[str, list[tuple[str, str, str]]] = {page: [] for page in INTENT_PAGES}
+    for turn in read_archive(directory):
+        meta = turn.meta
+        text, page, parsed = meta.get("recognized_text", ""), meta.get("page"), meta.get("parsed") or {}
+        if page not in examples or not text or not meta.get("success"):
+            continue
+        # 분류기/규칙 파서가 처리한 턴은 라벨로 쓰지 않는다 (LLM 판단만)
+        if meta.get("degraded") or meta.get("parser", "llm") != "llm":
+            continue
+        if page == "payment":
+            label = parsed.get("payment") if parsed.get("payment") in PAYMENT_NAMES else NONE_LABEL
+        else:
+            discounts = parsed.get("discounts") or []
+            if len(set(discounts)) > 1:
+                continue
+            label = discounts[0] if discounts and discounts[0] in DISCOUNT_NAMES else NONE_LABEL
+        examples[page].append((text, label, text))
+    return examples
+
+
+def tsv_examples(path: str | Path) -> dict[str, list[tuple[str, str, str]]]:
+    examples: dict[str, list[tuple[str, str, str]]] = {page: [] for page in INTENT_PAGES}
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        parts = line.split("\t")
+        if len(parts) == 3 and parts[0] in examples:
+            examples[parts[0]].append((parts[2], parts[1], parts[2]))
+    return examples
+
+
+# ─────────────────────────────────────────────────────────
+# 학습 / 평가
+# ─────────────────────────────────────────────────────────
+def _design(texts: list[str], dim: int) -> np.ndarray:
+    x = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        idx = featurize(text, dim)
+        if len(idx):
+            x[row, idx] = 1.0 / np.sqrt(len(idx))
+    return x
+
+
+def train_head(
+    examples: list[tuple[str, str, str]],
+    labels: list[str],
+    dim: int = DEFAULT_DIM,
+    epochs: int = 300,
+    lr: float = 0.5,
+    l2: float = 1e-5,
+) -> IntentHead:
+    """소프트맥스 회귀 (전체 배치 경사 하강, Adam)."""
+    x = _design([t for t, _, _ in examples], dim)
+    y = np.array([labels.index(label) for _, label, _ in examples])
+    onehot = np.eye(len(labels), dtype=np.float32)[y]
+    w = np.zeros((dim, len(labels)), dtype=np.float32)
+    b = np.zeros(len(labels), dtype=np.float32)
+    moments = [np.zeros_like(w), np.zeros_like(w), np.zeros_like(b), np.zeros_like(b)]
+    for step in range(1, epochs + 1):
+        logits = x @ w + b
+        logits -= logits.max(axis=1, keepdims=True)
+        prob = np.exp(logits)
+        prob /= prob.sum(axis=1, keepdims=True)
+        err = (prob - onehot) / len(x)
+        grads = (x.T @ err + l2 * w, err.sum(axis=0))
+        for i, (param, grad) in enumerate(zip((w, b), grads)):
+            m, v = moments[2 * i], moments[2 * i + 1]
+            m *= 0.9
+            m += 0.1 * grad
+            v *= 0.999
+            v += 0.001 * grad * grad
+            param -= lr * (m / (1 - 0.9 ** step)) / (np.sqrt(v / (1 - 0.999 ** step)) + 1e-8)
+    return IntentHead(labels, w, b)
+
+
+def evaluate(head: IntentHead, examples: list[tuple[str, str, str]], threshold: float) -> dict:
+    """정확도, 문턱 적용 시 처리 비율(coverage: "none"이 아닌 발화 중 LLM 없이 처리한 비율)과
+    처리한 것의 정확도, 추론 지연(µs)."""
+    if not examples:
+        return {}
+    labeled = sum(1 for _, label, _ in examples if label != NONE_LABEL)
+    correct = covered = covered_correct = 0
+    start = time.perf_counter()
+    for text, label, _ in examples:
+        pred, prob = head.predict(text)
+        correct += pred == label
+        if pred != NONE_LABEL and prob >= threshold:
+            covered += 1
+            covered_correct += pred == label
+    elapsed = time.perf_counter() - start
+    return {
+        "n": len(examples),
+        "accuracy": round(correct / len(examples), 4),
+        "coverage": round(covered_correct / labeled, 4) if labeled else None,
+        "precision_at_threshold": round(covered_correct / covered, 4) if covered else None,
+        "latency_us": round(elapsed / len(examples) * 1e6, 1),
+    }
+
+
+def _rule_accuracy(page: str, examples: list[tuple[str, str, str]]) -> float:
+    """같은 검증 데이터에서 규칙 파서의 정확도 (비교용)."""
+    parser = RuleParser()
+    correct = 0
+    for text, label, _ in examples:
+        parsed = parser.parse(text, page, {"passengers": 1}).raw_json
+        pred = parsed.get("payment") if page == "payment" else (parsed.get("discounts") or [None])[0]
+        correct += (pred or NONE_LABEL) == label
+    return round(correct / len(examples), 4)
+
+
+def _probe_accuracy(model: IntentClassifier, page: str) -> float:
+    """PROBES 중 기대대로 처리된 (맞는 라벨 또는 LLM으로 넘김) 비율."""
+    correct = 0
+    for text, expected in PROBES[page]:
+        parsed = model.parse(text, page, {"passengers": 1})
+        if parsed is not None:
+            parsed = parsed.raw_json
+            parsed = parsed.get("payment") if page == "payment" else parsed["discounts"][0]
+        correct += parsed == expected
+    return round(correct / len(PROBES[page]), 4)
+
+
+def _split_by_group(
+    rows: list[tuple[str, str, str]], holdout: float, rng: random.Random
+) -> tuple[list, list]:
+    """그룹(문형) 단위로 약 holdout 비율의 행을 검증용으로 떼어 낸다."""
+    groups = sorted({group for _, _, group in rows})
+    rng.shuffle(groups)
+    held: set[str] = set()
+    size = 0
+    counts = Counter(group for _, _, group in rows)
+    for group in groups:
+        if size >= len(rows) * holdout:
+            break
+        held.add(group)
+        size += counts[group]
+    return (
+        [r for r in rows if r[2] not in held],
+        [r for r in rows if r[2] in held],
+    )
+
+
+def _merge(
+    *sources: dict[str, list[tuple[str, str, str]]]
+) -> dict[str, list[tuple[str, str, str]]]:
+    merged: dict[str, list[tuple[str, str, str]]] = {page: [] for page in INTENT_PAGES}
+    for source in sources:
+        for page, rows in source.items():
+            merged[page].extend(rows)
+    return merged
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="말표 할인/결제 의도 분류기")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("train", help="합성(+녹화/TSV) 발화로 학습")
+    p.add_argument("--out", default=str(DEFAULT_MODEL_PATH))
+    p.add_argument("--capture", help="traffic.py 녹화 디렉터리")
+    p.add_argument("--tsv", help="page<TAB>label<TAB>발화 파일")
+    p.add_argument("--dim", type=int, default=DEFAULT_DIM)
+    p.add_argument("--threshold", type=float, default=0.9)
+    p.add_argument("--holdout", type=float, default=0.2)
+    p = sub.add_parser("eval", help="라벨이 있는 발화로 평가")
+    p.add_argument("model")
+    p.add_argument("--tsv", required=True)
+    p.add_argument("--threshold", type=float, default=0.9)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.command == "eval":
+        model = IntentClassifier.load(args.model, args.threshold)
+        for page, rows in tsv_examples(args.tsv).items():
+            if page in model.heads and rows:
+                print(page, evaluate(model.heads[page], rows, args.threshold))
+        print("probes", {page: _probe_accuracy(model, page) for page in model.heads})
+        return
+
+    sources = [synthesize_examples()]
+    if args.capture:
+        sources.append(captured_examples(args.capture))
+    if args.tsv:
+        sources.append(tsv_examples(args.tsv))
+    data = _merge(*sources)
+
+    rng = random.Random(1)
+    heads = {}
+    for page, label_names in (("discount", DISCOUNT_NAMES), ("payment", PAYMENT_NAMES)):
+        rows = list(dict.fromkeys(data[page]))
+        # 같은 문형의 변형이 학습/검증에 나뉘면 점수가 부풀려지므로 문형 단위로 나눈다
+        train, held = _split_by_group(rows, args.holdout, rng)
+        labels = list(label_names) + [NONE_LABEL]
+        head = train_head(train, labels, dim=args.dim)
+        print(page, {
+            "train": len(train),
+            **evaluate(head, held, args.threshold),
+            "rule_parser_accuracy": _rule_accuracy(page, held),
+        })
+        # 검증 뒤 전체 데이터로 다시 학습해 저장한다
+        heads[page] = train_head(rows, labels, dim=args.dim)
+    model = IntentClassifier(heads, args.threshold)
+    print("probes", {page: _probe_accuracy(model, page) for page in INTENT_PAGES})
+    model.save(args.out)
+    print(f"저장: {args.out} ({Path(args.out).stat().st_size // 1024} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+inventory.py - 시간표 + 좌석 재고 서비스
+
+(출발지, 도착지, 날짜, 출발시각) 단위로 운행편을 관리한다.
+  - 구간·날짜별 정렬된 출발시각 인덱스로 "다음 N개 출발편"을 이분 탐색으로 조회
+  - 좌석 수(정원/판매/보류)는 운행편 슬롯 번호로 접근하는 배열에 보관
+  - hold → confirm / release 는 하나의 락 안에서 원자적으로 처리되어
+    여러 키오스크 세션이 동시에 예매해도 초과 판매가 발생하지 않는다
+  - hold는 기한(hold_ttl)이 지나면 자동으로 풀린다
+
+운행편은 (출발지, 도착지, 날짜) 구간이 처음 조회될 때 그 구간의 기본 시간표
+(schedule)로만 만들어진다 (역이 늘어도 조회 비용은 구간 하나의 출발편 수에 비례).
+날짜가 바뀌면 지난 날짜의 운행편과 보류는 지우고 슬롯 번호를 재사용한다.
+"""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import logging
+import threading
+import time
+import uuid
+from array import array
+from dataclasses import dataclass
+from datetime import date as _date
+from typing import Callable, Sequence
+
+logger = logging.getLogger("malpyo.inventory")
+
+DEFAULT_SEATS = 45
+
+
+@dataclass(frozen=True)
+class Hold:
+    hold_id: str
+    slot: int
+    count: int
+    owner: str
+    expires_at: float
+
+
+class SeatInventory:
+    """시간표 인덱스 + 배열 기반 좌석 재고 (스레드 안전)."""
+
+    def __init__(
+        self,
+        schedule: dict[tuple[str, str], Sequence[str]] | None = None,
+        seats: int = DEFAULT_SEATS,
+        hold_ttl: float = 300.0,
+        today: Callable[[], str] | None = None,
+    ) -> None:
+        """
+        Args:
+            schedule: (출발지, 도착지) → 출발시각("HH:MM") 목록. 날짜마다 반복된다.
+            seats: 운행편당 기본 좌석 수
+            hold_ttl: 결제 전 좌석 보류 유지 시간(초)
+            today: 오늘 날짜("YYYY-MM-DD")를 돌려주는 함수. 이보다 앞선 날짜의 운행편은 지운다
+        """
+        # 같은 출발시각 목록은 구간끼리 공유한다 (전 구간 같은 시간표면 목록 하나)
+        shared: dict[tuple[str, ...], tuple[str, ...]] = {}
+        self.schedule = {
+            k: shared.setdefault(tuple(sorted(v)), tuple(sorted(v)))
+            for k, v in (schedule or {}).items()
+        }
+        self.seats = seats
+        self.hold_ttl = hold_ttl
+        self._today = today or (lambda: _date.today().isoformat())
+        self._current_day = ""
+
+        # 운행편 키 → 슬롯 번호
+        self._slots: dict[tuple[str, str, str, str], int] = {}
+        # (출발지, 도착지, 날짜) → (정렬된 출발시각, 같은 순서의 슬롯 번호)
+        self._index: dict[tuple[str, str, str], tuple[list[str], list[int]]] = {}
+        # 기본 시간표로 운행편을 만든 (출발지, 도착지, 날짜)
+        self._materialized: set[tuple[str, str, str]] = set()
+        # 지난 날짜에서 회수한 슬롯 번호
+        self._free: list[int] = []
+
+        self._capacity = array("i")
+        self._sold = array("i")
+        self._held = array("i")
+
+        self._holds: dict[str, Hold] = {}
+        self._expiry_heap: list[tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def daily(
+        cls,
+        cities: list[str],
+        times: list[str],
+        seats: int = DEFAULT_SEATS,
+        hold_ttl: float = 300.0,
+        today: Callable[[], str] | None = None,
+    ) -> "SeatInventory":
+        """모든 도시 쌍에 같은 출발시각을 두는 기본 시간표."""
+        times = tuple(times)
+        schedule = {
+            (a, b): times for a in cities for b in cities if a != b
+        }
+        return cls(schedule, seats=seats, hold_ttl=hold_ttl, today=today)
+
+    # ─────────────────────────────────────────────────────────
+    # 시간표
+    # ─────────────────────────────────────────────────────────
+    def add_departure(
+        self, origin: str, destination: str, date: str, departure: str, seats: int | None = None
+    ) -> int:
+        """운행편을 추가하고 슬롯 번호를 반환한다 (이미 있으면 기존 슬롯)."""
+        with self._lock:
+            self._expire_locked()
+            return self._add_locked(origin, destination, date, departure, seats)
+
+    def time_vocabulary(self) -> list[str]:
+        """시간표에 등장하는 모든 출발시각 (LLM/규칙 파서 어휘용)."""
+        return sorted({t for times in self.schedule.values() for t in times})
+
+    def departures(self, origin: str, destination: str, date: str) -> list[tuple[str, int]]:
+        """해당 구간·날짜의 (출발시각, 잔여석) 목록."""
+        return self.next_departures(origin, destination, date, after="", n=None)
+
+    def next_departures(
+        self,
+        origin: str,
+        destination: str,
+        date: str,
+        after: str = "",
+        n: int | None = 5,
+    ) -> list[tuple[str, int]]:
+        """after 시각 이후(포함) 출발하는 최대 n개 운행편의 (출발시각, 잔여석)."""
+        with self._lock:
+            self._expire_locked()
+            self._materialize_locked(origin, destination, date)
+            entry = self._index.get((origin, destination, date))
+            if entry is None:
+                return []
+            times, slots = entry
+            start = bisect.bisect_left(times, after)
+            end = len(times) if n is None else min(len(times), start + n)
+            return [(times[k], self._available_locked(slots[k])) for k in range(start, end)]
+
+    def available(self, origin: str, destination: str, date: str, departure: str) -> int:
+        with self._lock:
+            self._expire_locked()
+            self._materialize_locked(origin, destination, date)
+            slot = self._slots.get((origin, destination, date, departure))
+            return 0 if slot is None else self._available_locked(slot)
+
+    # ─────────────────────────────────────────────────────────
+    # 예약
+    # ─────────────────────────────────────────────────────────
+    def hold(
+        self,
+        origin: str,
+        destination: str,
+        date: str,
+        departure: str,
+        count: int,
+        owner: str = "",
+    ) -> str | None:
+        """좌석을 보류한다. 잔여석이 부족하면 None."""
+        with self._lock:
+            self._expire_locked()
+            self._materialize_locked(origin, destination, date)
+            slot = self._slots.get((origin, destination, date, departure))
+            if slot is None or count <= 0 or self._available_locked(slot) < count:
+                return None
+            hold = Hold(
+                hold_id=uuid.uuid4().hex,
+                slot=slot,
+                count=count,
+                owner=owner,
+                expires_at=time.monotonic() + self.hold_ttl,
+            )
+            self._held[slot] += count
+            self._holds[hold.hold_id] = hold
+            heapq.heappush(self._expiry_heap, (hold.expires_at, hold.hold_id))
+            return hold.hold_id
+
+    def confirm(self, hold_id: str | None) -> bool:
+        """보류 좌석을 판매 확정한다. 기한이 지났거나 없는 hold면 False."""
+        if not hold_id:
+            return False
+        with self._lock:
+            self._expire_locked()
+            hold = self._holds.pop(hold_id, None)
+            if hold is None:
+                return False
+            self._held[hold.slot] -= hold.count
+            self._sold[hold.slot] += hold.count
+            return True
+
+    def release(self, hold_id: str | None) -> None:
+        """보류 좌석을 돌려놓는다."""
+        if not hold_id:
+            return
+        with self._lock:
+            hold = self._holds.pop(hold_id, None)
+            if hold is not None:
+                self._held[hold.slot] -= hold.count
+
+    # ─────────────────────────────────────────────────────────
+    # 내부 (호출자가 self._lock을 잡고 있어야 한다)
+    # ─────────────────────────────────────────────────────────
+    def _available_locked(self, slot: int) -> int:
+        return self._capacity[slot] - self._sold[slot] - self._held[slot]
+
+    def _add_locked(
+        self, origin: str, destination: str, date: str, departure: str, seats: int | None
+    ) -> int:
+        key = (origin, destination, date, departure)
+        slot = self._slots.get(key)
+        if slot is not None:
+            return slot
+        self._slots[key] = slot = self._new_slot_locked(self.seats if seats is None else seats)
+
+        times, slots = self._index.setdefault((origin, destination, date), ([], []))
+        pos = bisect.bisect_left(times, departure)
+        times.insert(pos, departure)
+        slots.insert(pos, slot)
+        return slot
+
+    def _new_slot_locked(self, seats: int) -> int:
+        if self._free:
+            slot = self._free.pop()
+            self._capacity[slot] = seats
+            self._sold[slot] = 0
+            self._held[slot] = 0
+            return slot
+        self._capacity.append(seats)
+        self._sold.append(0)
+        self._held.append(0)
+        return len(self._capacity) - 1
+
+    def _materialize_locked(self, origin: str, destination: str, date: str) -> None:
+        key = (origin, destination, date)
+        if key in self._materialized or date < self._current_day:
+            return
+        self._materialized.add(key)
+        for departure in self.schedule.get((origin, destination), ()):
+            self._add_locked(origin, destination, date, departure, None)
+
+    def _roll_day_locked(self) -> None:
+        """날짜가 바뀌었으면 지난 날짜의 운행편과 그 보류를 지우고 슬롯을 회수한다."""
+        today = self._today()
+        if today == self._current_day:
+            return
+        self._current_day = today
+        stale = [key for key in self._index if key[2] < today]
+        freed: set[int] = set()
+        for origin, destination, date in stale:
+            times, slots = self._index.pop((origin, destination, date))
+            self._materialized.discard((origin, destination, date))
+            for departure, slot in zip(times, slots):
+                del self._slots[(origin, destination, date, departure)]
+                freed.add(slot)
+        if not freed:
+            return
+        for hold_id in [h.hold_id for h in self._holds.values() if h.slot in freed]:
+            del self._holds[hold_id]
+        self._free.extend(freed)
+        logger.info("지난 운행편 정리: %d개 구간, %d개 운행편", len(stale), len(freed))
+
+    def _expire_locked(self) -> None:
+        self._roll_day_locked()
+        now = time.monotonic()
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, hold_id = heapq.heappop(self._expiry_heap)
+            hold = self._holds.pop(hold_id, None)
+            if hold is not None:
+                self._held[hold.slot] -= hold.count
+                logger.info("좌석 보류 만료: %s (%d석)", hold_id, hold.count)
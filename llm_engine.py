@@ -10,24 +10,38 @@ from __future__ import annotations
 
 import json
 import logging
+import time
 from dataclasses import dataclass, field
 
 import requests
 
+from cancellation import CancelToken
+from shared_cache import SharedCache, cache_key
+from station_index import StationIndex
+
 logger = logging.getLogger("malpyo.llm")
 
-# Ollama가 반환해야 할 페이지별 JSON 스키마 예시를 프롬프트에 포함
-SYSTEM_PROMPTS: dict[str, str] = {
-    "booking": (
+DEFAULT_CITIES = ["서울", "대전", "대구", "부산", "광주", "전주", "강릉", "제주"]
+DEFAULT_TIME_SLOTS = ["08:00", "10:00", "12:00", "14:00", "16:00", "18:00", "20:00"]
+
+
+def build_booking_prompt(cities: list[str], time_slots: list[str]) -> str:
+    """예매 페이지 프롬프트. 도시/시간 어휘는 시간표에서 받아 채운다."""
+    return (
         "너는 교통 예매 키오스크의 음성 파싱 엔진이야.\n"
         "사용자가 말한 내용에서 출발지, 도착지, 출발시간, 인원수를 추출해.\n"
-        "가능한 도시: 서울, 대전, 대구, 부산, 광주, 전주, 강릉, 제주\n"
-        "가능한 시간: 08:00, 10:00, 12:00, 14:00, 16:00, 18:00, 20:00\n"
+        f"가능한 도시: {', '.join(cities) or '없음 (도시는 null로 채워)'}\n"
+        f"가능한 시간: {', '.join(time_slots)}\n"
         "반드시 아래 JSON 형식으로만 응답해. 다른 텍스트 금지.\n"
         '{"departure":"서울","arrival":"전주","time":"14:00","passengers":2,'
         '"reply":"서울에서 전주, 오후 2시, 2명으로 예매할게요."}\n'
         "추출할 수 없는 필드는 null로 채워."
-    ),
+    )
+
+
+# Ollama가 반환해야 할 페이지별 JSON 스키마 예시를 프롬프트에 포함
+SYSTEM_PROMPTS: dict[str, str] = {
+    "booking": build_booking_prompt(DEFAULT_CITIES, DEFAULT_TIME_SLOTS),
     "discount": (
         "너는 교통 예매 키오스크의 음성 파싱 엔진이야.\n"
         "사용자가 말한 내용에서 탑승객별 할인 유형을 추출해.\n"
@@ -55,6 +69,7 @@ class LLMResult:
     reply: str = ""
     success: bool = True
     error: str = ""
+    cancelled: bool = False
 
 
 class LLMEngine:
@@ -65,30 +80,74 @@ class LLMEngine:
         model: str = "llama3:8b",
         base_url: str = "http://localhost:11434",
         timeout: int = 30,
+        cities: list[str] | None = None,
+        time_slots: list[str] | None = None,
+        station_index: StationIndex | None = None,
+        max_candidates: int = 6,
+        cache: SharedCache | None = None,
     ) -> None:
+        """
+        Args:
+            cities: 예매 프롬프트의 도시 어휘. None이면 DEFAULT_CITIES
+            time_slots: 예매 프롬프트의 시간 어휘 (보통 시간표의 출발시각).
+                None이면 DEFAULT_TIME_SLOTS
+            station_index: 주어지면 예매 프롬프트에 전체 도시 대신 발화에서
+                검색된 후보 역(최대 max_candidates개)만 넣는다
+            cache: 프로세스 공용 캐시. 주어지면 같은 프롬프트/발화의 파싱 결과를
+                다른 프로세스와 함께 재사용한다
+        """
         self.model = model
         self.base_url = base_url
         self.timeout = timeout
+        self.cities = list(cities or DEFAULT_CITIES)
+        self.time_slots = list(time_slots or DEFAULT_TIME_SLOTS)
+        self.station_index = station_index
+        self.max_candidates = max_candidates
+        self.cache = cache
+        self.prompts = dict(SYSTEM_PROMPTS)
+        if cities is not None or time_slots is not None:
+            self.prompts["booking"] = build_booking_prompt(self.cities, self.time_slots)
+        # 커넥션 재사용 (턴마다 TCP 연결을 새로 맺지 않도록)
+        self._session = requests.Session()
 
-    def health_check(self) -> bool:
+    def health_check(self, timeout: float = 5) -> bool:
         """Ollama 서버 연결 상태를 확인한다."""
         try:
-            resp = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            resp = self._session.get(f"{self.base_url}/api/tags", timeout=timeout)
             return resp.status_code == 200
         except Exception:
             return False
 
-    def parse(self, user_text: str, page: str, context: dict | None = None) -> LLMResult:
+    def probe(self) -> bool:
+        """서킷 브레이커 HALF_OPEN용 저비용 프로브 (짧은 타임아웃)."""
+        return self.health_check(timeout=1)
+
+    def parse(
+        self,
+        user_text: str,
+        page: str,
+        context: dict | None = None,
+        timeout: float | None = None,
+        cancel: CancelToken | None = None,
+    ) -> LLMResult:
         """사용자 발화를 페이지에 맞는 구조화된 JSON으로 변환한다.
 
         Args:
             user_text: STT가 인식한 텍스트
             page: 현재 페이지 ("booking", "discount", "payment")
             context: 추가 컨텍스트 (예: 현재 인원수 등)
+            timeout: 이번 호출의 시간 예산(초). None이면 self.timeout
+            cancel: 취소 토큰. 주어지면 스트리밍으로 요청하여 취소 즉시
+                연결을 끊는다 (Ollama도 연결이 끊기면 생성을 중단한다).
         """
-        system_prompt = SYSTEM_PROMPTS.get(page)
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        system_prompt = self.prompts.get(page)
         if not system_prompt:
             return LLMResult(success=False, error=f"알 수 없는 페이지: {page}")
+        if page == "booking" and self.station_index is not None:
+            system_prompt = build_booking_prompt(
+                self.station_candidates(user_text, context), self.time_slots
+            )
 
         if context:
             system_prompt += f"\n현재 상태: {json.dumps(context, ensure_ascii=False)}"
@@ -98,31 +157,100 @@ class LLMEngine:
             {"role": "user", "content": user_text},
         ]
 
+        if cancel is not None and cancel.cancelled:
+            return LLMResult(success=False, error="취소됨", cancelled=True)
+
+        key = cache_key("llm", self.model, messages) if self.cache is not None else None
+        if key is not None:
+            cached = self.cache.get_json(key)
+            if cached is not None:
+                return LLMResult(raw_json=cached["parsed"], reply=cached["reply"])
+
         try:
-            resp = requests.post(
-                f"{self.base_url}/api/chat",
-                json={
-                    "model": self.model,
-                    "messages": messages,
-                    "stream": False,
-                    "format": "json",
-                },
-                timeout=self.timeout,
-            )
-            resp.raise_for_status()
+            if cancel is None:
+                content = self._chat(messages, timeout)
+            else:
+                content = self._chat_cancellable(messages, timeout, cancel)
+                if content is None:
+                    return LLMResult(success=False, error="취소됨", cancelled=True)
 
-            content = resp.json()["message"]["content"].strip()
             parsed = json.loads(content)
             reply = parsed.pop("reply", "")
 
+            if key is not None:
+                self.cache.put_json(key, {"parsed": parsed, "reply": reply})
             return LLMResult(raw_json=parsed, reply=reply)
 
         except json.JSONDecodeError as e:
             logger.error("LLM JSON 파싱 실패: %s", e)
             return LLMResult(success=False, error=f"JSON 파싱 실패: {e}")
         except requests.RequestException as e:
+            if cancel is not None and cancel.cancelled:
+                return LLMResult(success=False, error="취소됨", cancelled=True)
             logger.error("Ollama 요청 실패: %s", e)
             return LLMResult(success=False, error=f"Ollama 연결 실패: {e}")
         except Exception as e:
+            if cancel is not None and cancel.cancelled:
+                return LLMResult(success=False, error="취소됨", cancelled=True)
             logger.error("LLM 처리 오류: %s", e)
             return LLMResult(success=False, error=str(e))
+
+    def station_candidates(self, user_text: str, context: dict | None = None) -> list[str]:
+        """발화에서 검색된 후보 역 + 이미 선택된 출발/도착지."""
+        candidates = self.station_index.candidates(user_text, self.max_candidates)
+        for key in ("departure", "arrival"):
+            selected = (context or {}).get(key)
+            if selected in self.station_index.aliases and selected not in candidates:
+                candidates.append(selected)
+        return candidates
+
+    def _chat(self, messages: list[dict], timeout: float) -> str:
+        resp = self._session.post(
+            f"{self.base_url}/api/chat",
+            json={
+                "model": self.model,
+                "messages": messages,
+                "stream": False,
+                "format": "json",
+            },
+            timeout=(min(3.0, timeout), timeout),
+        )
+        resp.raise_for_status()
+        return resp.json()["message"]["content"].strip()
+
+    def _chat_cancellable(
+        self, messages: list[dict], timeout: float, cancel: CancelToken
+    ) -> str | None:
+        """스트리밍 응답을 모으다가 취소되면 연결을 끊고 None을 반환한다."""
+        deadline = time.monotonic() + timeout
+        resp = self._session.post(
+            f"{self.base_url}/api/chat",
+            json={
+                "model": self.model,
+                "messages": messages,
+                "stream": True,
+                "format": "json",
+            },
+            timeout=(min(3.0, timeout), timeout),
+            stream=True,
+        )
+        # 다른 스레드에서 취소되면 소켓을 닫아 블로킹 읽기를 깨운다
+        cancel.add_callback(resp.close)
+        try:
+            resp.raise_for_status()
+            chunks: list[str] = []
+            for line in resp.iter_lines():
+                if cancel.cancelled:
+                    return None
+                if time.monotonic() > deadline:
+                    raise requests.Timeout(f"LLM 응답 시간 초과 ({timeout:.1f}s)")
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                chunks.append(chunk.get("message", {}).get("content", ""))
+                if chunk.get("done"):
+                    break
+            return None if cancel.cancelled else "".join(chunks).strip()
+        finally:
+            cancel.remove_callback(resp.close)
+            resp.close()
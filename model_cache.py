@@ -0,0 +1,135 @@
+"""
+model_cache.py - STT 모델 로컬 캐시 준비 + 콜드 스타트 측정
+
+키오스크는 부팅 때마다 Hugging Face Hub를 조회하거나 모델을 변환하지 않도록
+CTranslate2 형식으로 변환된 모델을 로컬 디렉터리에 미리 준비해 두고,
+MALPYO_STT_MODEL_DIR로 그 디렉터리를 지정한다 (STTEngine은 local_files_only로 로딩).
+
+사용법:
+    # 배포된 faster-whisper 변환본 내려받기
+    python model_cache.py prepare large-v3-turbo models/whisper-turbo
+
+    # 원본 Transformers 모델을 직접 변환 (ctranslate2, transformers 필요)
+    python model_cache.py convert openai/whisper-large-v3-turbo models/whisper-turbo --quantization int8_float16
+
+    # import / 모델 로딩 / 첫 추론 시간 측정
+    python model_cache.py bench models/whisper-turbo --device cuda --compute-type float16
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+logger = logging.getLogger("malpyo.model_cache")
+
+MANIFEST_NAME = "malpyo_model.json"
+# faster-whisper가 토크나이저/특징 추출기 설정을 읽는 파일
+_COPY_FILES = ["tokenizer.json", "preprocessor_config.json"]
+
+
+def _write_manifest(model_dir: Path, source: str, **extra) -> dict:
+    files = {
+        p.name: p.stat().st_size
+        for p in sorted(model_dir.iterdir())
+        if p.is_file() and p.name != MANIFEST_NAME
+    }
+    if "model.bin" not in files:
+        raise RuntimeError(f"{model_dir}에 model.bin이 없습니다 (CTranslate2 변환본이 아님)")
+    manifest = {"source": source, "files": files, "created_at": time.time(), **extra}
+    (model_dir / MANIFEST_NAME).write_text(
+        json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    return manifest
+
+
+def prepare(model_size: str, output_dir: str | Path) -> dict:
+    """faster-whisper 변환본을 output_dir에 내려받는다 (심볼릭 링크가 아닌 실제 파일)."""
+    try:
+        from faster_whisper import download_model
+    except ImportError:
+        raise RuntimeError(
+            "faster-whisper가 설치되지 않았습니다.\n"
+            "pip install faster-whisper 로 설치해주세요."
+        )
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    download_model(model_size, output_dir=str(out))
+    return _write_manifest(out, model_size)
+
+
+def convert(model_name: str, output_dir: str | Path, quantization: str | None = None) -> dict:
+    """Transformers Whisper 모델을 CTranslate2 형식으로 변환한다.
+
+    quantization을 미리 정해 두면 로딩 시 가중치 형 변환을 건너뛴다
+    (STTEngine의 compute_type과 맞출 것).
+    """
+    try:
+        from ctranslate2.converters import TransformersConverter
+    except ImportError:
+        raise RuntimeError(
+            "ctranslate2가 설치되지 않았습니다.\n"
+            "pip install ctranslate2 transformers 로 설치해주세요."
+        )
+    out = Path(output_dir)
+    converter = TransformersConverter(model_name, copy_files=_COPY_FILES)
+    converter.convert(str(out), quantization=quantization, force=True)
+    return _write_manifest(out, model_name, quantization=quantization)
+
+
+def bench(model_dir: str | Path, device: str = "cuda", compute_type: str = "float16") -> dict[str, float]:
+    """로컬 모델 디렉터리의 콜드 스타트 시간(초)을 측정한다."""
+    from stt_engine import STTEngine
+
+    engine = STTEngine(device=device, compute_type=compute_type, model_path=str(model_dir))
+    start = time.perf_counter()
+    engine.warmup()
+    return {**engine.timings, "total": time.perf_counter() - start}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="말표 STT 모델 캐시")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("prepare", help="faster-whisper 변환본 내려받기")
+    p.add_argument("model_size")
+    p.add_argument("output_dir")
+
+    p = sub.add_parser("convert", help="Transformers 모델을 CTranslate2로 변환")
+    p.add_argument("model_name")
+    p.add_argument("output_dir")
+    p.add_argument("--quantization", default=None)
+
+    p = sub.add_parser("bench", help="콜드 스타트 시간 측정")
+    p.add_argument("model_dir")
+    p.add_argument("--device", default="cuda")
+    p.add_argument("--compute-type", default="float16")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    try:
+        if args.command == "prepare":
+            manifest = prepare(args.model_size, args.output_dir)
+        elif args.command == "convert":
+            manifest = convert(args.model_name, args.output_dir, args.quantization)
+        else:
+            timings = bench(args.model_dir, args.device, args.compute_type)
+            for name, seconds in timings.items():
+                print(f"{name:>16}: {seconds:.3f}s")
+            return
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+    total = sum(manifest["files"].values()) / 1e6
+    print(f"모델 준비 완료: {args.output_dir} ({len(manifest['files'])}개 파일, {total:.1f}MB)")
+    print(f"MALPYO_STT_MODEL_DIR={args.output_dir} 로 지정하세요.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+prefetch.py - 다음 응답 음성 미리 합성
+
+키오스크가 다음에 할 말은 화면 흐름으로 대부분 정해져 있다. 예매 화면 다음은
+할인 안내, 결제수단을 고른 뒤에는 결제 확인 문장이다. 그런데 TTS는 LLM 응답이
+돌아온 뒤에야 시작한다. 페이지가 바뀌거나 선택이 바뀔 때 다음에 나올 가능성이
+높은 문장(페이지 안내, 현재 선택에 대한 템플릿 확인 문장)을 유휴 시간에 미리
+합성해 TTS 캐시에 넣어 두면, 다음 턴의 TTS 단계는 캐시 적중으로 끝난다.
+
+    predict_replies(page, selection)   다음 페이지/현재 선택으로 나올 문장 목록
+    TTSPrefetcher                      낮은 우선순위 백그라운드 합성 큐
+
+문장은 rule_parser의 REPLY_TEMPLATES/render_reply로 만든다 (축소 모드의 응답,
+LLM 프롬프트 예시와 같은 문구).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from rule_parser import DISCOUNT_NAMES, PAYMENT_NAMES, REPLY_TEMPLATES, render_reply
+
+logger = logging.getLogger("malpyo.prefetch")
+
+
+def predict_replies(page: str, selection: dict) -> list[str]:
+    """page에서 다음에 말할 가능성이 높은 문장을 가능성 순으로 반환한다.
+
+    Args:
+        page: 지금 보이는 페이지 (booking / discount / payment)
+        selection: 현재 선택 (departure, arrival, time, passengers, discounts, payment)
+    """
+    pax = max(1, int(selection.get("passengers") or 1))
+    if page == "booking":
+        texts = [REPLY_TEMPLATES["booking_empty"]]
+        if selection.get("departure") or selection.get("arrival") or selection.get("time"):
+            texts.insert(0, render_reply("booking", selection))
+        return texts
+
+    if page == "discount":
+        # 현재 선택 → 전원 같은 할인 → 다시 말해 달라는 안내 순
+        texts = [render_reply("discount", {"discounts": selection.get("discounts") or ["normal"] * pax})]
+        texts += [render_reply("discount", {"discounts": [d] * pax}) for d in DISCOUNT_NAMES]
+        texts.append(REPLY_TEMPLATES["discount_empty"])
+        return list(dict.fromkeys(texts))
+
+    if page == "payment":
+        texts = []
+        if selection.get("payment"):
+            texts.append(render_reply("payment", {"payment": selection["payment"]}))
+        texts.append(REPLY_TEMPLATES["payment_empty"])
+        texts += [render_reply("payment", {"payment": p}) for p in PAYMENT_NAMES]
+        return list(dict.fromkeys(texts))
+
+    return []
+
+
+class TTSPrefetcher:
+    """문장을 낮은 우선순위로 하나씩 합성하는 백그라운드 큐.
+
+    busy()가 True인 동안(승객 턴이 진행 중)에는 합성을 시작하지 않고 기다린다.
+    이미 캐시에 있는 문장은 synthesize가 캐시 조회만 하고 바로 끝난다.
+    """
+
+    def __init__(
+        self,
+        synthesize: Callable[[str], object],
+        busy: Callable[[], bool] = lambda: False,
+        max_pending: int = 16,
+        poll: float = 0.05,
+    ) -> None:
+        """
+        Args:
+            synthesize: 문장 하나를 합성해 캐시에 넣는 함수
+            busy: True를 반환하는 동안 합성을 미룬다
+            max_pending: 대기 문장 수 상한 (넘으면 우선순위가 낮은 것부터 버린다)
+            poll: busy일 때 다시 확인하는 간격(초)
+        """
+        self._synthesize = synthesize
+        self._busy = busy
+        self.max_pending = max_pending
+        self.poll = poll
+        # 문장 → None (삽입 순서 = 우선순위, 앞쪽이 먼저)
+        self._pending: OrderedDict[str, None] = OrderedDict()
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self.prefetched = 0
+        self.dropped = 0
+
+    def offer(self, texts: list[str]) -> None:
+        """문장들을 앞쪽이 먼저 합성되도록 큐 맨 앞에 넣는다 (최신 예측 우선)."""
+        with self._cond:
+            for text in reversed([t for t in texts if t]):
+                self._pending[text] = None
+                self._pending.move_to_end(text, last=False)
+            while len(self._pending) > self.max_pending:
+                self._pending.popitem(last=True)
+                self.dropped += 1
+            if self._pending:
+                self._ensure_thread()
+                self._cond.notify()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="malpyo-prefetch", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        # 합성 CPU가 승객 턴의 STT/LLM과 겹쳐도 뒤로 밀리도록 이 스레드의 nice를 올린다 (Linux)
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+        except (AttributeError, OSError):
+            pass
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            if self._busy():
+                time.sleep(self.poll)
+                continue
+            with self._cond:
+                if not self._pending:
+                    continue
+                text, _ = self._pending.popitem(last=False)
+            try:
+                self._synthesize(text)
+            except Exception as e:
+                logger.debug("미리 합성 실패: %r (%s)", text, e)
+                continue
+            with self._cond:
+                self.prefetched += 1
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "pending": len(self._pending),
+                "prefetched": self.prefetched,
+                "dropped": self.dropped,
+            }
@@ -0,0 +1,241 @@
+"""
+profiling.py - 턴 단위 프로파일링 (선택)
+
+느린 턴이 보고되면 현장에서 그 턴 안에서 무슨 일이 있었는지 남기기 위한 도구.
+켜진 턴은 샘플링 CPU 프로파일(턴 단계를 실행한 스레드만)과 tracemalloc
+할당 추적으로 감싸고, 요청마다 JSON 파일 하나를 회전 디렉터리에 남긴다.
+
+    {"label", "page", "wall_seconds", "interval", "samples",
+     "stacks": {"stt;engine:_stt_stage;stt_engine:transcribe;...": 샘플 수},
+     "allocations": [{"where", "size_kb", "count"}], "peak_kb"}
+
+켜는 방법:
+    MALPYO_PROFILE=1               모든 턴 프로파일링
+    aprocess(..., profile=True)    요청 단위 (추론 서버: POST /process?profile=1,
+                                   키오스크 UI: 주소에 ?profile=1)
+꺼져 있으면 턴마다 플래그 확인 한 번만 든다.
+
+flamegraph.pl / speedscope용 collapsed stack 추출:
+    python profiling.py folded profiles/20260101-120000-booking-ab12cd.json > turn.folded
+"""
+
+from __future__ import annotations
+
+import contextlib
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+logger = logging.getLogger("malpyo.profiling")
+
+# 동시에 프로파일링 중인 턴 수 (tracemalloc은 프로세스 전역이므로 참조 카운트로 켜고 끈다)
+_tracing_users = 0
+_tracing_lock = threading.Lock()
+
+
+def _start_tracing() -> None:
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(16)
+        _tracing_users += 1
+
+
+def _stop_tracing() -> None:
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0:
+            tracemalloc.stop()
+
+
+class TurnProfile:
+    """프로파일링 중인 턴 하나. wrap()으로 감싼 단계가 실행되는 스레드만 샘플링한다."""
+
+    def __init__(self, label: str, interval: float) -> None:
+        self.label = label
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        # 스레드 ident → 실행 중인 단계 이름
+        self._active: dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(
+            target=self._sample, name="malpyo-profiler", daemon=True
+        )
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """현재 스레드를 name 단계로 샘플링 대상에 넣는다."""
+        ident = threading.get_ident()
+        with self._lock:
+            self._active[ident] = name
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active.pop(ident, None)
+
+    def wrap(self, name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def staged(*args: Any, **kwargs: Any) -> Any:
+            with self.stage(name):
+                return fn(*args, **kwargs)
+        return staged
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                active = dict(self._active)
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for ident, name in active.items():
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{Path(code.co_filename).stem}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(name)
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+
+class TurnProfiler:
+    """요청 단위 프로파일 결과를 회전 디렉터리에 기록한다."""
+
+    def __init__(
+        self,
+        directory: str | Path = "profiles",
+        always: bool = False,
+        interval: float = 0.005,
+        keep: int = 50,
+        top_allocations: int = 20,
+    ) -> None:
+        """
+        Args:
+            directory: 결과 파일 디렉터리
+            always: True면 모든 턴을 프로파일링 (False면 요청 플래그가 있을 때만)
+            interval: CPU 샘플링 간격(초)
+            keep: 디렉터리에 남길 최근 결과 파일 수
+            top_allocations: 기록할 상위 할당 위치 수
+        """
+        self.directory = Path(directory)
+        self.always = always
+        self.interval = interval
+        self.keep = keep
+        self.top_allocations = top_allocations
+        self._write_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "TurnProfiler":
+        """MALPYO_PROFILE(1이면 항상), MALPYO_PROFILE_DIR, MALPYO_PROFILE_KEEP."""
+        return cls(
+            directory=os.getenv("MALPYO_PROFILE_DIR", "profiles"),
+            always=os.getenv("MALPYO_PROFILE", "") in ("1", "true", "yes"),
+            keep=int(os.getenv("MALPYO_PROFILE_KEEP", "50")),
+        )
+
+    @contextlib.contextmanager
+    def turn(self, label: str, enabled: bool | None = None, **meta: Any) -> Iterator[TurnProfile | None]:
+        """턴 하나를 프로파일링한다. 꺼져 있으면 None을 내준다.
+
+        Args:
+            enabled: 요청 단위 플래그 (None이면 always 설정을 따른다)
+            meta: 결과 파일에 함께 남길 정보 (page 등)
+        """
+        if not (self.always if enabled is None else enabled):
+            yield None
+            return
+
+        profile = TurnProfile(label, self.interval)
+        _start_tracing()
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        profile._sampler.start()
+        try:
+            yield profile
+        finally:
+            wall = time.perf_counter() - start
+            profile._stop.set()
+            profile._sampler.join()
+            after = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            _stop_tracing()
+            try:
+                self._write(profile, wall, before, after, peak, meta)
+            except OSError as e:
+                logger.warning("프로파일 저장 실패: %s", e)
+
+    def _write(
+        self,
+        profile: TurnProfile,
+        wall: float,
+        before: tracemalloc.Snapshot,
+        after: tracemalloc.Snapshot,
+        peak: int,
+        meta: dict,
+    ) -> Path:
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        diff = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+        allocations = [
+            {
+                "where": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_kb": round(stat.size_diff / 1024, 1),
+                "count": stat.count_diff,
+            }
+            for stat in diff[: self.top_allocations]
+            if stat.size_diff > 0
+        ]
+        artifact = {
+            "label": profile.label,
+            **meta,
+            "wall_seconds": round(wall, 4),
+            "interval": profile.interval,
+            "samples": profile.samples,
+            "stacks": dict(profile.stacks.most_common()),
+            "allocations": allocations,
+            "peak_kb": round(peak / 1024, 1),
+        }
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{profile.label}-{uuid.uuid4().hex[:6]}.json"
+        with self._write_lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / name
+            path.write_text(json.dumps(artifact, ensure_ascii=False), encoding="utf-8")
+            self._rotate()
+        logger.info("턴 프로파일 저장: %s (%.2fs, 샘플 %d)", path, wall, profile.samples)
+        return path
+
+    def _rotate(self) -> None:
+        files = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for old in files[: max(0, len(files) - self.keep)]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+
+def to_folded(artifact: dict) -> str:
+    """결과 파일의 stacks를 collapsed stack 텍스트로 바꾼다 (flamegraph.pl 입력)."""
+    return "".join(f"{stack} {count}\n" for stack, count in artifact["stacks"].items())
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "folded":
+        print("사용법: python profiling.py folded <프로파일.json>")
+        sys.exit(1)
+    sys.stdout.write(to_folded(json.loads(Path(sys.argv[2]).read_text(encoding="utf-8"))))
@@ -0,0 +1,283 @@
+"""
+rule_parser.py - 규칙 기반 빠른 파서 (LLM 폴백용)
+
+Ollama가 느리거나 응답하지 않을 때(서킷 브레이커 OPEN) 사용하는 축소 모드.
+키워드/정규식만으로 페이지별 필드를 추출하고, 정해진 템플릿으로 응답 문장을 만든다.
+결과는 LLMEngine.parse()와 같은 LLMResult 형식으로 반환한다.
+"""
+
+from __future__ import annotations
+
+import re
+
+from llm_engine import DEFAULT_CITIES, DEFAULT_TIME_SLOTS, LLMResult
+from station_index import StationIndex
+
+# 한글 수사 → 숫자 (인원/시각 표현용). "이"(2)는 "이분"·"이거"의 지시어와 겹쳐 뺀다
+KOREAN_NUMBERS: dict[str, int] = {
+    "한": 1, "하나": 1, "일": 1, "두": 2, "둘": 2, "세": 3, "셋": 3, "삼": 3,
+    "네": 4, "넷": 4, "사": 4, "다섯": 5, "오": 5, "여섯": 6, "육": 6,
+    "일곱": 7, "칠": 7, "여덟": 8, "팔": 8, "아홉": 9, "구": 9, "열": 10, "십": 10,
+    "열한": 11, "십일": 11, "열두": 12, "십이": 12,
+}
+
+DISCOUNT_KEYWORDS: dict[str, tuple[str, ...]] = {
+    "disabled": ("장애",),
+    "senior": ("경로", "어르신", "노인", "할머니", "할아버지", "65세"),
+    "child": ("어린이", "아이", "애기", "아기", "초등학생", "초등"),
+    "youth": ("청소년", "중학생", "고등학생", "중학", "고등", "학생"),
+    "normal": ("일반", "어른", "성인", "할인 없"),
+}
+
+PAYMENT_KEYWORDS: dict[str, tuple[str, ...]] = {
+    "card": ("카드", "신용", "체크"),
+    "cash": ("현금", "돈으로"),
+    "mobile": ("모바일", "페이", "휴대폰", "핸드폰", "삼성", "카카오", "네이버"),
+    "transfer": ("이체", "계좌", "송금"),
+}
+
+DISCOUNT_NAMES = {
+    "normal": "일반", "disabled": "장애인", "senior": "경로",
+    "child": "어린이", "youth": "청소년",
+}
+PAYMENT_NAMES = {
+    "card": "카드", "cash": "현금", "mobile": "모바일페이", "transfer": "계좌이체",
+}
+
+# 페이지별 응답 템플릿
+REPLY_TEMPLATES: dict[str, str] = {
+    "booking": "{route}{time}{passengers}으로 예매할게요.",
+    "booking_empty": "출발지, 도착지, 시간을 다시 말씀해 주세요.",
+    "discount": "{summary} 할인을 적용할게요.",
+    "discount_empty": "할인 유형을 다시 말씀해 주세요.",
+    "payment": "{payment} 결제하겠습니다.",
+    "payment_empty": "카드, 현금, 모바일페이, 계좌이체 중에서 말씀해 주세요.",
+}
+
+# 수사는 단어 첫머리에서, 바로 뒤에 단위(시/명...)가 올 때만 숫자로 본다
+# ("회사 사람"의 "사", "이분"의 "이"는 숫자가 아니다)
+NUMBER_PATTERN = r"(?<![가-힣\d])(\d{1,2}|%s)" % "|".join(
+    sorted(KOREAN_NUMBERS, key=len, reverse=True)
+)
+TIME_RE = re.compile(r"(오전|오후|아침|저녁|밤|낮)?\s*" + NUMBER_PATTERN + r"\s*시")
+PAX_RE = re.compile(NUMBER_PATTERN + r"\s*(?:명|사람|분|장)")
+# 할인 바로 뒤의 인원 ("아이 둘", "어른 두 명", "학생 2명"). 단위 없이는 혼자 쓰는 수사만
+_COUNT_RE = re.compile(
+    r"\s*(?:" + NUMBER_PATTERN + r"\s*(?:명|사람|분|장)"
+    r"|(?<![가-힣\d])(\d|하나|둘|셋|넷|다섯|여섯|일곱|여덟|아홉))"
+)
+_CLOCK_RE = re.compile(r"(\d{1,2}):(\d{2})")
+CLAUSE_SPLIT_RE = re.compile(r"[,，.]|그리고|하고|이랑|랑")
+
+
+def with_ro(word: str) -> str:
+    """받침에 맞춰 조사 '로/으로'를 붙인다. (받침 없음·ㄹ 받침 → 로)"""
+    last = word[-1] if word else ""
+    if "가" <= last <= "힣":
+        jong = (ord(last) - ord("가")) % 28
+        if jong not in (0, 8):
+            return f"{word}으로"
+    return f"{word}로"
+
+
+def _to_number(token: str) -> int | None:
+    if token.isdigit():
+        return int(token)
+    return KOREAN_NUMBERS.get(token)
+
+
+class RuleParser:
+    """키워드 규칙 기반 파서. 네트워크/모델 없이 밀리초 단위로 동작한다."""
+
+    def __init__(
+        self,
+        cities: list[str] | None = None,
+        time_slots: list[str] | None = None,
+        station_index: StationIndex | None = None,
+    ) -> None:
+        self.cities = list(cities or DEFAULT_CITIES)
+        self.time_slots = list(time_slots or DEFAULT_TIME_SLOTS)
+        # 주어지면 전체 도시를 훑는 대신 인덱스 후보(별칭 포함)만 확인한다
+        self.station_index = station_index
+
+    def parse(self, user_text: str, page: str, context: dict | None = None) -> LLMResult:
+        """LLMEngine.parse()와 같은 시그니처로 규칙 기반 파싱을 수행한다."""
+        text = user_text.strip()
+        if page == "booking":
+            parsed = self._parse_booking(text)
+        elif page == "discount":
+            pax = int((context or {}).get("passengers") or 1)
+            parsed = self._parse_discount(text, pax)
+        elif page == "payment":
+            parsed = self._parse_payment(text)
+        else:
+            return LLMResult(success=False, error=f"알 수 없는 페이지: {page}")
+
+        return LLMResult(raw_json=parsed, reply=render_reply(page, parsed))
+
+    # ── booking ──
+    def _parse_booking(self, text: str) -> dict:
+        parsed: dict = {"departure": None, "arrival": None, "time": None, "passengers": None}
+
+        found = self._find_cities(text)
+        for _, end, city in found:
+            tail = text[end:end + 4].lstrip()
+            if tail.startswith(("에서", "출발")):
+                parsed["departure"] = city
+            elif tail.startswith(("까지", "으로", "로", "행", "가")):
+                parsed["arrival"] = city
+        leftovers = [c for _, _, c in found if c not in (parsed["departure"], parsed["arrival"])]
+        for city in leftovers:
+            if parsed["departure"] is None and len(found) > 1:
+                parsed["departure"] = city
+            elif parsed["arrival"] is None:
+                parsed["arrival"] = city
+
+        parsed["time"] = self._parse_time(text)
+
+        for m in PAX_RE.finditer(text):
+            n = _to_number(m.group(1))
+            if n and 1 <= n <= 9:
+                parsed["passengers"] = n
+                break
+        return parsed
+
+    def _find_cities(self, text: str) -> list[tuple[int, int, str]]:
+        """(시작, 끝, 도시) 목록을 위치 순으로 반환한다."""
+        if self.station_index is None:
+            return sorted(
+                (text.find(c), text.find(c) + len(c), c) for c in self.cities if c in text
+            )
+        # 검색이 돌려준 원문 위치를 쓴다. 별칭("서울역")으로 언급됐으면 조사 판별은 별칭 뒤에서 한다
+        spans = [
+            (start, end, m.name)
+            for m in self.station_index.search(text, k=6)
+            for start, end in m.spans
+        ]
+        # 더 긴 역 이름 안에 든 위치는 버린다 ("동대구" 안의 "대구", "광주송정" 안의 "광주")
+        found: list[tuple[int, int, str]] = []
+        for start, end, name in sorted(spans, key=lambda s: s[0] - s[1]):
+            if not any(s <= start and end <= e for s, e, _ in found):
+                found.append((start, end, name))
+        # 역마다 처음 언급된 위치 하나만
+        first: dict[str, tuple[int, int, str]] = {}
+        for span in sorted(found):
+            first.setdefault(span[2], span)
+        return sorted(first.values())
+
+    def _parse_time(self, text: str) -> str | None:
+        m = _CLOCK_RE.search(text)
+        if m:
+            candidate = f"{int(m.group(1)):02d}:{m.group(2)}"
+            return candidate if candidate in self.time_slots else None
+
+        for m in TIME_RE.finditer(text):
+            hour = _to_number(m.group(2))
+            if hour is not None and 0 < hour <= 24:
+                break
+        else:
+            return None
+        meridiem = m.group(1)
+        if meridiem in ("오후", "저녁", "밤") and hour < 12:
+            hour += 12
+        elif meridiem is None and hour < 7:
+            # "2시"처럼 오전/오후가 없으면 운행 시간대 기준으로 오후로 본다
+            hour += 12
+        candidate = f"{hour:02d}:00"
+        return candidate if candidate in self.time_slots else None
+
+    # ── discount ──
+    def _parse_discount(self, text: str, pax: int) -> dict:
+        clauses = [c for c in CLAUSE_SPLIT_RE.split(text) if c.strip()] or [text]
+        # 한 절 안에서도 언급된 순서대로, 언급마다 말한 인원만큼 ("어른 하나 아이 둘" → 일반, 어린이, 어린이)
+        labels = [label for c in clauses for label in self._match_keywords(c, DISCOUNT_KEYWORDS)]
+        if not labels:
+            return {"discounts": []}
+        if len(labels) == 1 and any(w in text for w in ("모두", "전부", "다 ")):
+            return {"discounts": labels * pax}
+        return {"discounts": (labels + ["normal"] * pax)[:pax]}
+
+    # ── payment ──
+    def _parse_payment(self, text: str) -> dict:
+        return {"payment": self._match_keyword(text, PAYMENT_KEYWORDS)}
+
+    @staticmethod
+    def _match_keyword(text: str, table: dict[str, tuple[str, ...]]) -> str | None:
+        for label, words in table.items():
+            if any(w in text for w in words):
+                return label
+        return None
+
+    @staticmethod
+    def _match_keywords(text: str, table: dict[str, tuple[str, ...]]) -> list[str]:
+        """텍스트에 나온 라벨들을 언급 순서대로, 언급 뒤에 인원이 있으면 그 수만큼.
+
+        인원이 없는 언급 뒤에 같은 라벨이 이어지면 한 사람을 꾸미는 말로 보고
+        하나로 센다 ("65세 이상 어르신 한 분" → 경로 1, "중학생" → 청소년 1).
+        """
+        spans = [
+            (m.start(), m.end(), label)
+            for label, words in table.items()
+            for w in words
+            for m in re.finditer(re.escape(w), text)
+        ]
+        # 더 긴 키워드 안에 든 위치는 버린다 ("초등학생" 안의 "학생")
+        kept: list[tuple[int, int, str]] = []
+        for start, end, label in sorted(spans, key=lambda s: s[0] - s[1]):
+            if not any(s <= start and end <= e for s, e, _ in kept):
+                kept.append((start, end, label))
+        labels: list[str] = []
+        pending: str | None = None      # 인원 없이 언급된 직전 라벨
+        for _, end, label in sorted(kept):
+            m = _COUNT_RE.match(text, end)
+            count = _to_number(m.group(1) or m.group(2)) if m else None
+            if pending is not None and pending != label:
+                labels.append(pending)
+            pending = None
+            if count is None:
+                pending = label
+            else:
+                labels.extend([label] * min(max(count, 1), 9))
+        if pending is not None:
+            labels.append(pending)
+        return labels
+
+
+def render_reply(page: str, parsed: dict) -> str:
+    """파싱된 필드로 템플릿 응답 문장을 만든다."""
+    if page == "booking":
+        dep, arr = parsed.get("departure"), parsed.get("arrival")
+        if not (dep or arr or parsed.get("time")):
+            return REPLY_TEMPLATES["booking_empty"]
+        if dep and arr:
+            route = f"{dep}에서 {arr}, "
+        elif arr:
+            route = f"{arr}행, "
+        elif dep:
+            route = f"{dep} 출발, "
+        else:
+            route = ""
+        time = f"{parsed['time']}, " if parsed.get("time") else ""
+        pax = parsed.get("passengers") or 1
+        return REPLY_TEMPLATES["booking"].format(
+            route=route, time=time, passengers=f"{pax}명"
+        )
+
+    if page == "discount":
+        discounts = parsed.get("discounts") or []
+        if not discounts:
+            return REPLY_TEMPLATES["discount_empty"]
+        summary = ", ".join(
+            f"탑승객 {i + 1} {DISCOUNT_NAMES.get(d, '일반')}" for i, d in enumerate(discounts)
+        )
+        return REPLY_TEMPLATES["discount"].format(summary=summary)
+
+    if page == "payment":
+        payment = parsed.get("payment")
+        if not payment:
+            return REPLY_TEMPLATES["payment_empty"]
+        return REPLY_TEMPLATES["payment"].format(
+            payment=with_ro(PAYMENT_NAMES.get(payment, payment))
+        )
+
+    return ""
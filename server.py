@@ -0,0 +1,222 @@
+"""
+server.py - 말표 추론 서비스 (헤드리스 HTTP/WebSocket)
+
+GPU 서버 한 대에서 MalPyoEngine 하나(Whisper/TTS 모델 1벌)를 띄워 두고
+여러 키오스크 UI(app.py, MALPYO_ENGINE_URL 설정)가 네트워크로 사용한다.
+
+엔드포인트:
+    GET  /health               엔진/브레이커 상태
+    POST /process              음성 턴 처리 (본문: WAV bytes)
+                               쿼리: page, session_id, profile=1(선택)
+                               헤더: X-Malpyo-Context(JSON)
+                               응답: 단계별 진행 상황 NDJSON 스트림, 마지막 줄이 결과
+    POST /cancel               쿼리 session_id의 진행 중인 턴 취소
+    POST /prefetch             JSON {"texts": [...]} 응답 문장을 유휴 시간에 미리 합성 (TTS 캐시)
+    WS   /ws/stt               바이너리 오디오 청크 → "end" 전송 → 부분 인식 결과 스트림
+    WS   /ws/tts               {"text": ...} 전송 → 문장별 오디오 바이너리 스트림
+
+실행:
+    pip install starlette uvicorn
+    python server.py --host 0.0.0.0 --port 8700
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import uvicorn
+    from starlette.applications import Starlette
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse, StreamingResponse
+    from starlette.routing import Route, WebSocketRoute
+    from starlette.websockets import WebSocket, WebSocketDisconnect
+except ImportError as e:
+    raise RuntimeError(
+        "추론 서버에는 starlette, uvicorn이 필요합니다.\n"
+        "pip install starlette uvicorn 으로 설치해주세요."
+    ) from e
+
+from cancellation import CancelToken, TurnCancelled
+from engine import MalPyoEngine, PipelineResult, build_engine
+from engine_client import CONTEXT_HEADER
+
+logger = logging.getLogger("malpyo.server")
+
+_SENTENCE_RE = re.compile(r"(?<=[.?!。])\s+")
+
+
+def create_app(
+    engine: MalPyoEngine | None = None,
+    stt_workers: int = 1,
+    tts_workers: int = 1,
+) -> Starlette:
+    """추론 서비스 앱을 만든다.
+
+    Args:
+        engine: 공유 엔진. None이면 build_engine()으로 만든다.
+        stt_workers: /ws/stt 전용 STT 워커 수
+        tts_workers: /ws/tts 전용 TTS 워커 수
+    """
+    if engine is None:
+        engine = build_engine()
+        engine.warmup()
+    engine.health.start()
+    stt_pool = ThreadPoolExecutor(max_workers=stt_workers, thread_name_prefix="malpyo-srv-stt")
+    tts_pool = ThreadPoolExecutor(max_workers=tts_workers, thread_name_prefix="malpyo-srv-tts")
+
+    async def health(request: Request) -> JSONResponse:
+        # 워커 풀은 워커별 상태, 단계식 STT는 승격 비율을 stats()로 제공한다
+        stt_stats = getattr(engine.stt, "stats", None)
+        return JSONResponse({
+            "status": "ok",
+            **engine.health_check(),
+            "stt_stats": stt_stats() if stt_stats else None,
+            "admission_stats": engine.admission.stats(),
+            "prefetch_stats": engine.prefetcher.stats(),
+            "tts_mime": engine.tts.encoder.mime_type,
+        })
+
+    async def process(request: Request) -> StreamingResponse:
+        page = request.query_params.get("page", "booking")
+        session_id = request.query_params.get("session_id") or uuid.uuid4().hex
+        profile = True if request.query_params.get("profile") == "1" else None
+        context = json.loads(request.headers.get(CONTEXT_HEADER) or "null")
+        audio = await request.body()
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue[tuple[str, PipelineResult | None]] = asyncio.Queue()
+
+        def on_progress(stage: str, result: PipelineResult) -> None:
+            loop.call_soon_threadsafe(queue.put_nowait, (stage, result))
+
+        task = asyncio.create_task(
+            engine.aprocess(
+                audio, page, context,
+                session_id=session_id, on_progress=on_progress, profile=profile,
+            )
+        )
+        task.add_done_callback(lambda _: queue.put_nowait(("done", None)))
+
+        async def stream():
+            try:
+                while True:
+                    stage, partial = await queue.get()
+                    if stage == "done":
+                        result = task.result()
+                        yield _ndjson("done", result.to_dict())
+                        return
+                    yield _ndjson(stage, partial.to_dict(include_audio=False))
+            finally:
+                # 클라이언트가 연결을 끊으면 턴도 중단한다
+                if not task.done():
+                    task.cancel()
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    async def cancel(request: Request) -> JSONResponse:
+        session_id = request.query_params.get("session_id", "")
+        engine.cancel_session(session_id)
+        return JSONResponse({"cancelled": session_id})
+
+    async def prefetch(request: Request) -> JSONResponse:
+        texts = (await request.json()).get("texts", [])
+        engine.prefetch([t for t in texts if isinstance(t, str)])
+        return JSONResponse({"queued": len(texts)})
+
+    async def ws_stt(websocket: WebSocket) -> None:
+        await websocket.accept()
+        loop = asyncio.get_running_loop()
+        token = CancelToken()
+        try:
+            chunks: list[bytes] = []
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                if message.get("bytes"):
+                    chunks.append(message["bytes"])
+                elif message.get("text") == "end":
+                    break
+
+            def on_segment(segment: dict) -> None:
+                asyncio.run_coroutine_threadsafe(
+                    websocket.send_json({"type": "partial", **segment}), loop
+                )
+
+            stt_result = await loop.run_in_executor(
+                stt_pool,
+                lambda: engine.stt.transcribe(b"".join(chunks), cancel=token, on_segment=on_segment),
+            )
+            await websocket.send_json({
+                "type": "final",
+                "text": stt_result.text.strip(),
+                "confidence": stt_result.confidence,
+            })
+            await websocket.close()
+        except (WebSocketDisconnect, TurnCancelled):
+            pass
+        except Exception as e:
+            logger.error("STT 스트림 실패: %s", e)
+            await websocket.send_json({"type": "error", "error": str(e)})
+            await websocket.close()
+        finally:
+            token.cancel()
+
+    async def ws_tts(websocket: WebSocket) -> None:
+        await websocket.accept()
+        loop = asyncio.get_running_loop()
+        try:
+            request = await websocket.receive_json()
+            sentences = [s for s in _SENTENCE_RE.split(request.get("text", "").strip()) if s]
+            await websocket.send_json({"type": "start", "mime": engine.tts.encoder.mime_type})
+            # 문장 단위로 합성해 먼저 끝난 문장부터 재생할 수 있게 보낸다
+            for sentence in sentences:
+                audio, _ = await loop.run_in_executor(
+                    tts_pool, engine.tts.synthesize_encoded, sentence
+                )
+                await websocket.send_bytes(audio)
+            await websocket.send_json({"type": "done", "count": len(sentences)})
+            await websocket.close()
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            logger.error("TTS 스트림 실패: %s", e)
+            await websocket.send_json({"type": "error", "error": str(e)})
+            await websocket.close()
+
+    return Starlette(routes=[
+        Route("/health", health),
+        Route("/process", process, methods=["POST"]),
+        Route("/cancel", cancel, methods=["POST"]),
+        Route("/prefetch", prefetch, methods=["POST"]),
+        WebSocketRoute("/ws/stt", ws_stt),
+        WebSocketRoute("/ws/tts", ws_tts),
+    ])
+
+
+def _ndjson(stage: str, result: dict) -> bytes:
+    return (json.dumps({"stage": stage, "result": result}, ensure_ascii=False) + "\n").encode()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="말표 추론 서비스")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--stt-workers", type=int, default=1)
+    parser.add_argument("--tts-workers", type=int, default=1)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    app = create_app(stt_workers=args.stt_workers, tts_workers=args.tts_workers)
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+shared_cache.py - 프로세스 공용 로컬 캐시 (LLM 파싱 결과, TTS 오디오)
+
+Streamlit 서버 프로세스나 추론 엔진 복제본이 여러 개면 프로세스별 캐시는
+복제본마다 비어 있고 같은 내용을 중복해서 들고 있게 된다. 이 캐시는 같은
+머신의 모든 프로세스가 하나의 디렉터리를 함께 읽고 쓴다.
+
+    cache.db         SQLite(WAL) 인덱스: 키, 크기, MIME, 마지막 접근 시각, 작은 값(인라인)
+    blobs/<해시>      큰 값(오디오)은 파일 하나씩. 읽을 때 mmap으로 매핑해 복사 없이
+                     memoryview로 돌려준다 (페이지 캐시를 모든 프로세스가 공유)
+
+쓰기는 원자적이다: 블롭 파일을 임시 이름으로 다 쓴 뒤 rename하고, 그 다음
+트랜잭션으로 인덱스 행을 넣는다. 다른 프로세스는 커밋된 행만 본다.
+전체 크기가 상한을 넘으면 마지막 접근이 오래된 항목부터 지운다 (지워진 블롭을
+이미 매핑해 둔 프로세스는 그대로 읽을 수 있다).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger("malpyo.shared_cache")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key      TEXT PRIMARY KEY,
+    value    BLOB,
+    file     TEXT,
+    size     INTEGER NOT NULL,
+    mime     TEXT NOT NULL DEFAULT '',
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed);
+"""
+
+# 접근 시각 갱신은 이 간격(초)보다 오래된 경우에만 쓴다 (읽기마다 쓰기가 생기지 않도록)
+_TOUCH_SECONDS = 60.0
+
+
+def cache_key(*parts) -> str:
+    """여러 구성 요소로 고정 길이 캐시 키를 만든다."""
+    blob = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class SharedCache:
+    """SQLite WAL 인덱스 + mmap 블롭 파일 기반 프로세스 공용 캐시."""
+
+    def __init__(
+        self,
+        directory: str | Path,
+        max_bytes: int = 256 * 1024 * 1024,
+        inline_limit: int = 4096,
+    ) -> None:
+        """
+        Args:
+            directory: 캐시 디렉터리 (같은 머신의 프로세스들이 공유)
+            max_bytes: 값 전체 크기 상한
+            inline_limit: 이보다 작은 값은 블롭 파일 대신 SQLite 행에 넣는다
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.inline_limit = inline_limit
+        self._blobs = self.directory / "blobs"
+        self._blobs.mkdir(parents=True, exist_ok=True)
+        self._db_path = self.directory / "cache.db"
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+
+    @classmethod
+    def from_env(cls) -> "SharedCache | None":
+        """MALPYO_SHARED_CACHE_DIR이 설정되어 있으면 캐시를 연다 (MALPYO_SHARED_CACHE_MB: 상한)."""
+        directory = os.getenv("MALPYO_SHARED_CACHE_DIR")
+        if not directory:
+            return None
+        mb = int(os.getenv("MALPYO_SHARED_CACHE_MB", "256"))
+        return cls(directory, max_bytes=mb * 1024 * 1024)
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 연결은 스레드 사이에 공유하지 않는다
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._db_path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ─────────────────────────────────────────────────────────
+    # 읽기
+    # ─────────────────────────────────────────────────────────
+    def get(self, key: str) -> tuple[memoryview, str] | None:
+        """(값, MIME)을 반환한다. 블롭은 mmap 위의 읽기 전용 memoryview (복사 없음)."""
+        try:
+            row = self._conn().execute(
+                "SELECT value, file, mime, accessed FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("공용 캐시 읽기 실패: %s", e)
+            return None
+        if row is None:
+            self.misses += 1
+            return None
+        value, file, mime, accessed = row
+        if file is not None:
+            value = self._map(file)
+            if value is None:
+                self.misses += 1
+                self._drop(key)
+                return None
+        self.hits += 1
+        now = time.time()
+        if now - accessed > _TOUCH_SECONDS:
+            try:
+                self._conn().execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            except sqlite3.Error:
+                pass
+        return memoryview(value), mime
+
+    def _map(self, file: str) -> mmap.mmap | None:
+        try:
+            with open(self._blobs / file, "rb") as f:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # 다른 프로세스가 방금 내보낸 항목
+            return None
+
+    def _drop(self, key: str) -> None:
+        try:
+            self._conn().execute("DELETE FROM entries WHERE key = ?", (key,))
+        except sqlite3.Error:
+            pass
+
+    def get_json(self, key: str):
+        hit = self.get(key)
+        return json.loads(bytes(hit[0])) if hit is not None else None
+
+    # ─────────────────────────────────────────────────────────
+    # 쓰기
+    # ─────────────────────────────────────────────────────────
+    def put(self, key: str, data: bytes, mime: str = "") -> None:
+        """값을 저장한다 (같은 키가 있으면 교체). 실패해도 예외를 내지 않는다."""
+        if len(data) > self.max_bytes:
+            return
+        try:
+            file = None
+            value: bytes | None = bytes(data)
+            if len(data) > self.inline_limit:
+                file = key
+                tmp = self._blobs / f".{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+                tmp.write_bytes(data)
+                os.replace(tmp, self._blobs / file)
+                value = None
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, file, size, mime, accessed)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, value, file, len(data), mime, time.time()),
+                )
+                evicted = self._evict_locked(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            for name in evicted:
+                (self._blobs / name).unlink(missing_ok=True)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("공용 캐시 쓰기 실패: %s", e)
+
+    def put_json(self, key: str, obj) -> None:
+        self.put(key, json.dumps(obj, ensure_ascii=False).encode("utf-8"), "application/json")
+
+    def _evict_locked(self, conn: sqlite3.Connection) -> list[str]:
+        """상한을 넘으면 오래된 항목부터 지우고, 지울 블롭 파일 이름을 반환한다."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return []
+        # 한 번에 상한의 90%까지 비워 매 쓰기마다 정리하지 않도록 한다
+        target = total - int(self.max_bytes * 0.9)
+        files: list[str] = []
+        keys: list[str] = []
+        for key, file, size in conn.execute(
+            "SELECT key, file, size FROM entries ORDER BY accessed"
+        ):
+            if target <= 0:
+                break
+            keys.append(key)
+            if file is not None:
+                files.append(file)
+            target -= size
+        conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in keys])
+        logger.info("공용 캐시 상한 초과, %d개 항목 내보냄", len(keys))
+        return files
+
+    def stats(self) -> dict:
+        count, total = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        return {"entries": count, "bytes": total, "hits": self.hits, "misses": self.misses}
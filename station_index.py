@@ -0,0 +1,203 @@
+"""
+station_index.py - 역(터미널) 후보 검색 인덱스
+
+역 이름 · 별칭 · 로마자 표기를 문자 n-gram 역색인으로 만들어 두고,
+STT 텍스트에서 언급됐을 법한 역을 상위 k개만 골라낸다.
+LLM 프롬프트에는 전체 역 목록 대신 이 후보만 넣으므로, 역 수가 늘어나도
+프롬프트 길이는 일정하게 유지된다.
+
+인덱스 파일(JSON) 형식:
+    {"stations": {"서울": ["서울역", "서울경부"], "동대구": ["동대구역"], ...}}
+
+역 목록 CSV(역이름,별칭1|별칭2...)에서 인덱스 파일을 만들려면:
+    python station_index.py build stations.csv data/stations.json
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import re
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger("malpyo.station_index")
+
+# 한글 음절 분해용 (국어의 로마자 표기법 기본 대응, 음운 변화는 반영하지 않음)
+_INITIALS = ["g", "kk", "n", "d", "tt", "r", "m", "b", "pp", "s", "ss", "",
+             "j", "jj", "ch", "k", "t", "p", "h"]
+_MEDIALS = ["a", "ae", "ya", "yae", "eo", "e", "yeo", "ye", "o", "wa", "wae", "oe",
+            "yo", "u", "wo", "we", "wi", "yu", "eu", "ui", "i"]
+_FINALS = ["", "k", "k", "k", "n", "n", "n", "t", "l", "k", "m", "l", "l", "l",
+           "p", "l", "m", "p", "p", "t", "t", "ng", "t", "t", "k", "t", "p", "t"]
+
+_NON_WORD_RE = re.compile(r"[^0-9a-z가-힣]+")
+
+
+def romanize(text: str) -> str:
+    """한글을 로마자로 옮긴다 (예: 서울 → seoul, 부산 → busan)."""
+    out: list[str] = []
+    for ch in text:
+        code = ord(ch) - 0xAC00
+        if 0 <= code < 11172:
+            out.append(_INITIALS[code // 588] + _MEDIALS[(code % 588) // 28] + _FINALS[code % 28])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def normalize(text: str) -> str:
+    return _NON_WORD_RE.sub("", text.lower())
+
+
+def _grams(term: str) -> set[str]:
+    """한글은 2-gram, 로마자는 3-gram (짧으면 통째로)."""
+    n = 3 if term.isascii() else 2
+    if len(term) <= n:
+        return {term} if term else set()
+    return {term[i:i + n] for i in range(len(term) - n + 1)}
+
+
+def _text_grams(text: str) -> set[str]:
+    grams: set[str] = set()
+    for n in (1, 2, 3):
+        grams.update(text[i:i + n] for i in range(len(text) - n + 1))
+    return grams
+
+
+def _spans(norm: str, term: str, kept: list[int]) -> tuple[tuple[int, int], ...]:
+    """정규화 텍스트에서 term이 나타난 모든 위치를 원문 (시작, 끝)으로 바꾼다."""
+    spans = []
+    pos = norm.find(term)
+    while pos >= 0:
+        spans.append((kept[pos], kept[pos + len(term) - 1] + 1))
+        pos = norm.find(term, pos + 1)
+    return tuple(spans)
+
+
+@dataclass(frozen=True)
+class StationMatch:
+    name: str           # 정규 역 이름
+    score: float        # 표기의 n-gram 중 텍스트에 나타난 비율 (0~1)
+    surface: str        # 매칭된 표기 (이름/별칭/로마자)
+    # 표기가 원문에 그대로 나타난 (시작, 끝) 위치들 (원문 기준, 없으면 빈 튜플)
+    spans: tuple[tuple[int, int], ...] = ()
+
+
+class StationIndex:
+    """역 이름/별칭/로마자 n-gram 역색인."""
+
+    def __init__(
+        self,
+        stations: list[str] | dict[str, list[str]],
+        min_score: float = 0.6,
+    ) -> None:
+        """
+        Args:
+            stations: 역 이름 목록, 또는 역 이름 → 별칭 목록
+            min_score: 후보로 인정할 최소 점수
+        """
+        if not isinstance(stations, dict):
+            stations = {name: [] for name in stations}
+        self.stations = list(stations)
+        self.aliases = {name: list(aliases) for name, aliases in stations.items()}
+        self.min_score = min_score
+
+        # 표기(term) 목록과 n-gram → term 번호 역색인
+        self._terms: list[tuple[str, str, int]] = []   # (정규화 표기, 원래 표기, 역 번호)
+        self._postings: dict[str, list[int]] = defaultdict(list)
+        for sid, name in enumerate(self.stations):
+            surfaces = {name, *self.aliases[name]}
+            surfaces |= {romanize(s) for s in list(surfaces)}
+            for surface in sorted(surfaces):
+                term = normalize(surface)
+                if not term:
+                    continue
+                tid = len(self._terms)
+                self._terms.append((term, surface, sid))
+                for gram in _grams(term):
+                    self._postings[gram].append(tid)
+        self._term_sizes = [len(_grams(term)) for term, _, _ in self._terms]
+        logger.info("역 인덱스: 역 %d개, 표기 %d개", len(self.stations), len(self._terms))
+
+    @classmethod
+    def load(cls, path: str | Path, min_score: float = 0.6) -> "StationIndex":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls(data["stations"], min_score=min_score)
+
+    def save(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            json.dumps({"stations": self.aliases}, ensure_ascii=False), encoding="utf-8"
+        )
+
+    def search(self, text: str, k: int = 5) -> list[StationMatch]:
+        """텍스트에서 언급됐을 법한 역 상위 k개 (점수 높은 순, 같으면 먼저 언급된 순)."""
+        norm = normalize(text)
+        if not norm:
+            return []
+        roman = normalize(romanize(text))
+        grams = _text_grams(norm) | _text_grams(roman)
+
+        hits: dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for tid in self._postings.get(gram, ()):
+                hits[tid] += 1
+
+        def _position(term: str) -> tuple[int, float]:
+            # (원문 표기=0 / 로마자 표기=1 / 없음=2, 텍스트 안의 상대 위치).
+            # 역마다 원문에 그대로 나타난 (더 긴) 표기를 우선하고, 상대 위치로
+            # 출발지/도착지가 언급된 순서를 보존한다
+            for rank, haystack in enumerate((norm, roman)):
+                pos = haystack.find(term)
+                if pos >= 0:
+                    return rank, pos / len(haystack)
+            return 2, 1.0
+
+        best: dict[int, tuple[tuple, str, str]] = {}
+        for tid, count in hits.items():
+            score = count / self._term_sizes[tid]
+            if score < self.min_score:
+                continue
+            term, surface, sid = self._terms[tid]
+            key = (-score, *_position(term), -len(term))
+            if sid not in best or key < best[sid][0]:
+                best[sid] = (key, term, surface)
+
+        ranked = sorted(best.items(), key=lambda e: (e[1][0][0], e[1][0][2]))[:k]
+        # 정규화 텍스트의 글자 → 원문 위치 (정규화는 글자를 지우기만 한다)
+        lowered = text.lower()
+        kept = [i for i, ch in enumerate(lowered) if not _NON_WORD_RE.match(ch)]
+        return [
+            StationMatch(self.stations[sid], -key[0], surface, _spans(norm, term, kept))
+            for sid, (key, term, surface) in ranked
+        ]
+
+    def candidates(self, text: str, k: int = 5) -> list[str]:
+        return [m.name for m in self.search(text, k)]
+
+
+def build_from_csv(csv_path: str | Path, out_path: str | Path) -> StationIndex:
+    """CSV(역이름,별칭1|별칭2...)로부터 인덱스 파일을 만든다."""
+    stations: dict[str, list[str]] = {}
+    with open(csv_path, encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip():
+                continue
+            aliases = [a.strip() for a in row[1].split("|")] if len(row) > 1 else []
+            stations[row[0].strip()] = [a for a in aliases if a]
+    index = StationIndex(stations)
+    index.save(out_path)
+    return index
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != "build":
+        print("사용법: python station_index.py build <stations.csv> <출력 JSON>")
+        sys.exit(1)
+    built = build_from_csv(sys.argv[2], sys.argv[3])
+    print(f"역 인덱스 생성 완료: 역 {len(built.stations)}개 → {sys.argv[3]}")
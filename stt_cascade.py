@@ -0,0 +1,151 @@
+"""
+stt_cascade.py - 단계식(cascade) STT
+
+키오스크 발화는 대부분 "카드", "두 명", "부산" 같은 짧은 명령어라서
+large-v3-turbo + 빔 5 디코딩은 과하다. 작은 모델로 먼저 그리디 디코딩하고,
+결과가 불확실할 때만 큰 모델(넓은 빔)로 다시 인식한다.
+
+    오디오 ──▶ fast (base/small, beam 1) ──▶ 신뢰도 ≥ 문턱 AND 어휘 일치 ──▶ 결과
+                                         └─ 아니면 ──▶ accurate (large-v3-turbo, beam 5) ──▶ 결과
+
+accurate는 STTEngine 또는 STTWorkerPool 무엇이든 된다 (fast는 CPU 프로세스 안,
+accurate는 GPU 워커 풀로 나누는 구성이 가능). 승격 비율은 stats()로 확인한다.
+STTEngine.transcribe()와 같은 인터페이스이므로 MalPyoEngine(stt=...)에 그대로 넣는다.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Callable, Iterable
+
+from cancellation import CancelToken
+from llm_engine import DEFAULT_CITIES
+from rule_parser import DISCOUNT_KEYWORDS, PAX_RE, PAYMENT_KEYWORDS, TIME_RE
+from stt_engine import STTEngine, STTResult
+
+logger = logging.getLogger("malpyo.stt.cascade")
+
+# 도시 외에 키오스크 명령어로 인정할 어휘. 한 글자 어휘("시", "명")는 아무 문장에나
+# 들어 있으므로 ("시청해 주셔서 감사합니다") 두 글자 이상만 쓴다
+COMMAND_WORDS: tuple[str, ...] = (
+    *{k for words in DISCOUNT_KEYWORDS.values() for k in words},
+    *{k for words in PAYMENT_KEYWORDS.values() for k in words},
+    "사람", "오전", "오후",
+)
+# 인원/시각은 수사 + 단위로만 인정한다 ("두 명", "3장", "오후 두 시")
+COMMAND_PATTERNS = (PAX_RE, TIME_RE)
+
+
+class CascadeSTT:
+    """작은 모델 우선, 불확실하면 큰 모델로 승격하는 STT."""
+
+    def __init__(
+        self,
+        fast: STTEngine,
+        accurate,
+        min_confidence: float = -0.5,
+        vocabulary: Iterable[str] | None = None,
+    ) -> None:
+        """
+        Args:
+            fast: 먼저 돌릴 작은 모델 (beam_size=1 권장)
+            accurate: 승격 시 사용할 큰 모델 (STTEngine 또는 STTWorkerPool)
+            min_confidence: fast 결과의 평균 로그 확률이 이보다 낮으면 승격
+            vocabulary: 키오스크 어휘 (역 이름 등). fast 결과에 하나도 없고
+                COMMAND_PATTERNS에도 맞지 않으면 승격. None이면 기본 도시 + COMMAND_WORDS
+                (두 글자 미만 어휘는 쓰지 않는다)
+        """
+        self.fast = fast
+        self.accurate = accurate
+        self.min_confidence = min_confidence
+        terms = list(vocabulary) if vocabulary is not None else list(DEFAULT_CITIES)
+        terms = (t.replace(" ", "") for t in (*terms, *COMMAND_WORDS))
+        self.vocabulary = tuple(dict.fromkeys(t for t in terms if len(t) >= 2))
+        self._lock = threading.Lock()
+        self._counts = {"total": 0, "escalated": 0, "low_confidence": 0, "out_of_vocabulary": 0}
+        self._seconds = {"fast": 0.0, "accurate": 0.0}
+
+    # ─────────────────────────────────────────────────────────
+    # STTEngine 호환 훅
+    # ─────────────────────────────────────────────────────────
+    @property
+    def loaded(self) -> bool:
+        return getattr(self.fast, "loaded", True)
+
+    def _load_model(self) -> None:
+        self.fast._load_model()
+
+    def warmup(self) -> None:
+        """fast를 먼저 준비한 뒤(이때부터 턴 처리 가능) accurate를 준비한다."""
+        self.fast.warmup()
+        getattr(self.accurate, "warmup", self.accurate._load_model)()
+
+    def canary(self):
+        return self.fast.canary()
+
+    # ─────────────────────────────────────────────────────────
+    # 인식
+    # ─────────────────────────────────────────────────────────
+    def transcribe(
+        self,
+        audio_data,
+        cancel: CancelToken | None = None,
+        on_segment: Callable[[dict], None] | None = None,
+        beam_size: int | None = None,
+    ) -> STTResult:
+        """fast로 인식하고, 불확실하면 accurate로 다시 인식한다.
+
+        on_segment는 fast의 부분 결과를 먼저 받고, 승격되면 accurate의
+        부분 결과를 이어서 받는다 (최종 결과는 반환값).
+        beam_size가 주어지면(과부하 시 축소) 승격하지 않고 fast 결과를 그대로 쓴다.
+        """
+        start = time.perf_counter()
+        result = self.fast.transcribe(audio_data, cancel=cancel, on_segment=on_segment)
+        fast_seconds = time.perf_counter() - start
+        if result.rejected or beam_size is not None:
+            return result
+
+        reason = self._escalation_reason(result)
+        with self._lock:
+            self._counts["total"] += 1
+            self._seconds["fast"] += fast_seconds
+            if reason:
+                self._counts["escalated"] += 1
+                self._counts[reason] += 1
+        if not reason:
+            return result
+
+        logger.info(
+            "STT 승격(%s): %r (신뢰도 %.2f)", reason, result.text.strip(), result.confidence
+        )
+        start = time.perf_counter()
+        escalated = self.accurate.transcribe(audio_data, cancel=cancel, on_segment=on_segment)
+        with self._lock:
+            self._seconds["accurate"] += time.perf_counter() - start
+        return escalated
+
+    def _escalation_reason(self, result: STTResult) -> str:
+        text = result.text.replace(" ", "")
+        if not text or result.confidence < self.min_confidence:
+            return "low_confidence"
+        if not any(term in text for term in self.vocabulary) and not any(
+            p.search(result.text) for p in COMMAND_PATTERNS
+        ):
+            return "out_of_vocabulary"
+        return ""
+
+    def stats(self) -> dict:
+        """승격 통계 (승격 비율, 사유별 건수, 모델별 평균 소요 시간)."""
+        with self._lock:
+            counts = dict(self._counts)
+            seconds = dict(self._seconds)
+        total = counts["total"]
+        escalated = counts["escalated"]
+        return {
+            **counts,
+            "escalation_rate": escalated / total if total else 0.0,
+            "fast_avg_seconds": seconds["fast"] / total if total else 0.0,
+            "accurate_avg_seconds": seconds["accurate"] / escalated if escalated else 0.0,
+        }
@@ -7,13 +7,129 @@ app.py에서 녹음된 오디오 바이트를 받아 처리한다.
 
 from __future__ import annotations
 
+import functools
+import math
 import os
+import struct
 import tempfile
+import threading
+import time
 import logging
 from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable
+
+from cancellation import CancelToken, TurnCancelled
+
+if TYPE_CHECKING:
+    import numpy as np
 
 logger = logging.getLogger("malpyo.stt")
 
+WHISPER_SAMPLE_RATE = 16000
+
+
+@functools.lru_cache(maxsize=16)
+def _resample_filter(up: int, down: int, half_width: int = 10, beta: float = 5.0):
+    """polyphase 리샘플링용 저역 통과 FIR (Kaiser 창 sinc).
+
+    차단 주파수는 입력/출력 중 낮은 쪽의 나이퀴스트라서 44.1kHz → 16kHz면 8kHz 위를
+    걸러 접힘(aliasing)을 막는다 (scipy.signal.resample_poly와 같은 설계).
+    반환: (위상별 탭 (up, 탭 수), 필터 중심 위치)
+    """
+    import numpy as np
+
+    factor = max(up, down)
+    center = half_width * factor
+    t = np.arange(2 * center + 1) - center
+    taps = np.sinc(t / factor) * np.kaiser(len(t), beta) * (up / factor)
+    per_phase = -(-len(taps) // up)
+    taps = np.pad(taps, (0, per_phase * up - len(taps)))
+    return taps.reshape(per_phase, up).T.astype(np.float32), center
+
+
+def resample(audio: np.ndarray, rate: int, target: int = WHISPER_SAMPLE_RATE) -> np.ndarray:
+    """float32 모노 샘플을 polyphase FIR로 rate Hz → target Hz로 바꾼다."""
+    import numpy as np
+
+    g = math.gcd(rate, target)
+    up, down = target // g, rate // g
+    phases, center = _resample_filter(up, down)
+    width = phases.shape[1]
+    pad = np.zeros(width, dtype=np.float32)
+    padded = np.concatenate([pad, audio.astype(np.float32), pad])
+    n_out = -(-len(audio) * up // down)
+    out = np.empty(n_out, dtype=np.float32)
+    lags = np.arange(width)
+    # 출력 n은 업샘플 신호의 n*down 위치: 위상 (n*down) % up의 탭과 입력 창의 내적
+    for start in range(0, n_out, 8192):
+        pos = np.arange(start, min(start + 8192, n_out)) * down + center
+        window = padded[(pos // up)[:, None] - lags + width]
+        out[start:start + len(pos)] = np.einsum("ij,ij->i", window, phases[pos % up])
+    return out
+
+
+def decode_pcm_wav(buffer) -> np.ndarray | None:
+    """16-bit PCM WAV 버퍼를 Whisper 입력(16kHz 모노 float32)으로 변환한다.
+
+    buffer는 bytes 또는 memoryview(공유 메모리 등)이며, 샘플은 복사 없이
+    버퍼 위의 뷰로 읽은 뒤 float32 변환 한 번만 거친다.
+    PCM16이 아니면 None (호출자가 파일 디코딩으로 대체).
+    """
+    import numpy as np
+
+    view = memoryview(buffer).cast("B")
+    if len(view) < 12 or view[:4] != b"RIFF" or view[8:12] != b"WAVE":
+        return None
+    pos, fmt, data = 12, None, None
+    while pos + 8 <= len(view):
+        chunk_id = bytes(view[pos:pos + 4])
+        size = struct.unpack_from("<I", view, pos + 4)[0]
+        if chunk_id == b"fmt ":
+            fmt = struct.unpack_from("<HHI", view, pos + 8)   # (포맷, 채널, 샘플레이트)
+            bits = struct.unpack_from("<H", view, pos + 22)[0]
+        elif chunk_id == b"data":
+            data = (pos + 8, min(size, len(view) - pos - 8))
+            break
+        pos += 8 + size + (size & 1)
+    if fmt is None or data is None or fmt[0] != 1 or bits != 16:
+        return None
+
+    channels, rate = fmt[1], fmt[2]
+    offset, length = data
+    samples = np.frombuffer(view, dtype="<i2", count=length // 2, offset=offset)
+    audio = samples.astype(np.float32) / 32768.0
+    if channels > 1:
+        audio = audio[: len(audio) - len(audio) % channels].reshape(-1, channels).mean(axis=1)
+    if rate != WHISPER_SAMPLE_RATE and len(audio):
+        audio = resample(audio, rate)
+    return audio
+
+
+def speech_seconds(
+    samples: np.ndarray, frame_ms: int = 30, threshold_db: float = -45.0
+) -> float:
+    """16kHz 샘플에서 음성 에너지가 있는 구간의 길이(초)를 추정한다.
+
+    프레임 RMS가 절대 문턱(threshold_db dBFS)과 배경 잡음(하위 10% 프레임)의
+    2배 중 큰 값을 넘으면 음성 프레임으로 본다. 배경 잡음 기준은 클립에 조용한
+    프레임이 있을 때(하위 10%가 중앙값보다 12dB 이상 낮을 때)만 쓰고, 최대 RMS의
+    절반을 넘지 않게 한다. 앞뒤 무음 없이 딱 맞게 잘린 발화(녹음 위젯, 호출어 뒤 녹음)는
+    하위 10%도 말소리라서, 그대로 쓰면 거의 모든 프레임이 문턱 아래가 된다.
+    """
+    import numpy as np
+
+    n = WHISPER_SAMPLE_RATE * frame_ms // 1000
+    if len(samples) < n:
+        return 0.0
+    frames = samples[: len(samples) // n * n].reshape(-1, n)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    noise, median = np.percentile(rms, [10, 50])
+    relative = 0.0
+    if noise * 4 < median:
+        relative = min(float(noise) * 2.0, float(rms.max()) * 0.5)
+    threshold = max(10 ** (threshold_db / 20), relative)
+    return int(np.count_nonzero(rms > threshold)) * frame_ms / 1000
+
 
 @dataclass
 class STTResult:
@@ -21,6 +137,8 @@ class STTResult:
     language: str = "ko"
     confidence: float = 0.0
     segments: list = field(default_factory=list)
+    duration: float = 0.0      # 입력 오디오 길이(초), 알 수 없으면 0
+    rejected: str = ""         # 디코딩 전 게이트에서 걸러진 이유 ("too_short", "no_speech")
 
 
 class STTEngine:
@@ -31,28 +149,77 @@ class STTEngine:
         model_size: str = "large-v3-turbo",
         device: str = "cuda",
         compute_type: str = "float16",
+        device_index: int = 0,
+        cpu_threads: int = 0,
+        model_path: str | None = None,
+        min_duration: float = 0.4,
+        min_speech_seconds: float = 0.2,
+        energy_threshold_db: float = -45.0,
+        beam_size: int = 5,
     ) -> None:
+        """
+        Args:
+            device_index: 사용할 GPU 번호 (멀티 GPU 워커 샤딩용)
+            cpu_threads: CPU 추론 스레드 수 (0이면 라이브러리 기본값)
+            model_path: model_cache.py로 미리 준비한 로컬 모델 디렉터리.
+                주어지면 model_size 대신 이 디렉터리를 네트워크 조회 없이 불러온다.
+            min_duration: 이보다 짧은 오디오(초)는 디코딩하지 않는다 (마이크 오터치)
+            min_speech_seconds: 음성 에너지 구간이 이보다 짧으면 디코딩하지 않는다 (무음)
+            energy_threshold_db: 음성 프레임 판정 절대 문턱(dBFS)
+            beam_size: 디코딩 빔 크기 (1이면 그리디, 단계식 STT의 작은 모델용)
+        """
         self.model_size = model_size
         self.device = device
         self.compute_type = compute_type
+        self.device_index = device_index
+        self.cpu_threads = cpu_threads
+        self.model_path = model_path
+        self.min_duration = min_duration
+        self.min_speech_seconds = min_speech_seconds
+        self.energy_threshold_db = energy_threshold_db
+        self.beam_size = beam_size
         self._model = None
+        self._load_lock = threading.Lock()
+        # 콜드 스타트 측정값 (초)
+        self.timings: dict[str, float] = {}
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
 
     def _load_model(self):
         if self._model is not None:
             return
+        with self._load_lock:
+            if self._model is None:
+                self._model = self._create_model()
+
+    def _create_model(self):
         try:
+            start = time.perf_counter()
             from faster_whisper import WhisperModel
+            self.timings["import"] = time.perf_counter() - start
 
+            source = self.model_path or self.model_size
             logger.info(
                 "STT 모델 로딩: %s (device=%s, compute=%s)",
-                self.model_size, self.device, self.compute_type,
+                source, self.device, self.compute_type,
             )
-            self._model = WhisperModel(
-                self.model_size,
+            start = time.perf_counter()
+            model = WhisperModel(
+                source,
                 device=self.device,
+                device_index=self.device_index,
                 compute_type=self.compute_type,
+                cpu_threads=self.cpu_threads,
+                local_files_only=self.model_path is not None,
+            )
+            self.timings["load"] = time.perf_counter() - start
+            logger.info(
+                "STT 모델 로딩 완료 (import %.2fs, load %.2fs)",
+                self.timings["import"], self.timings["load"],
             )
-            logger.info("STT 모델 로딩 완료")
+            return model
         except ImportError:
             raise RuntimeError(
                 "faster-whisper가 설치되지 않았습니다.\n"
@@ -65,17 +232,65 @@ class STTEngine:
                 f"CUDA/cuDNN 설치를 확인하세요.\n{e}"
             ) from e
 
-    def transcribe(self, audio_data: bytes | str) -> STTResult:
-        """오디오 데이터(WAV bytes 또는 파일 경로)를 텍스트로 변환한다."""
+    def warmup(self) -> None:
+        """모델을 싣고 무음을 한 번 디코딩해 둔다 (첫 승객 턴의 초기화 지연 제거)."""
         self._load_model()
+        self.timings["first_inference"] = self.canary(seconds=1.0)
+        logger.info("STT 워밍업 완료 (첫 추론 %.2fs)", self.timings["first_inference"])
+
+    def canary(self, seconds: float = 0.25) -> float:
+        """이미 로딩된 모델로 짧은 무음을 디코딩하고 걸린 시간(초)을 반환한다.
 
+        VAD를 끄고 빔 1로 디코더까지 한 번 거치므로 상태 점검용으로 충분히 가볍다.
+        모델이 아직 없으면 로딩하지 않고 RuntimeError.
+        """
+        import numpy as np
+
+        if self._model is None:
+            raise RuntimeError("STT 모델 로딩 전")
+        start = time.perf_counter()
+        segments, _ = self._model.transcribe(
+            np.zeros(int(WHISPER_SAMPLE_RATE * seconds), dtype=np.float32),
+            language="ko", beam_size=1, vad_filter=False,
+        )
+        for _ in segments:
+            pass
+        return time.perf_counter() - start
+
+    def transcribe(
+        self,
+        audio_data: bytes | memoryview | str,
+        cancel: CancelToken | None = None,
+        on_segment: Callable[[dict], None] | None = None,
+        beam_size: int | None = None,
+    ) -> STTResult:
+        """오디오 데이터(WAV bytes/memoryview, float32 배열 또는 파일 경로)를 텍스트로 변환한다.
+
+        faster-whisper는 세그먼트를 순회할 때 디코딩하므로,
+        cancel이 주어지면 세그먼트 사이마다 확인해 남은 디코딩을 건너뛴다.
+        on_segment가 주어지면 세그먼트가 디코딩될 때마다
+        {"start", "end", "text"}로 호출한다 (부분 인식 결과 스트리밍용).
+
+        PCM 입력은 디코딩 전에 길이/음성 에너지를 확인해, 너무 짧거나 무음이면
+        모델을 돌리지 않고 rejected가 채워진 빈 결과를 바로 반환한다.
+        beam_size가 주어지면 이 호출만 그 빔 크기로 디코딩한다 (과부하 시 축소).
+        """
         audio_input = self._prepare_audio(audio_data)
+        if hasattr(audio_input, "dtype"):
+            duration = len(audio_input) / WHISPER_SAMPLE_RATE
+            rejected = self._gate(audio_input, duration)
+            if rejected:
+                logger.info("STT 디코딩 생략: %s (%.2fs)", rejected, duration)
+                return STTResult(text="", duration=duration, rejected=rejected)
+        else:
+            duration = 0.0
 
         try:
+            self._load_model()
             segments_gen, info = self._model.transcribe(
                 audio_input,
                 language="ko",
-                beam_size=5,
+                beam_size=beam_size or self.beam_size,
                 vad_filter=True,
                 vad_parameters=dict(
                     min_silence_duration_ms=500,
@@ -83,7 +298,13 @@ class STTEngine:
                 ),
             )
 
-            segments = list(segments_gen)
+            segments = []
+            for seg in segments_gen:
+                if cancel is not None and cancel.cancelled:
+                    raise TurnCancelled()
+                segments.append(seg)
+                if on_segment is not None:
+                    on_segment({"start": seg.start, "end": seg.end, "text": seg.text.strip()})
             full_text = " ".join(seg.text.strip() for seg in segments)
 
             avg_confidence = 0.0
@@ -94,6 +315,7 @@ class STTEngine:
                 text=full_text,
                 language=info.language,
                 confidence=avg_confidence,
+                duration=duration,
                 segments=[
                     {"start": s.start, "end": s.end, "text": s.text.strip()}
                     for s in segments
@@ -101,18 +323,33 @@ class STTEngine:
             )
         finally:
             # 임시 파일 정리
-            if isinstance(audio_data, (bytes, bytearray)) and isinstance(audio_input, str):
+            if not isinstance(audio_data, str) and isinstance(audio_input, str):
                 try:
                     os.unlink(audio_input)
                 except OSError:
                     pass
 
+    def _gate(self, samples: np.ndarray, duration: float) -> str:
+        """디코딩할 가치가 없는 입력이면 이유를, 아니면 빈 문자열을 반환한다."""
+        if duration < self.min_duration:
+            return "too_short"
+        if speech_seconds(samples, threshold_db=self.energy_threshold_db) < self.min_speech_seconds:
+            return "no_speech"
+        return ""
+
     @staticmethod
-    def _prepare_audio(audio_data) -> str:
-        """오디오 입력을 faster-whisper가 인식할 수 있는 파일 경로로 변환."""
-        if isinstance(audio_data, str):
+    def _prepare_audio(audio_data):
+        """오디오 입력을 faster-whisper가 인식할 수 있는 형태로 변환.
+
+        PCM WAV는 임시 파일 없이 메모리에서 바로 배열로 바꾸고,
+        그 외 포맷(압축 오디오 등)만 임시 파일을 거친다.
+        """
+        if isinstance(audio_data, str) or hasattr(audio_data, "dtype"):
             return audio_data
-        if isinstance(audio_data, (bytes, bytearray)):
+        if isinstance(audio_data, (bytes, bytearray, memoryview)):
+            audio = decode_pcm_wav(audio_data)
+            if audio is not None:
+                return audio
             tmp = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
             tmp.write(audio_data)
             tmp.close()
@@ -0,0 +1,456 @@
+"""
+stt_pool.py - 멀티 프로세스 STT 워커 풀
+
+faster-whisper 모델 복제본을 별도 프로세스마다 하나씩 띄워 GIL과
+Streamlit 스케줄링의 영향 없이 여러 세션의 음성을 동시에 인식한다.
+  - 워커마다 GPU 번호 또는 CPU 코어 집합을 지정해 고정(pinning)한다
+  - 오디오는 pickle 대신 multiprocessing.shared_memory 버퍼로 넘긴다
+    (메인 프로세스에서 한 번 쓰고, 워커는 그 버퍼 위의 뷰로 읽는다)
+  - 진행 중인 작업이 가장 적은 워커에 배분한다
+
+STTEngine.transcribe()와 같은 인터페이스이므로 MalPyoEngine(stt=...)에 그대로 넣는다.
+
+워커 지정 문자열 (MALPYO_STT_WORKERS):
+    "cuda:0,cuda:1"      GPU 0번, 1번에 워커 하나씩
+    "cpu:0-3,cpu:4-7"    CPU 코어 0~3, 4~7에 고정된 워커 둘
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FuturesTimeout
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Callable
+
+from cancellation import CancelToken, TurnCancelled
+from stt_engine import STTEngine, STTResult
+
+logger = logging.getLogger("malpyo.stt_pool")
+
+# 결과를 기다리는 동안 워커 생존 여부를 확인하는 간격(초)
+WORKER_CHECK_SECONDS = 1.0
+# 마감을 넘겨 포기한 작업이 취소 요청 뒤에도 이 시간(초) 안에 끝나지 않으면
+# 워커가 멈춘 것으로 보고 종료한다 (_reap_dead_workers가 다시 띄운다)
+HUNG_WORKER_SECONDS = 10.0
+
+
+@dataclass(frozen=True)
+class WorkerSpec:
+    """워커 하나의 장치 배치."""
+    device: str = "cpu"                    # "cpu" | "cuda"
+    device_index: int = 0                  # GPU 번호
+    cpu_cores: tuple[int, ...] = ()        # 고정할 CPU 코어 (비우면 고정하지 않음)
+
+    @classmethod
+    def parse(cls, text: str) -> "WorkerSpec":
+        """"cuda:1" / "cpu:0-3" / "cpu:0+2" 형식을 해석한다."""
+        device, _, target = text.strip().partition(":")
+        if device == "cuda":
+            return cls(device="cuda", device_index=int(target or 0))
+        cores: list[int] = []
+        for part in filter(None, target.split("+")):
+            lo, _, hi = part.partition("-")
+            cores.extend(range(int(lo), int(hi or lo) + 1))
+        return cls(device="cpu", cpu_cores=tuple(cores))
+
+
+class _SharedCancel:
+    """워커 쪽 취소 확인용: 공유 값에 현재 작업 번호가 적히면 취소된 것."""
+
+    def __init__(self, flag, job_id: int) -> None:
+        self._flag = flag
+        self._job_id = job_id
+
+    @property
+    def cancelled(self) -> bool:
+        return self._flag.value == self._job_id
+
+
+def _worker_main(index, spec, model_kwargs, requests, responses, cancel_flag) -> None:
+    """워커 프로세스 본체: 모델을 한 번 싣고 작업을 처리한다."""
+    try:
+        if spec.cpu_cores and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, spec.cpu_cores)
+        engine = STTEngine(
+            device=spec.device,
+            device_index=spec.device_index,
+            cpu_threads=len(spec.cpu_cores),
+            **model_kwargs,
+        )
+        engine.warmup()
+    except Exception as e:
+        responses.put(("failed", index, str(e)))
+        return
+    responses.put(("ready", index, None))
+
+    while True:
+        job = requests.get()
+        if job is None:
+            return
+        job_id, shm_name, size, beam_size = job
+        shm = shared_memory.SharedMemory(name=shm_name)
+        audio = shm.buf[:size]
+        try:
+            result = engine.transcribe(
+                audio,
+                cancel=_SharedCancel(cancel_flag, job_id),
+                on_segment=lambda seg: responses.put(("segment", job_id, seg)),
+                beam_size=beam_size,
+            )
+            responses.put(("done", job_id, result))
+        except TurnCancelled:
+            responses.put(("cancelled", job_id, None))
+        except Exception as e:
+            responses.put(("error", job_id, str(e)))
+        finally:
+            audio.release()
+            shm.close()
+
+
+@dataclass
+class _Job:
+    future: Future
+    worker: int
+    shm: shared_memory.SharedMemory
+    on_segment: Callable[[dict], None] | None = None
+    abandoned: float | None = None     # 마감을 넘겨 포기한 시각 (time.monotonic)
+
+
+class STTWorkerPool:
+    """여러 프로세스의 STT 모델 복제본에 작업을 분산한다."""
+
+    def __init__(
+        self,
+        workers: list[WorkerSpec],
+        model_size: str = "large-v3-turbo",
+        compute_type: str | None = None,
+        model_path: str | None = None,
+    ) -> None:
+        """
+        Args:
+            workers: 워커별 장치 배치
+            compute_type: None이면 GPU는 float16, CPU는 int8
+            model_path: 워커들이 공유할 로컬 모델 디렉터리 (model_cache.py)
+        """
+        if not workers:
+            raise ValueError("STT 워커가 하나 이상 필요합니다")
+        self.specs = list(workers)
+        self.model_size = model_size
+        self.compute_type = compute_type
+        self.model_path = model_path
+
+        self._ctx = mp.get_context("spawn")
+        self._responses = self._ctx.Queue()
+        self._procs: list = [None] * len(self.specs)
+        self._requests: list = [None] * len(self.specs)
+        self._cancel_flags = [self._ctx.Value("q", 0) for _ in self.specs]
+        self._load = [0] * len(self.specs)         # 워커별 진행 중인 작업 수
+        self._ready = [threading.Event() for _ in self.specs]
+        self._failed = [False] * len(self.specs)
+        self._jobs: dict[int, _Job] = {}
+        self._job_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._started = False
+        self._collector: threading.Thread | None = None
+
+    @classmethod
+    def from_spec(cls, text: str, **kwargs) -> "STTWorkerPool":
+        return cls([WorkerSpec.parse(part) for part in text.split(",") if part.strip()], **kwargs)
+
+    # ─────────────────────────────────────────────────────────
+    # 수명 주기
+    # ─────────────────────────────────────────────────────────
+    def start(self) -> None:
+        """워커 프로세스를 띄우고 모두 모델을 실을 때까지 기다린다."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            for i in range(len(self.specs)):
+                self._spawn(i)
+            self._collector = threading.Thread(
+                target=self._collect, name="malpyo-stt-collector", daemon=True
+            )
+            self._collector.start()
+        for i, event in enumerate(self._ready):
+            # 모델 로딩 중 프로세스가 죽어도 기다리다 멈추지 않도록 생존 여부를 함께 확인
+            while not event.wait(WORKER_CHECK_SECONDS):
+                if not self._procs[i].is_alive():
+                    event.set()
+        if not any(p is not None and p.is_alive() for p in self._procs):
+            raise RuntimeError("STT 워커를 하나도 시작하지 못했습니다")
+
+    # STTEngine과 같은 지연 로딩/워밍업 훅 (워커는 시작할 때 워밍업까지 마친다)
+    _load_model = start
+    warmup = start
+
+    @property
+    def loaded(self) -> bool:
+        return any(event.is_set() for event in self._ready)
+
+    def canary(self) -> bool | str:
+        """상태 점검용: 준비된 워커가 하나라도 살아 있으면 정상 (워커 큐는 건드리지 않는다)."""
+        alive = sum(1 for w in self.stats() if w["alive"])
+        return True if alive and self.loaded else f"준비된 워커 없음 ({alive}/{len(self.specs)})"
+
+    def close(self) -> None:
+        with self._lock:
+            for q in self._requests:
+                if q is not None:
+                    q.put(None)
+        for p in self._procs:
+            if p is not None:
+                p.join(timeout=5)
+        self._responses.put(("stop", 0, None))
+
+    def stats(self) -> list[dict]:
+        with self._lock:
+            return [
+                {
+                    "device": f"{s.device}:{s.device_index}" if s.device == "cuda" else f"cpu{list(s.cpu_cores)}",
+                    "alive": p is not None and p.is_alive(),
+                    "inflight": load,
+                }
+                for s, p, load in zip(self.specs, self._procs, self._load)
+            ]
+
+    # ─────────────────────────────────────────────────────────
+    # 인식
+    # ─────────────────────────────────────────────────────────
+    def transcribe(
+        self,
+        audio_data: bytes,
+        cancel: CancelToken | None = None,
+        on_segment: Callable[[dict], None] | None = None,
+        beam_size: int | None = None,
+    ) -> STTResult:
+        """가장 한가한 워커에서 인식한다 (STTEngine.transcribe와 같은 인터페이스).
+
+        cancel.deadline(턴 마감)이 있으면 그때까지만 기다리고 TimeoutError를 던진다.
+        살아 있지만 멈춘 워커에 턴이 묶이지 않도록 하기 위함이다.
+        """
+        deadline = cancel.deadline if cancel is not None else None
+        job_id, future = self._submit(audio_data, on_segment, beam_size)
+
+        def _cancel() -> None:
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    self._cancel_flags[job.worker].value = job_id
+
+        if cancel is not None:
+            cancel.add_callback(_cancel)
+        try:
+            while True:
+                wait = WORKER_CHECK_SECONDS
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        self._abandon(job_id)
+                        raise TimeoutError("STT 워커가 턴 마감까지 응답하지 않았습니다")
+                try:
+                    result = future.result(timeout=wait)
+                    break
+                except FuturesTimeout:
+                    self._reap_dead_workers()
+        finally:
+            if cancel is not None:
+                cancel.remove_callback(_cancel)
+        if result is None:
+            raise TurnCancelled()
+        return result
+
+    def _submit(
+        self,
+        audio_data: bytes,
+        on_segment: Callable[[dict], None] | None = None,
+        beam_size: int | None = None,
+    ) -> tuple[int, Future]:
+        """오디오를 공유 메모리에 한 번 쓰고 워커에 작업 번호만 넘긴다."""
+        self.start()
+        self._reap_dead_workers()
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(audio_data)))
+        shm.buf[:len(audio_data)] = audio_data
+        future: Future = Future()
+        try:
+            while True:
+                with self._lock:
+                    worker = self._pick_worker_locked()
+                    if worker is not None:
+                        job_id = next(self._job_ids)
+                        self._jobs[job_id] = _Job(future, worker, shm, on_segment)
+                        self._load[worker] += 1
+                        self._requests[worker].put((job_id, shm.name, len(audio_data), beam_size))
+                        return job_id, future
+                    starting = any(
+                        p is not None and p.is_alive() and not self._ready[i].is_set()
+                        for i, p in enumerate(self._procs)
+                    )
+                if not starting:
+                    raise RuntimeError("사용 가능한 STT 워커가 없습니다")
+                # 재시작된 워커가 모델을 싣는 중이면 잠시 기다린다
+                time.sleep(0.1)
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+
+    # ─────────────────────────────────────────────────────────
+    # 내부
+    # ─────────────────────────────────────────────────────────
+    def _spawn(self, i: int) -> None:
+        spec = self.specs[i]
+        compute_type = self.compute_type or ("float16" if spec.device == "cuda" else "int8")
+        self._requests[i] = self._ctx.Queue()
+        self._ready[i].clear()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(
+                i, spec,
+                {"model_size": self.model_size, "compute_type": compute_type,
+                 "model_path": self.model_path},
+                self._requests[i], self._responses, self._cancel_flags[i],
+            ),
+            name=f"malpyo-stt-{i}",
+            daemon=True,
+        )
+        proc.start()
+        self._procs[i] = proc
+        logger.info("STT 워커 %d 시작: %s (pid=%s)", i, spec, proc.pid)
+
+    def _abandon(self, job_id: int) -> None:
+        """마감을 넘긴 작업을 포기한다: 워커에 취소를 요청하고 부분 결과 전달을 끊는다.
+
+        작업은 워커가 응답할 때까지 남겨 두어 공유 메모리와 부하 계산은 _collect가 정리한다.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.abandoned = time.monotonic()
+            job.on_segment = None
+            self._cancel_flags[job.worker].value = job_id
+        logger.warning("STT 작업 %d: 워커 %d가 마감까지 응답 없음, 포기", job_id, job.worker)
+
+    def _reap_dead_workers(self) -> None:
+        """죽은 워커의 작업을 실패 처리하고 워커를 다시 띄운다.
+
+        포기한 작업을 HUNG_WORKER_SECONDS 넘게 붙잡고 있는 워커는 멈춘 것으로 보고 종료한다.
+        """
+        now = time.monotonic()
+        with self._lock:
+            hung = {
+                job.worker for job in self._jobs.values()
+                if job.abandoned is not None and now - job.abandoned > HUNG_WORKER_SECONDS
+            }
+            for i in hung:
+                if self._procs[i] is not None and self._procs[i].is_alive():
+                    logger.error("STT 워커 %d가 응답하지 않아 종료", i)
+                    self._procs[i].terminate()
+                    self._procs[i].join(timeout=5)
+        with self._lock:
+            # 모델 로딩에 실패한 워커는 설정 문제이므로 다시 띄우지 않는다
+            dead = [i for i, p in enumerate(self._procs)
+                    if p is not None and not p.is_alive() and self._ready[i].is_set()
+                    and not self._failed[i]]
+            lost = [(jid, job) for jid, job in self._jobs.items() if job.worker in dead]
+            for jid, job in lost:
+                del self._jobs[jid]
+            for i in dead:
+                logger.error("STT 워커 %d 종료됨 (exit=%s), 다시 시작", i, self._procs[i].exitcode)
+                self._load[i] = 0
+                self._spawn(i)
+        for _, job in lost:
+            job.shm.close()
+            job.shm.unlink()
+            job.future.set_exception(RuntimeError("STT 워커가 비정상 종료되었습니다"))
+
+    def _pick_worker_locked(self) -> int | None:
+        ready = [i for i, p in enumerate(self._procs)
+                 if p is not None and p.is_alive() and self._ready[i].is_set()]
+        if not ready:
+            return None
+        return min(ready, key=lambda i: self._load[i])
+
+    def _collect(self) -> None:
+        """워커 응답을 받아 Future를 완료시킨다 (수집 스레드)."""
+        while True:
+            kind, key, payload = self._responses.get()
+            if kind == "stop":
+                return
+            if kind in ("ready", "failed"):
+                if kind == "failed":
+                    logger.error("STT 워커 %d 모델 로딩 실패: %s", key, payload)
+                    self._failed[key] = True
+                self._ready[key].set()
+                continue
+
+            with self._lock:
+                job = self._jobs.get(key) if kind == "segment" else self._jobs.pop(key, None)
+                if job is not None and kind != "segment":
+                    self._load[job.worker] -= 1
+            if job is None:
+                continue
+            if kind == "segment":
+                if job.on_segment is not None:
+                    job.on_segment(payload)
+                continue
+
+            job.shm.close()
+            job.shm.unlink()
+            if kind == "done":
+                job.future.set_result(payload)
+            elif kind == "cancelled":
+                job.future.set_result(None)
+            else:
+                job.future.set_exception(RuntimeError(f"STT 워커 오류: {payload}"))
+
+
+def build_stt(vocabulary: list[str] | None = None):
+    """환경 변수 설정으로 STT를 만든다.
+
+    MALPYO_STT_WORKERS가 있으면 멀티 프로세스 워커 풀, 없으면 프로세스 내 STTEngine.
+    MALPYO_STT_MODEL_DIR이 있으면 model_cache.py로 준비한 로컬 모델을 쓴다.
+    MALPYO_STT_FAST_MODEL이 있으면 그 작은 모델을 먼저 돌리는 CascadeSTT로 감싼다
+    (vocabulary: 승격 판단용 키오스크 어휘).
+    """
+    model_size = os.getenv("MALPYO_STT_MODEL", "large-v3-turbo")
+    model_path = os.getenv("MALPYO_STT_MODEL_DIR") or None
+    device = os.getenv("MALPYO_DEVICE", "cuda")
+    compute_type = os.getenv("MALPYO_STT_COMPUTE_TYPE", "float16")
+    spec = os.getenv("MALPYO_STT_WORKERS")
+    if spec:
+        accurate = STTWorkerPool.from_spec(spec, model_size=model_size, model_path=model_path)
+    else:
+        accurate = STTEngine(
+            model_size=model_size,
+            device=device,
+            compute_type=compute_type,
+            model_path=model_path,
+        )
+
+    fast_model = os.getenv("MALPYO_STT_FAST_MODEL")
+    if not fast_model:
+        return accurate
+    from stt_cascade import CascadeSTT
+
+    fast_device = os.getenv("MALPYO_STT_FAST_DEVICE", device)
+    fast = STTEngine(
+        model_size=fast_model,
+        device=fast_device,
+        compute_type=compute_type if fast_device == device else "int8",
+        model_path=os.getenv("MALPYO_STT_FAST_MODEL_DIR") or None,
+        beam_size=1,
+    )
+    return CascadeSTT(
+        fast,
+        accurate,
+        min_confidence=float(os.getenv("MALPYO_STT_ESCALATE_BELOW", "-0.5")),
+        vocabulary=vocabulary,
+    )
@@ -0,0 +1,140 @@
+"""
+test_booking_journal.py - 예매 저널의 기록/복구 테스트
+
+    python -m pytest test_booking_journal.py
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import booking_journal
+from booking_journal import Booking, BookingJournal, _segments, read_journal, recover
+
+
+def make_booking(i: int) -> Booking:
+    return Booking(
+        booking_id=f"bk{i:04d}", ts=1700000000.0 + i, session_id="s1", mode="voice",
+        date="2026-10-19", departure="서울", arrival="부산", time="14:00", passengers=2,
+        discounts=["normal", "child"], payment="card",
+        base_total=46000, discount_total=11500, final=34500,
+    )
+
+
+def write_bookings(directory: Path, ids: range, **kwargs) -> None:
+    journal = BookingJournal(directory, interval=0.01, **kwargs)
+    for i in ids:
+        journal.append(make_booking(i))
+        assert journal.sync(timeout=5)
+    journal.close()
+
+
+def ids(directory: Path) -> list[str]:
+    return [b.booking_id for b in read_journal(directory)]
+
+
+def assert_all_lines_valid(directory: Path) -> None:
+    for seg in _segments(directory):
+        with open(seg, "rb") as f:
+            assert all(Booking.decode(line) is not None for line in f), seg.name
+
+
+def test_roundtrip(tmp_path):
+    write_bookings(tmp_path, range(3))
+    assert list(read_journal(tmp_path)) == [make_booking(i) for i in range(3)]
+
+
+def test_torn_last_line_is_cut_on_open(tmp_path):
+    write_bookings(tmp_path, range(3))
+    seg = _segments(tmp_path)[-1]
+    whole = seg.stat().st_size
+    torn = make_booking(3).encode()[:-7]
+    with open(seg, "ab") as f:
+        f.write(torn)
+
+    # 다시 열면 잘린 꼬리를 지우고, 새 레코드는 온전한 줄 뒤에 붙는다
+    write_bookings(tmp_path, range(4, 5))
+    assert ids(tmp_path) == ["bk0000", "bk0001", "bk0002", "bk0004"]
+    assert seg.stat().st_size == whole + len(make_booking(4).encode())
+    assert_all_lines_valid(tmp_path)
+
+
+def test_corrupted_middle_line_is_kept_and_skipped(tmp_path):
+    write_bookings(tmp_path, range(3))
+    seg = _segments(tmp_path)[-1]
+    lines = seg.read_bytes().splitlines(keepends=True)
+    lines[1] = lines[1].replace(b"bk0001", b"bk9999")     # CRC 불일치
+    seg.write_bytes(b"".join(lines))
+
+    # 중간 줄을 잘라 내면 뒤의 온전한 레코드까지 잃으므로 그대로 둔다
+    assert recover(seg) == (2, 0)
+    assert ids(tmp_path) == ["bk0000", "bk0002"]
+
+
+def test_segment_rollover(tmp_path):
+    line = len(make_booking(0).encode())
+    write_bookings(tmp_path, range(5), segment_bytes=line * 2)
+    segments = _segments(tmp_path)
+    assert [s.name for s in segments] == ["bk-000001.log", "bk-000002.log", "bk-000003.log"]
+    assert all(s.stat().st_size <= line * 2 for s in segments)
+
+    # 다시 열면 마지막 세그먼트에 이어 쓴다
+    write_bookings(tmp_path, range(5, 7), segment_bytes=line * 2)
+    assert ids(tmp_path) == [f"bk{i:04d}" for i in range(7)]
+    assert len(_segments(tmp_path)) == 4
+
+
+class TornWrite:
+    """절반만 쓰고 OSError를 내는 파일 (디스크 가득 참 흉내)."""
+
+    def __init__(self, f) -> None:
+        self._f = f
+
+    def write(self, data: bytes) -> int:
+        self._f.write(data[: len(data) // 2])
+        self._f.flush()
+        raise OSError(28, "No space left on device")
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+
+def test_sync_after_failed_write(tmp_path):
+    journal = BookingJournal(tmp_path, interval=0.01)
+    journal.append(make_booking(0))
+    assert journal.sync(timeout=5)
+
+    journal._file = TornWrite(journal._file)
+    seq = journal.append(make_booking(1))
+    # 실패한 묶음도 기다림은 끝난다 (예매 흐름을 막지 않음)
+    assert journal.sync(seq, timeout=5)
+    assert journal.stats()["failed"] == 1
+
+    # 잘린 바이트는 지워졌으므로 다음 묶음은 온전한 줄 뒤에 붙는다
+    journal.append(make_booking(2))
+    assert journal.sync(timeout=5)
+    journal.close()
+    assert journal.stats()["failed"] == 1
+    assert ids(tmp_path) == ["bk0000", "bk0002"]
+    assert_all_lines_valid(tmp_path)
+
+
+def test_sync_after_failed_fsync(tmp_path, monkeypatch):
+    journal = BookingJournal(tmp_path, interval=0.01)
+    calls = []
+
+    def failing_fsync(fd):
+        calls.append(fd)
+        if len(calls) == 1:
+            raise OSError(5, "Input/output error")
+
+    monkeypatch.setattr(booking_journal.os, "fsync", failing_fsync)
+    journal.append(make_booking(0))
+    assert journal.sync(timeout=5)
+    journal.append(make_booking(1))
+    assert journal.sync(timeout=5)
+    journal.close()
+
+    # fsync가 실패한 묶음은 미기록으로 처리했으므로 파일에도 남기지 않는다
+    assert journal.stats()["failed"] == 1
+    assert ids(tmp_path) == ["bk0001"]
@@ -0,0 +1,75 @@
+"""
+test_circuit_breaker.py - 서킷 브레이커 상태 전이 테스트
+
+    python -m pytest test_circuit_breaker.py
+"""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from cancellation import CancelToken
+from circuit_breaker import STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN, CircuitBreaker
+from engine import MalPyoEngine
+from llm_engine import LLMResult
+
+
+def tripped_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker(min_calls=2, cooldown_seconds=0.0)
+    breaker.record(False, 0.1)
+    breaker.record(False, 0.1)
+    assert breaker.state == STATE_OPEN
+    return breaker
+
+
+class StubLLM:
+    def __init__(self, *results: LLMResult) -> None:
+        self.results = list(results)
+
+    def parse(self, text, page, context, timeout=None, cancel=None) -> LLMResult:
+        return self.results.pop(0)
+
+
+def call_llm(engine, text: str = "카드요") -> LLMResult:
+    return MalPyoEngine._call_llm(engine, text, "payment", None, 5.0, CancelToken())
+
+
+def test_half_open_allows_one_trial():
+    breaker = tripped_breaker()
+    assert breaker.allow()
+    assert breaker.state == STATE_HALF_OPEN
+    assert not breaker.allow()
+    breaker.record(True, 0.1)
+    assert breaker.state == STATE_CLOSED
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens():
+    breaker = tripped_breaker()
+    assert breaker.allow()
+    breaker.record(False, 0.1)
+    assert breaker.state == STATE_OPEN
+
+
+def test_cancelled_trial_frees_the_slot():
+    breaker = tripped_breaker()
+    engine = SimpleNamespace(
+        breaker=breaker,
+        llm=StubLLM(LLMResult(success=False, cancelled=True), LLMResult(raw_json={"payment": "card"})),
+    )
+    # 시험 호출 중 "다시 말하기"로 취소
+    assert breaker.allow()
+    assert call_llm(engine).cancelled
+    assert breaker.state == STATE_HALF_OPEN
+
+    # 다음 턴이 다시 시험할 수 있고, 성공하면 회로가 닫힌다
+    assert breaker.allow()
+    assert call_llm(engine).success
+    assert breaker.state == STATE_CLOSED
+
+
+def test_release_trial_outside_half_open_is_noop():
+    breaker = CircuitBreaker()
+    breaker.release_trial()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.allow()
@@ -0,0 +1,64 @@
+"""
+test_rule_parser.py - 규칙 파서(축소 모드) 테스트
+
+    python -m pytest test_rule_parser.py
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from rule_parser import RuleParser
+
+parser = RuleParser()
+
+
+def discounts(text: str, passengers: int) -> list[str]:
+    return parser.parse(text, "discount", {"passengers": passengers}).raw_json["discounts"]
+
+
+@pytest.mark.parametrize(
+    ("text", "passengers", "expected"),
+    [
+        ("어른 하나 아이 하나", 2, ["normal", "child"]),
+        ("어른 하나, 중학생 하나, 할머니", 3, ["normal", "youth", "senior"]),
+        ("경로 하나, 장애인 하나", 2, ["senior", "disabled"]),
+        ("할머니랑 아이", 2, ["senior", "child"]),
+        # 같은 할인이 반복되면 언급마다 한 명씩
+        ("어른 하나 아이 하나 아이 하나", 3, ["normal", "child", "child"]),
+        ("아이 하나 어른 하나 아이 하나", 3, ["child", "normal", "child"]),
+        # 말한 인원만큼
+        ("아이 둘", 2, ["child", "child"]),
+        ("아이 셋이요", 3, ["child", "child", "child"]),
+        ("어른 두 명 아이 한 명", 3, ["normal", "normal", "child"]),
+        ("65세 이상 어르신 한 분이랑 학생 2명", 3, ["senior", "youth", "youth"]),
+        # 한 사람을 꾸미는 말은 한 번만
+        ("65세 이상 어르신 한 분", 1, ["senior"]),
+        ("초등학생 하나", 1, ["child"]),
+        ("중학생 하나 초등학생 하나", 2, ["youth", "child"]),
+        ("모두 학생이요", 2, ["youth", "youth"]),
+    ],
+)
+def test_discounts_in_mention_order(text, passengers, expected):
+    assert discounts(text, passengers) == expected
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("서울에서 부산 두 명", 2),
+        ("3명 부산행", 3),
+        ("이거 부산 가는 거 세 명", 3),
+        # 지시어/다른 낱말 속 글자는 수사가 아니다
+        ("이분 서울에서 부산까지", None),
+        ("회사 사람이랑 대전 가요", None),
+    ],
+)
+def test_passengers_need_a_counter(text, expected):
+    assert parser.parse(text, "booking").raw_json["passengers"] == expected
+
+
+def test_time_needs_a_numeral():
+    assert parser.parse("서울에서 부산 두 시", "booking").raw_json["time"] == "14:00"
+    assert parser.parse("열두 시 대구", "booking").raw_json["time"] == "12:00"
+    assert parser.parse("시청 앞에서 부산", "booking").raw_json["time"] is None
@@ -0,0 +1,340 @@
+"""
+traffic.py - 실제 트래픽 녹화 + 재생(리플레이) 도구 (선택)
+
+키오스크가 실제로 받은 발화로 성능 변경을 검증하기 위해, 켜 두면 턴마다
+오디오(16kHz 모노로 줄여 zlib 압축), 페이지, 컨텍스트, 단계별 출력과 소요 시간을
+로컬 아카이브에 덧붙여 기록한다.
+
+아카이브 구성 (추가 전용, 용량 상한):
+    seg-000001.bin          레코드들: [헤더 "<4sII" (MAGIC, 메타 길이, 오디오 길이)][메타 JSON][압축 오디오]
+    seg-000001.idx.jsonl    세그먼트 인덱스: 레코드당 한 줄 (오프셋 + 메타)
+세그먼트가 segment_bytes를 넘으면 새 세그먼트를 열고, 전체가 max_bytes를 넘으면
+가장 오래된 세그먼트(와 그 인덱스)를 지운다.
+
+리플레이:
+    python traffic.py list captures/
+    python traffic.py replay captures/ --speed 0            # 간격 없이 연속 재생
+    python traffic.py replay captures/ --speed 2 --limit 200  # 원래 간격의 2배속
+    python traffic.py replay captures/ --remote http://gpu-host:8700
+엔진 설정은 추론 서버와 같은 환경 변수(MALPYO_*, OLLAMA_*)를 따르며,
+턴마다 파싱 슬롯 차이와 단계별 지연 변화를 출력하고 마지막에 요약한다.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import struct
+import sys
+import threading
+import time
+import uuid
+import wave
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+
+if TYPE_CHECKING:
+    from engine import PipelineResult
+
+logger = logging.getLogger("malpyo.traffic")
+
+MAGIC = b"MPTR"
+_HEADER = struct.Struct("<4sII")
+
+
+def compact_audio(audio_bytes: bytes) -> bytes:
+    """PCM WAV는 Whisper 입력 형식(16kHz 모노 16-bit)으로 줄인 뒤 zlib 압축한다.
+
+    STT는 어차피 16kHz 모노로 변환해 쓰므로 재생 결과에는 영향이 없다.
+    PCM WAV가 아니면 원본을 그대로 압축한다.
+    """
+    from stt_engine import WHISPER_SAMPLE_RATE, decode_pcm_wav
+
+    samples = decode_pcm_wav(audio_bytes)
+    if samples is not None:
+        import numpy as np
+
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(WHISPER_SAMPLE_RATE)
+            w.writeframes((np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes())
+        audio_bytes = buf.getvalue()
+    return zlib.compress(audio_bytes, 6)
+
+
+@dataclass
+class CapturedTurn:
+    """아카이브의 턴 하나 (인덱스 한 줄)."""
+    meta: dict
+    segment: Path
+    offset: int
+
+    @property
+    def audio(self) -> bytes:
+        with open(self.segment, "rb") as f:
+            f.seek(self.offset)
+            magic, meta_len, audio_len = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"손상된 레코드: {self.segment}@{self.offset}")
+            f.seek(meta_len, os.SEEK_CUR)
+            return zlib.decompress(f.read(audio_len))
+
+
+class TrafficRecorder:
+    """턴을 추가 전용 세그먼트 아카이브에 기록한다 (기록은 백그라운드 스레드에서)."""
+
+    def __init__(
+        self,
+        directory: str | Path,
+        max_bytes: int = 512 * 1024 * 1024,
+        segment_bytes: int = 32 * 1024 * 1024,
+    ) -> None:
+        """
+        Args:
+            directory: 아카이브 디렉터리
+            max_bytes: 아카이브 전체 용량 상한 (새 세그먼트를 열 때 넘으면 오래된
+                세그먼트부터 삭제하므로 실제 최대치는 max_bytes + segment_bytes)
+            segment_bytes: 세그먼트 파일 하나의 크기
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # 압축/쓰기는 턴 응답을 늦추지 않도록 별도 스레드 하나에서 순서대로
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="malpyo-capture")
+        segments = _segments(self.directory)
+        self._segment_no = int(segments[-1].stem.split("-")[1]) if segments else 0
+        if not segments:
+            self._open_new_segment()
+
+    @classmethod
+    def from_env(cls) -> "TrafficRecorder | None":
+        """MALPYO_CAPTURE_DIR이 설정되어 있으면 녹화기를 만든다 (MALPYO_CAPTURE_MB: 용량 상한)."""
+        directory = os.getenv("MALPYO_CAPTURE_DIR")
+        if not directory:
+            return None
+        return cls(directory, max_bytes=int(os.getenv("MALPYO_CAPTURE_MB", "512")) * 1024 * 1024)
+
+    def record(
+        self, audio_bytes: bytes, page: str, context: dict | None, result: PipelineResult
+    ) -> None:
+        """턴 하나를 기록 대기열에 넣는다 (즉시 반환)."""
+        meta = {
+            "id": uuid.uuid4().hex,
+            "ts": time.time(),
+            "page": page,
+            "context": context or {},
+            "recognized_text": result.recognized_text,
+            "parsed": result.parsed,
+            "reply_text": result.reply_text,
+            "success": result.success,
+            "degraded": result.degraded,
+            "parser": result.parser,
+            "admission": result.admission,
+            "error": result.error,
+            "timings": dict(result.timings),
+        }
+        self._writer.submit(self._write, bytes(audio_bytes), meta)
+
+    def flush(self) -> None:
+        """대기 중인 기록이 모두 쓰일 때까지 기다린다."""
+        self._writer.submit(lambda: None).result()
+
+    def _write(self, audio_bytes: bytes, meta: dict) -> None:
+        try:
+            audio = compact_audio(audio_bytes)
+            meta["audio_bytes"] = len(audio)
+            meta_blob = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+            with self._lock:
+                seg = self._segment_path()
+                if seg.exists() and seg.stat().st_size >= self.segment_bytes:
+                    self._open_new_segment()
+                    seg = self._segment_path()
+                with open(seg, "ab") as f:
+                    offset = f.tell()
+                    f.write(_HEADER.pack(MAGIC, len(meta_blob), len(audio)))
+                    f.write(meta_blob)
+                    f.write(audio)
+                # 인덱스 줄은 레코드를 다 쓴 뒤에 추가 (인덱스에 있으면 레코드는 온전하다)
+                with open(seg.with_suffix(".idx.jsonl"), "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"offset": offset, **meta}, ensure_ascii=False) + "\n")
+        except Exception as e:
+            logger.warning("트래픽 기록 실패: %s", e)
+
+    def _segment_path(self) -> Path:
+        return self.directory / f"seg-{self._segment_no:06d}.bin"
+
+    def _open_new_segment(self) -> None:
+        self._segment_no += 1
+        self._segment_path().touch()
+        self._enforce_cap()
+
+    def _enforce_cap(self) -> None:
+        segments = _segments(self.directory)
+        total = sum(p.stat().st_size for p in segments)
+        for old in segments[:-1]:
+            if total <= self.max_bytes:
+                break
+            total -= old.stat().st_size
+            old.unlink()
+            old.with_suffix(".idx.jsonl").unlink(missing_ok=True)
+            logger.info("트래픽 아카이브 용량 초과, 오래된 세그먼트 삭제: %s", old.name)
+
+
+def _segments(directory: Path) -> list[Path]:
+    return sorted(directory.glob("seg-*.bin"))
+
+
+def read_archive(directory: str | Path) -> Iterator[CapturedTurn]:
+    """아카이브의 턴을 기록 순서대로 읽는다."""
+    for seg in _segments(Path(directory)):
+        index = seg.with_suffix(".idx.jsonl")
+        if not index.exists():
+            continue
+        with open(index, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                meta = json.loads(line)
+                yield CapturedTurn(meta=meta, segment=seg, offset=meta.pop("offset"))
+
+
+# ─────────────────────────────────────────────────────────────
+# 리플레이
+# ─────────────────────────────────────────────────────────────
+def diff_slots(before: dict, after: dict) -> dict[str, tuple]:
+    """파싱 슬롯 차이 {키: (이전 값, 새 값)}."""
+    return {
+        key: (before.get(key), after.get(key))
+        for key in sorted(set(before) | set(after))
+        if before.get(key) != after.get(key)
+    }
+
+
+async def replay(
+    turns: list[CapturedTurn], engine, speed: float = 0.0, concurrency: int = 4
+) -> list[tuple[CapturedTurn, PipelineResult]]:
+    """아카이브의 턴을 engine(MalPyoEngine 또는 RemoteEngine)으로 다시 처리한다.
+
+    speed가 0이면 간격 없이(동시 concurrency개), 양수면 원래 도착 간격을 speed배로
+    줄여 재생한다 (1.0 = 원래 속도, 앞 턴이 끝나지 않아도 다음 턴이 들어간다).
+    """
+    semaphore = asyncio.Semaphore(concurrency if speed <= 0 else len(turns) or 1)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    origin = turns[0].meta["ts"] if turns else 0.0
+
+    async def run(turn: CapturedTurn) -> tuple[CapturedTurn, PipelineResult]:
+        if speed > 0:
+            await asyncio.sleep(max(0.0, start + (turn.meta["ts"] - origin) / speed - loop.time()))
+        async with semaphore:
+            result = await engine.aprocess(turn.audio, turn.meta["page"], turn.meta["context"])
+            return turn, result
+
+    return await asyncio.gather(*(run(turn) for turn in turns))
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def report(results: list[tuple[CapturedTurn, PipelineResult]]) -> dict:
+    """턴별 차이를 출력하고 요약 통계를 반환한다."""
+    changed = 0
+    before_total: list[float] = []
+    after_total: list[float] = []
+    for turn, result in results:
+        meta = turn.meta
+        slots = diff_slots(meta.get("parsed") or {}, result.parsed or {})
+        old_t, new_t = meta.get("timings", {}), result.timings
+        before_total.append(old_t.get("total", 0.0))
+        after_total.append(new_t.get("total", 0.0))
+        latency = " ".join(
+            f"{stage} {old_t.get(stage, 0):.2f}→{new_t.get(stage, 0):.2f}s"
+            for stage in ("stt", "llm", "tts", "total")
+            if stage in old_t or stage in new_t
+        )
+        if slots or meta.get("recognized_text") != result.recognized_text:
+            changed += 1
+            print(f"[변경] {meta['id'][:8]} {meta['page']} | {latency}")
+            if meta.get("recognized_text") != result.recognized_text:
+                print(f"    인식: {meta.get('recognized_text')!r} → {result.recognized_text!r}")
+            for key, (old, new) in slots.items():
+                print(f"    {key}: {old!r} → {new!r}")
+        else:
+            print(f"[동일] {meta['id'][:8]} {meta['page']} | {latency}")
+
+    summary = {
+        "turns": len(results),
+        "changed": changed,
+        "p50_before": _percentile(before_total, 0.5),
+        "p50_after": _percentile(after_total, 0.5),
+        "p95_before": _percentile(before_total, 0.95),
+        "p95_after": _percentile(after_total, 0.95),
+    }
+    print(
+        f"\n{summary['turns']}턴 중 결과 변경 {changed}건 | "
+        f"p50 {summary['p50_before']:.2f}→{summary['p50_after']:.2f}s, "
+        f"p95 {summary['p95_before']:.2f}→{summary['p95_after']:.2f}s"
+    )
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="말표 트래픽 아카이브 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("list", help="아카이브 목록")
+    p.add_argument("archive")
+    p.add_argument("--page", default=None, help="이 페이지의 턴만 표시")
+
+    p = sub.add_parser("replay", help="아카이브의 턴을 다시 처리하고 결과/지연을 비교")
+    p.add_argument("archive")
+    p.add_argument("--speed", type=float, default=0.0, help="0: 간격 없이, 1: 원래 속도, 2: 2배속")
+    p.add_argument("--limit", type=int, default=0)
+    p.add_argument("--page", default=None, help="이 페이지의 턴만 재생")
+    p.add_argument("--concurrency", type=int, default=4)
+    p.add_argument("--remote", default=None, help="추론 서버 주소 (없으면 로컬 엔진)")
+    args = parser.parse_args()
+
+    turns = [t for t in read_archive(args.archive) if args.page in (None, t.meta["page"])]
+    if args.command == "list":
+        for t in turns:
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(t.meta["ts"]))
+            total = t.meta.get("timings", {}).get("total", 0.0)
+            print(f"{t.meta['id'][:8]} {stamp} {t.meta['page']:<8} {total:5.2f}s {t.meta['recognized_text']}")
+        return
+
+    if args.limit:
+        turns = turns[: args.limit]
+    if not turns:
+        print("재생할 턴이 없습니다.")
+        sys.exit(1)
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.remote:
+        from engine_client import RemoteEngine
+        engine = RemoteEngine(args.remote)
+    else:
+        from engine import build_engine
+        engine = build_engine()
+        engine.recorder = None   # 재생한 턴을 다시 녹화하지 않는다
+        engine.stt._load_model()
+    report(asyncio.run(replay(turns, engine, args.speed, args.concurrency)))
+
+
+if __name__ == "__main__":
+    main()
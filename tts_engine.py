@@ -6,14 +6,26 @@ app.py에서 사용자에게 재생할 수 있게 한다.
 
 pyttsx3(오프라인, 추가 모델 불필요) 기본 사용.
 향후 MeloTTS 등 GPU TTS로 교체 가능하도록 설계.
+
+synthesize_encoded()는 audio_codec의 출력 인코딩 단계를 거쳐
+키오스크 설정에 맞는 압축 포맷(Opus/MP3)과 MIME 타입을 함께 반환한다.
+
+합성 결과는 디스크를 거치지 않는다. Linux에서는 엔진마다 하나의
+메모리 파일(memfd)을 만들어 두고 pyttsx3 드라이버가 /proc/self/fd 경로로
+WAV를 쓰게 한 뒤 그대로 읽는다 (매 턴 잘라내어 재사용).
+memfd가 없는 OS에서는 mkstemp로 만든 고유 임시 파일을 쓴다.
 """
 
 from __future__ import annotations
 
-import io
 import tempfile
 import os
 import logging
+import threading
+from collections import OrderedDict
+
+from audio_codec import AudioEncoder, AudioEncoding
+from shared_cache import SharedCache, cache_key
 
 logger = logging.getLogger("malpyo.tts")
 
@@ -21,10 +33,31 @@ logger = logging.getLogger("malpyo.tts")
 class TTSEngine:
     """pyttsx3 기반 오프라인 TTS 엔진."""
 
-    def __init__(self, rate: int = 170, volume: float = 1.0) -> None:
+    def __init__(
+        self,
+        rate: int = 170,
+        volume: float = 1.0,
+        encoding: AudioEncoding | None = None,
+        cache: SharedCache | None = None,
+        clip_cache: int = 64,
+    ) -> None:
+        """
+        Args:
+            cache: 프로세스 공용 캐시. 주어지면 합성/인코딩한 오디오를
+                다른 프로세스와 함께 재사용한다
+            clip_cache: 프로세스 안에 보관할 최근 응답 음성 수 (미리 합성한 문장 포함, 0이면 끔)
+        """
         self.rate = rate
         self.volume = volume
+        self.encoder = AudioEncoder(encoding)
+        self.cache = cache
+        self.clip_cache = clip_cache
+        self._clips: OrderedDict[str, tuple[bytes, str]] = OrderedDict()
+        self._clips_lock = threading.Lock()
         self._engine = None
+        # pyttsx3 엔진은 스레드 안전하지 않으므로 합성은 한 번에 하나씩
+        self._lock = threading.Lock()
+        self._memfd: int | None = None
 
     def _load_engine(self):
         if self._engine is not None:
@@ -52,20 +85,97 @@ class TTSEngine:
             logger.error("TTS 초기화 실패: %s", e)
             raise RuntimeError(f"TTS 초기화 실패: {e}") from e
 
+    @property
+    def loaded(self) -> bool:
+        return self._engine is not None
+
+    @property
+    def busy(self) -> bool:
+        """합성 중이면 True (미리 합성이 승객 턴에 양보할 때 확인)."""
+        return self._lock.locked()
+
     def synthesize(self, text: str) -> bytes:
         """텍스트를 WAV 바이트로 변환한다."""
+        with self._lock:
+            return self._synthesize_locked(text)
+
+    def canary(self) -> bool:
+        """짧은 문장을 합성해 엔진이 살아 있는지 확인한다 (상태 점검용).
+
+        합성 중인 턴이 있으면 기다리지 않고 정상으로 본다 (엔진이 사용 중).
+        """
+        if not self._lock.acquire(blocking=False):
+            return True
+        try:
+            return len(self._synthesize_locked("확인")) > 0
+        finally:
+            self._lock.release()
+
+    def _synthesize_locked(self, text: str) -> bytes:
         self._load_engine()
+        fd = self._memory_file()
+        if fd is None:
+            return self._synthesize_to_tempfile(text)
+        os.ftruncate(fd, 0)
+        self._engine.save_to_file(text, f"/proc/self/fd/{fd}")
+        self._engine.runAndWait()
+        return os.pread(fd, os.fstat(fd).st_size, 0)
+
+    def _memory_file(self) -> int | None:
+        """합성용 메모리 파일 디스크립터 (지원하지 않는 OS면 None)."""
+        if self._memfd is None and hasattr(os, "memfd_create") and os.path.isdir("/proc/self/fd"):
+            self._memfd = os.memfd_create("malpyo-tts", os.MFD_CLOEXEC)
+        return self._memfd
 
-        tmp_path = tempfile.mktemp(suffix=".wav")
+    def _synthesize_to_tempfile(self, text: str) -> bytes:
+        fd, tmp_path = tempfile.mkstemp(suffix=".wav", prefix="malpyo-tts-")
+        os.close(fd)
         try:
             self._engine.save_to_file(text, tmp_path)
             self._engine.runAndWait()
-
             with open(tmp_path, "rb") as f:
-                wav_bytes = f.read()
-            return wav_bytes
+                return f.read()
         finally:
             try:
                 os.unlink(tmp_path)
             except OSError:
                 pass
+
+    def synthesize_encoded(self, text: str) -> tuple[bytes, str]:
+        """텍스트를 설정된 출력 포맷으로 합성하여 (오디오 bytes, MIME 타입)을 반환한다."""
+        clip = self.lookup(text)
+        if clip is None:
+            clip = self.encoder.encode(self.synthesize(text))
+            if self.cache is not None:
+                self.cache.put(self._cache_key(text), *clip)
+            self._remember(text, clip)
+        return clip
+
+    def lookup(self, text: str) -> tuple[bytes, str] | None:
+        """합성하지 않고 캐시(프로세스 안 → 공용)에 있는 응답 음성만 찾는다."""
+        with self._clips_lock:
+            clip = self._clips.get(text)
+            if clip is not None:
+                self._clips.move_to_end(text)
+                return clip
+        if self.cache is None:
+            return None
+        hit = self.cache.get(self._cache_key(text))
+        if hit is None:
+            return None
+        # 재생(Streamlit)/전송 쪽이 bytes를 요구하므로 여기서 한 번만 복사한다
+        view, mime = hit
+        clip = (bytes(view), mime)
+        self._remember(text, clip)
+        return clip
+
+    def _cache_key(self, text: str) -> str:
+        return cache_key("tts", text, self.rate, self.volume, self.encoder.encoding, self.encoder.mime_type)
+
+    def _remember(self, text: str, clip: tuple[bytes, str]) -> None:
+        if self.clip_cache <= 0:
+            return
+        with self._clips_lock:
+            self._clips[text] = clip
+            while len(self._clips) > self.clip_cache:
+                self._clips.popitem(last=False)
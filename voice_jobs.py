@@ -0,0 +1,167 @@
+"""
+voice_jobs.py - 세션별 백그라운드 음성 처리 작업 관리
+
+app.py가 Streamlit 스크립트 실행 안에서 파이프라인을 직접 기다리지 않도록,
+음성 턴을 백그라운드 실행기에 넘기고 세션 ID로 진행 상황을 조회한다.
+음성 바 프래그먼트는 poll()로 단계/부분 텍스트를 읽어 표시하고,
+완료되면 pop()으로 결과를 가져가 폼에 반영한다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from admission import Ticket
+from engine import MalPyoEngine, PipelineResult
+
+logger = logging.getLogger("malpyo.jobs")
+
+# 완료 후 아무도 가져가지 않은 작업(닫힌 탭 등)을 정리하는 기준 시간(초)
+STALE_JOB_SECONDS = 300.0
+
+
+@dataclass
+class VoiceJob:
+    """한 세션의 진행 중인 음성 턴."""
+    session_id: str
+    page: str
+    future: Future | None = None
+    stage: str = "queued"              # queued → stt → llm → tts → done
+    partial: PipelineResult = field(default_factory=PipelineResult)
+    submitted_at: float = field(default_factory=time.monotonic)
+    finished_at: float = 0.0
+    ticket: Ticket | None = None       # 제출 시 받은 입장 표 (원격 엔진이면 None)
+
+    @property
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+    def update(self, stage: str, result: PipelineResult) -> None:
+        # 파이프라인 워커 스레드에서 호출된다
+        self.stage = stage
+        self.partial = result
+
+
+class VoiceJobRunner:
+    """세션 ID를 키로 음성 턴을 백그라운드에서 실행한다."""
+
+    def __init__(self, engine: MalPyoEngine, max_workers: int = 4) -> None:
+        self.engine = engine
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="malpyo-voice"
+        )
+        self._jobs: dict[str, VoiceJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        session_id: str,
+        audio_bytes: bytes,
+        page: str,
+        context: dict | None = None,
+        profile: bool | None = None,
+    ) -> VoiceJob:
+        """음성 턴을 제출한다. 같은 세션의 이전 턴은 엔진에서 취소된다.
+
+        profile=True면 이 턴을 프로파일링한다 (None이면 엔진의 MALPYO_PROFILE 설정).
+        """
+        self._evict_stale()
+        # 워커를 기다리는 턴도 입장 제어가 보도록 제출 시점에 센다 (원격 엔진은 서버가 센다)
+        admission = getattr(self.engine, "admission", None)
+        job = VoiceJob(
+            session_id=session_id,
+            page=page,
+            ticket=admission.enqueue() if admission is not None else None,
+        )
+        with self._lock:
+            previous = self._jobs.get(session_id)
+            self._jobs[session_id] = job
+        if previous is not None:
+            # 아직 대기 중인 이전 턴이 나중에 시작되어 이 턴을 취소하지 않도록
+            self._cancel_queued(previous)
+        job.future = self._executor.submit(self._run, job, audio_bytes, context, profile)
+        return job
+
+    def poll(self, session_id: str) -> VoiceJob | None:
+        """진행 중이거나 완료된 작업을 반환한다 (없으면 None)."""
+        with self._lock:
+            return self._jobs.get(session_id)
+
+    def pop(self, session_id: str) -> PipelineResult | None:
+        """완료된 작업의 결과를 꺼낸다. 아직 진행 중이면 None."""
+        with self._lock:
+            job = self._jobs.get(session_id)
+            if job is None or not job.done:
+                return None
+            del self._jobs[session_id]
+        try:
+            return job.future.result()
+        except Exception as e:
+            logger.error("음성 작업 실패: %s", e)
+            return PipelineResult(success=False, error=f"음성 처리 실패: {e}")
+
+    def discard(self, session_id: str) -> None:
+        """세션의 작업을 버린다. 워커를 기다리는 중이면 실행하지 않고, 진행 중이면 취소한다."""
+        with self._lock:
+            job = self._jobs.pop(session_id, None)
+        if job is not None:
+            self._cancel_queued(job)
+        self.engine.cancel_session(session_id)
+
+    def _cancel_queued(self, job: VoiceJob) -> bool:
+        """아직 워커를 기다리는 작업을 실행기에서 빼고 입장 표를 반납한다. 뺐으면 True.
+
+        이미 시작한 턴은 begin_turn 이후이므로 engine.cancel_session으로 취소된다.
+        """
+        if job.future is None or not job.future.cancel():
+            return False
+        if job.ticket is not None:
+            self.engine.admission.release(job.ticket)
+        job.stage = "done"
+        job.finished_at = time.monotonic()
+        return True
+
+    def _run(
+        self,
+        job: VoiceJob,
+        audio_bytes: bytes,
+        context: dict | None,
+        profile: bool | None,
+    ) -> PipelineResult:
+        ticket = job.ticket
+        extra = {"ticket": ticket} if ticket is not None else {}
+        try:
+            return asyncio.run(
+                self.engine.aprocess(
+                    audio_bytes,
+                    job.page,
+                    context,
+                    session_id=job.session_id,
+                    on_progress=job.update,
+                    profile=profile,
+                    **extra,
+                )
+            )
+        finally:
+            if ticket is not None:
+                # 턴이 시작되기 전에 실패했어도 진행 중 수가 새지 않도록 (이미 반납됐으면 무시)
+                self.engine.admission.release(ticket)
+            job.stage = "done"
+            job.finished_at = time.monotonic()
+
+    def _evict_stale(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            stale = [
+                sid for sid, job in self._jobs.items()
+                if job.done and now - job.finished_at > STALE_JOB_SECONDS
+            ]
+            for sid in stale:
+                del self._jobs[sid]
+        if stale:
+            logger.info("방치된 음성 작업 %d건 정리", len(stale))
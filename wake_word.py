@@ -0,0 +1,481 @@
+"""
+wake_word.py - 핸즈프리 호출어("말표야") 감지 (선택)
+
+대화형 모드는 녹음 위젯을 눌러야 말할 수 있는데, 시각장애 승객은 위젯을 찾기
+어렵다. 그렇다고 마이크 입력을 전부 Whisper에 넣으면 CPU가 버티지 못한다.
+핸즈프리 모드는 항상 켜져 있는 가벼운 감지기로 호출어를 기다리고, 호출어가
+들리면 그때만 녹음 창을 열어 STT를 돌린다.
+
+    마이크 20ms 프레임 ──▶ 에너지 VAD (프레임당 RMS 1회)
+                           │ 0.3~1.5초 발화 구간이 끝나면
+                           ▼
+                     호출어 모델: 로그 멜 특징 + 등록 템플릿 DTW 거리
+                           │ 문턱 이하
+                           ▼
+                     녹음 창 (말이 끝나 조용해지거나 최대 길이까지) ──▶ on_request(WAV)
+
+대기 중 비용은 프레임 에너지 계산뿐이고, 특징 추출/DTW는 짧은 발화 구간이
+끝날 때만 돈다. 대기 중 CPU 사용률은 stats()["idle_cpu_percent"]로 측정된다.
+
+호출어 등록 (16kHz 모노 WAV 3~5개, "말표야"만 녹음):
+    python wake_word.py enroll models/wake.npz a.wav b.wav c.wav
+대기 중 CPU 측정 (마이크 없이 배경 잡음 + 가끔 말소리 흉내):
+    python wake_word.py bench --model models/wake.npz --seconds 60
+마이크로 시험 (sounddevice 필요, 호출 후 말한 내용을 STT로 출력):
+    python wake_word.py listen --model models/wake.npz
+키오스크에서는 MALPYO_WAKE_MODEL을 설정하면 대화형 모드에서 핸즈프리가 켜진다.
+"""
+
+from __future__ import annotations
+
+import argparse
+import collections
+import io
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import wave
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from stt_engine import WHISPER_SAMPLE_RATE, decode_pcm_wav
+
+logger = logging.getLogger("malpyo.wake")
+
+WAKE_PHRASE = "말표야"
+FRAME_MS = 20
+FRAME_SAMPLES = WHISPER_SAMPLE_RATE * FRAME_MS // 1000
+
+# 로그 멜 특징: 25ms 창, 10ms 간격, 512점 FFT, 멜 대역 24개
+_WIN = 400
+_HOP = 160
+_NFFT = 512
+_N_MELS = 24
+_mel_filters: np.ndarray | None = None
+
+
+# ─────────────────────────────────────────────────────────
+# 에너지 VAD
+# ─────────────────────────────────────────────────────────
+class EnergyVAD:
+    """프레임 RMS와 배경 잡음 추정으로 발화 시작/끝을 찾는 스트리밍 VAD."""
+
+    def __init__(
+        self,
+        threshold_db: float = -45.0,
+        noise_ratio: float = 3.0,
+        start_frames: int = 3,
+        hang_frames: int = 15,
+    ) -> None:
+        """
+        Args:
+            threshold_db: 절대 문턱(dBFS). 이보다 조용하면 항상 무음
+            noise_ratio: 배경 잡음 RMS의 이 배수를 넘어야 음성
+            start_frames: 연속 음성 프레임 수가 이만큼이면 발화 시작
+            hang_frames: 연속 무음 프레임 수가 이만큼이면 발화 끝
+        """
+        self.floor = 10 ** (threshold_db / 20)
+        self.noise_ratio = noise_ratio
+        self.start_frames = start_frames
+        self.hang_frames = hang_frames
+        self.noise = self.floor
+        self.in_speech = False
+        self._run = 0
+
+    def feed(self, frame: np.ndarray) -> str | None:
+        """프레임 하나를 넣고, 발화가 시작되면 "start", 끝나면 "end"를 반환한다."""
+        rms = float(np.sqrt(np.dot(frame, frame) / len(frame)))
+        voiced = rms > max(self.floor, self.noise * self.noise_ratio)
+        if not voiced:
+            # 배경 잡음은 무음 프레임에서만 천천히 따라간다
+            self.noise = 0.95 * self.noise + 0.05 * max(rms, self.floor / 10)
+        if voiced != self.in_speech:
+            self._run += 1
+            if self._run >= (self.start_frames if voiced else self.hang_frames):
+                self.in_speech = voiced
+                self._run = 0
+                return "start" if voiced else "end"
+        else:
+            self._run = 0
+        return None
+
+
+# ─────────────────────────────────────────────────────────
+# 호출어 모델 (로그 멜 + DTW 템플릿 매칭)
+# ─────────────────────────────────────────────────────────
+def _mel_filterbank() -> np.ndarray:
+    global _mel_filters
+    if _mel_filters is None:
+        def hz_to_mel(f):
+            return 2595 * np.log10(1 + f / 700)
+
+        mels = np.linspace(hz_to_mel(80), hz_to_mel(WHISPER_SAMPLE_RATE / 2 - 400), _N_MELS + 2)
+        bins = np.floor((_NFFT + 1) * (700 * (10 ** (mels / 2595) - 1)) / WHISPER_SAMPLE_RATE).astype(int)
+        filters = np.zeros((_N_MELS, _NFFT // 2 + 1), dtype=np.float32)
+        for m in range(1, _N_MELS + 1):
+            lo, mid, hi = bins[m - 1], bins[m], bins[m + 1]
+            filters[m - 1, lo:mid] = (np.arange(lo, mid) - lo) / max(1, mid - lo)
+            filters[m - 1, mid:hi] = (hi - np.arange(mid, hi)) / max(1, hi - mid)
+        _mel_filters = filters
+    return _mel_filters
+
+
+def log_mel(samples: np.ndarray) -> np.ndarray:
+    """16kHz 샘플 → (프레임 수, 24) 로그 멜 특징 (발화 단위 평균 정규화)."""
+    if len(samples) < _WIN:
+        samples = np.pad(samples, (0, _WIN - len(samples)))
+    n = 1 + (len(samples) - _WIN) // _HOP
+    idx = np.arange(_WIN)[None, :] + _HOP * np.arange(n)[:, None]
+    frames = samples[idx] * np.hanning(_WIN).astype(np.float32)
+    power = np.abs(np.fft.rfft(frames, _NFFT)) ** 2
+    feats = np.log(power @ _mel_filterbank().T + 1e-6)
+    return feats - feats.mean(axis=0)
+
+
+def dtw_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """두 특징 열의 DTW 거리 (경로 길이로 나눈 평균 프레임 거리)."""
+    cost = np.sqrt(((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=2))
+    acc = np.full((len(a) + 1, len(b) + 1), np.inf)
+    acc[0, 0] = 0.0
+    for i in range(1, len(a) + 1):
+        row = acc[i]
+        prev = acc[i - 1]
+        # 대각/위쪽은 벡터로, 왼쪽 이동은 누적 최소로 처리
+        best = np.minimum(prev[1:], prev[:-1]) + cost[i - 1]
+        for j in range(1, len(b) + 1):
+            row[j] = min(best[j - 1], row[j - 1] + cost[i - 1, j - 1])
+    return float(acc[-1, -1] / (len(a) + len(b)))
+
+
+class KeywordModel:
+    """등록한 호출어 녹음(템플릿)과의 DTW 거리로 호출어를 판정한다."""
+
+    def __init__(
+        self, templates: list[np.ndarray], threshold: float, phrase: str = WAKE_PHRASE
+    ) -> None:
+        self.templates = templates
+        self.threshold = threshold
+        self.phrase = phrase
+
+    @classmethod
+    def enroll(cls, recordings: list[np.ndarray], margin: float = 1.25, phrase: str = WAKE_PHRASE) -> "KeywordModel":
+        """호출어 녹음들로 모델을 만든다. 문턱 = 템플릿끼리 최대 거리 × margin."""
+        if len(recordings) < 2:
+            raise ValueError("호출어 녹음이 2개 이상 필요합니다")
+        templates = [log_mel(_trim(r)) for r in recordings]
+        spread = max(
+            dtw_distance(a, b) for i, a in enumerate(templates) for b in templates[i + 1:]
+        )
+        return cls(templates, spread * margin, phrase)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "KeywordModel":
+        data = np.load(path, allow_pickle=False)
+        count = int(data["count"])
+        return cls(
+            [data[f"t{i}"] for i in range(count)],
+            float(data["threshold"]),
+            str(data["phrase"]),
+        )
+
+    def save(self, path: str | Path) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path,
+            count=len(self.templates),
+            threshold=self.threshold,
+            phrase=self.phrase,
+            **{f"t{i}": t for i, t in enumerate(self.templates)},
+        )
+
+    def score(self, samples: np.ndarray) -> float:
+        feats = log_mel(_trim(samples))
+        return min(dtw_distance(feats, t) for t in self.templates)
+
+    def match(self, samples: np.ndarray) -> tuple[bool, float]:
+        distance = self.score(samples)
+        return distance <= self.threshold, distance
+
+
+def _trim(samples: np.ndarray) -> np.ndarray:
+    """녹음 앞뒤의 무음을 잘라 낸다 (템플릿과 검사 구간의 시작/끝을 맞춘다)."""
+    n = len(samples) // FRAME_SAMPLES * FRAME_SAMPLES
+    frames = samples[:n].reshape(-1, FRAME_SAMPLES)
+    rms = np.sqrt((frames ** 2).mean(axis=1))
+    voiced = np.flatnonzero(rms > max(rms.max() * 0.1, 10 ** (-45 / 20)))
+    if not len(voiced):
+        return samples
+    return samples[voiced[0] * FRAME_SAMPLES:(voiced[-1] + 1) * FRAME_SAMPLES]
+
+
+def to_wav(samples: np.ndarray) -> bytes:
+    """16kHz 모노 float32 샘플 → 16-bit PCM WAV bytes (STT 입력)."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(WHISPER_SAMPLE_RATE)
+        w.writeframes(pcm.tobytes())
+    return buf.getvalue()
+
+
+# ─────────────────────────────────────────────────────────
+# 상시 감지기
+# ─────────────────────────────────────────────────────────
+class WakeListener:
+    """프레임을 받아 호출어를 기다리고, 호출되면 요청 발화를 녹음해 넘긴다."""
+
+    def __init__(
+        self,
+        model: KeywordModel,
+        on_request: Callable[[bytes], None],
+        on_wake: Callable[[], None] | None = None,
+        min_word: float = 0.3,
+        max_word: float = 1.5,
+        listen_timeout: float = 4.0,
+        max_request: float = 8.0,
+        vad: EnergyVAD | None = None,
+    ) -> None:
+        """
+        Args:
+            model: 호출어 모델
+            on_request: 호출 뒤 녹음한 요청 발화(WAV bytes)를 받는 함수 (STT로 넘긴다)
+            on_wake: 호출어를 감지했을 때 호출 (안내음 재생 등)
+            min_word / max_word: 호출어로 검사할 발화 구간 길이 범위(초)
+            listen_timeout: 호출 뒤 이 시간(초) 안에 말이 없으면 대기로 돌아간다
+            max_request: 요청 발화 최대 길이(초)
+            vad: 프레임 VAD (None이면 기본 설정)
+        """
+        self.model = model
+        self.on_request = on_request
+        self.on_wake = on_wake
+        self.min_word = min_word
+        self.max_word = max_word
+        self.listen_timeout = listen_timeout
+        self.max_request = max_request
+        self.vad = vad or EnergyVAD()
+        self.enabled = True
+        # 발화 시작 전 0.3초를 함께 잘라야 첫 음절이 잘리지 않는다
+        self._preroll: collections.deque[np.ndarray] = collections.deque(maxlen=15)
+        self._segment: list[np.ndarray] = []
+        self._capturing = False
+        self._capture_started = False
+        self._capture: list[np.ndarray] = []
+        self._capture_frames = 0
+        self._stream = None
+        self._frames: queue.Queue[np.ndarray | None] = queue.Queue(maxsize=200)
+        self._thread: threading.Thread | None = None
+        # CPU 측정 (대기 상태만: 녹음 창과 요청 처리 시간은 빼고)
+        self._idle_cpu = 0.0
+        self._idle_audio = 0.0
+        self._counts = collections.Counter()
+
+    # ─── 프레임 처리 (마이크 없이도 호출 가능) ───
+    def feed(self, frame: np.ndarray) -> None:
+        """20ms(320샘플) float32 프레임 하나를 처리한다."""
+        if self._capturing:
+            self._feed_capture(frame)
+            return
+        start = time.thread_time()
+        event = self.vad.feed(frame)
+        if self.vad.in_speech or event == "end":
+            if event == "start":
+                self._segment = list(self._preroll)
+            self._segment.append(frame)
+            if event == "end":
+                self._check_segment()
+        self._preroll.append(frame)
+        if not self._capturing:
+            self._idle_cpu += time.thread_time() - start
+            self._idle_audio += len(frame) / WHISPER_SAMPLE_RATE
+
+    def _check_segment(self) -> None:
+        # 끝의 무음 행오버 프레임은 빼고 길이를 잰다
+        voiced = self._segment[: max(1, len(self._segment) - self.vad.hang_frames)]
+        self._segment = []
+        seconds = len(voiced) * FRAME_MS / 1000
+        if not (self.min_word <= seconds <= self.max_word) or not self.enabled:
+            self._counts["segments_skipped"] += 1
+            return
+        self._counts["keyword_checks"] += 1
+        matched, distance = self.model.match(np.concatenate(voiced))
+        logger.debug("호출어 거리 %.2f (문턱 %.2f)", distance, self.model.threshold)
+        if not matched:
+            return
+        self._counts["wakes"] += 1
+        logger.info("호출어 감지 (거리 %.2f)", distance)
+        self._capturing = True
+        self._capture_started = False
+        self._capture = []
+        self._capture_frames = 0
+        if self.on_wake is not None:
+            try:
+                self.on_wake()
+            except Exception as e:
+                logger.warning("호출 안내 실패: %s", e)
+
+    def _feed_capture(self, frame: np.ndarray) -> None:
+        event = self.vad.feed(frame)
+        self._capture_frames += 1
+        elapsed = self._capture_frames * FRAME_MS / 1000
+        if event == "start" and not self._capture_started:
+            self._capture_started = True
+            self._capture = list(self._preroll)
+        self._preroll.append(frame)
+        if self._capture_started:
+            self._capture.append(frame)
+        if not self._capture_started and elapsed >= self.listen_timeout:
+            self._counts["timeouts"] += 1
+            logger.info("호출 뒤 말이 없어 대기로 돌아감")
+            self._capturing = False
+            return
+        if self._capture_started and (event == "end" or elapsed >= self.max_request):
+            self._capturing = False
+            self._counts["requests"] += 1
+            audio = to_wav(np.concatenate(self._capture))
+            self._capture = []
+            try:
+                self.on_request(audio)
+            except Exception as e:
+                logger.error("요청 처리 실패: %s", e)
+
+    def stats(self) -> dict:
+        """대기 중 CPU 사용률(코어 1개 기준 %), 검사/호출/요청 건수."""
+        return {
+            "idle_audio_seconds": round(self._idle_audio, 1),
+            "idle_cpu_percent": round(100 * self._idle_cpu / self._idle_audio, 3) if self._idle_audio else 0.0,
+            **self._counts,
+        }
+
+    # ─── 마이크 입력 ───
+    def start(self, device: int | str | None = None) -> None:
+        """마이크 입력을 열고 백그라운드에서 프레임을 처리한다."""
+        if self._stream is not None:
+            return
+        try:
+            import sounddevice as sd
+        except ImportError:
+            raise RuntimeError(
+                "sounddevice가 설치되지 않았습니다.\n"
+                "pip install sounddevice 로 설치해주세요."
+            )
+
+        def _callback(indata, frames, time_info, status) -> None:
+            try:
+                self._frames.put_nowait(indata[:, 0].copy())
+            except queue.Full:
+                self._counts["dropped_frames"] += 1
+
+        self._thread = threading.Thread(target=self._run, name="malpyo-wake", daemon=True)
+        self._thread.start()
+        self._stream = sd.InputStream(
+            samplerate=WHISPER_SAMPLE_RATE, channels=1, dtype="float32",
+            blocksize=FRAME_SAMPLES, device=device, callback=_callback,
+        )
+        self._stream.start()
+        logger.info("핸즈프리 대기 시작 (호출어: %s)", self.model.phrase)
+
+    def stop(self) -> None:
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+        self._frames.put(None)
+
+    def _run(self) -> None:
+        while True:
+            frame = self._frames.get()
+            if frame is None:
+                return
+            self.feed(frame)
+
+    @classmethod
+    def from_env(cls, on_request: Callable[[bytes], None], **kwargs) -> "WakeListener | None":
+        """MALPYO_WAKE_MODEL(호출어 모델 .npz)이 설정되어 있으면 감지기를 만든다."""
+        path = os.getenv("MALPYO_WAKE_MODEL")
+        if not path:
+            return None
+        return cls(KeywordModel.load(path), on_request, **kwargs)
+
+
+# ─────────────────────────────────────────────────────────
+# CLI
+# ─────────────────────────────────────────────────────────
+def _read_wav(path: str) -> np.ndarray:
+    samples = decode_pcm_wav(Path(path).read_bytes())
+    if samples is None:
+        raise ValueError(f"16-bit PCM WAV가 아닙니다: {path}")
+    return samples
+
+
+def _bench(model: KeywordModel, seconds: float) -> dict:
+    """배경 잡음에 1.5초마다 짧은 말소리 흉내(변조 톤)를 섞어 대기 중 비용을 잰다."""
+    rng = np.random.default_rng(0)
+    listener = WakeListener(model, on_request=lambda audio: None)
+    total = int(seconds * 1000 / FRAME_MS)
+    t = np.arange(FRAME_SAMPLES) / WHISPER_SAMPLE_RATE
+    start = time.perf_counter()
+    for i in range(total):
+        frame = rng.normal(0, 0.002, FRAME_SAMPLES).astype(np.float32)
+        if i % 75 < 35:     # 0.7초 발화 + 0.8초 쉼
+            frame += (0.1 * np.sin(2 * np.pi * (180 + 40 * (i % 7)) * t)).astype(np.float32)
+        listener.feed(frame)
+    return {**listener.stats(), "wall_seconds": round(time.perf_counter() - start, 2)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="말표 호출어 감지 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("enroll", help="호출어 녹음으로 모델 만들기")
+    p.add_argument("out")
+    p.add_argument("wavs", nargs="+")
+    p.add_argument("--margin", type=float, default=1.25)
+    p = sub.add_parser("bench", help="대기 중 CPU 사용률 측정")
+    p.add_argument("--model")
+    p.add_argument("--seconds", type=float, default=60)
+    p = sub.add_parser("listen", help="마이크로 시험 (호출 뒤 말한 내용을 STT로 출력)")
+    p.add_argument("--model", required=True)
+    p.add_argument("--device")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.command == "enroll":
+        model = KeywordModel.enroll([_read_wav(w) for w in args.wavs], margin=args.margin)
+        model.save(args.out)
+        print(f"템플릿 {len(model.templates)}개, 문턱 {model.threshold:.2f} → {args.out}")
+    elif args.command == "bench":
+        if args.model:
+            model = KeywordModel.load(args.model)
+        else:
+            # 모델이 없으면 합성 템플릿으로 비용만 잰다
+            rng = np.random.default_rng(1)
+            model = KeywordModel([log_mel(rng.normal(0, 0.1, 12000).astype(np.float32))], 0.0)
+        print(_bench(model, args.seconds))
+    else:
+        from stt_engine import STTEngine
+
+        stt = STTEngine()
+        stt.warmup()
+        listener = WakeListener(
+            KeywordModel.load(args.model),
+            on_request=lambda audio: print("인식:", stt.transcribe(audio).text),
+            on_wake=lambda: print("호출됨, 말씀하세요"),
+        )
+        listener.start(device=int(args.device) if args.device and args.device.isdigit() else args.device)
+        try:
+            while True:
+                time.sleep(10)
+                print(listener.stats())
+        except KeyboardInterrupt:
+            listener.stop()
+            sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()